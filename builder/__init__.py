@@ -2,20 +2,39 @@
 Builder - Unified Autonomous Build Orchestration System
 """
 
+import importlib
+
 __version__ = "2.0.0"
 __author__ = "Raivyn"
 
-from .config import Config, BuildProfile
-from .orchestrator import BuildOrchestrator
-from .session_manager import SessionManager
-from .prompt_manager import PromptManager
-from .cli import cli
+# Public names and the modules they come from; imported on first access so
+# that `import builder` (and every CLI start) does not load them all
+_EXPORTS = {
+    'Config': 'config',
+    'BuildProfile': 'config',
+    'BuildOrchestrator': 'orchestrator',
+    'SessionManager': 'session_manager',
+    'PromptManager': 'prompt_manager',
+    'cli': 'cli',
+}
 
 __all__ = [
     'Config',
-    'BuildProfile', 
+    'BuildProfile',
     'BuildOrchestrator',
     'SessionManager',
     'PromptManager',
     'cli'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,293 @@
+"""
+Session statistics: incrementally maintained rollups and per-step analytics
+"""
+
+import json
+import math
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class DurationSketch:
+    """Log-bucketed duration histogram for approximate percentiles
+
+    Bucket boundaries grow geometrically by ``GAMMA``, so any quantile is
+    estimated within about 5% relative error. Sketches merge by adding
+    bucket counts and support removal, which lets rollups follow sessions
+    that move between statuses.
+    """
+
+    GAMMA = 1.1
+
+    def __init__(self, buckets: Optional[Dict[int, int]] = None):
+        self.buckets: Dict[int, int] = dict(buckets or {})
+
+    @classmethod
+    def from_json(cls, data: Optional[str]) -> 'DurationSketch':
+        """Load a sketch from its JSON representation"""
+        if not data:
+            return cls()
+        return cls({int(k): v for k, v in json.loads(data).items()})
+
+    def to_json(self) -> str:
+        """Serialize sketch to JSON"""
+        return json.dumps({str(k): v for k, v in sorted(self.buckets.items())})
+
+    def _index(self, duration_ms: int) -> int:
+        return math.ceil(math.log(max(duration_ms, 1), self.GAMMA))
+
+    def add(self, duration_ms: int, count: int = 1):
+        """Add (or with a negative count, remove) a duration"""
+        index = self._index(duration_ms)
+        total = self.buckets.get(index, 0) + count
+        if total > 0:
+            self.buckets[index] = total
+        else:
+            self.buckets.pop(index, None)
+
+    def merge(self, other: 'DurationSketch'):
+        """Merge another sketch into this one"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-th quantile in milliseconds"""
+        total = self.count
+        if total == 0:
+            return None
+
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.GAMMA ** index / (self.GAMMA + 1)
+        return None
+
+
+def rollup_day(started_at_ms: int) -> str:
+    """Local calendar day a session is rolled up under"""
+    return datetime.fromtimestamp(started_at_ms / 1000).date().isoformat()
+
+
+def apply_rollup(conn: sqlite3.Connection, session: sqlite3.Row, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) a session row's contribution to the rollups
+
+    ``session`` needs ``started_at``, ``ended_at``, ``status``,
+    ``prompt_file`` and ``metadata`` columns. Call this inside the same
+    write transaction that changes the session.
+    """
+    metadata = json.loads(session['metadata']) if session['metadata'] else {}
+    key = (
+        rollup_day(session['started_at']),
+        metadata.get('profile') or '',
+        session['prompt_file'],
+        session['status']
+    )
+
+    duration_ms = None
+    if session['ended_at'] is not None:
+        duration_ms = max(session['ended_at'] - session['started_at'], 0)
+
+    row = conn.execute('''
+        SELECT duration_sketch FROM session_rollups
+        WHERE day = ? AND profile = ? AND prompt_file = ? AND status = ?
+    ''', key).fetchone()
+
+    sketch = DurationSketch.from_json(row[0] if row else None)
+    if duration_ms is not None:
+        sketch.add(duration_ms, sign)
+
+    conn.execute('''
+        INSERT INTO session_rollups
+        (day, profile, prompt_file, status, session_count,
+         duration_count, duration_sum_ms, duration_sketch)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (day, profile, prompt_file, status) DO UPDATE SET
+            session_count = session_count + excluded.session_count,
+            duration_count = duration_count + excluded.duration_count,
+            duration_sum_ms = duration_sum_ms + excluded.duration_sum_ms,
+            duration_sketch = excluded.duration_sketch
+    ''', (
+        *key, sign,
+        sign if duration_ms is not None else 0,
+        sign * duration_ms if duration_ms is not None else 0,
+        sketch.to_json()
+    ))
+
+
+def summarize_rollups(rows: Iterable[sqlite3.Row], duration_status: str) -> Dict:
+    """Fold rollup rows into totals, a status breakdown and duration stats
+
+    Durations are only aggregated for rows with ``duration_status``.
+    """
+    total_sessions = 0
+    status_counts: Dict[str, int] = {}
+    duration_count = 0
+    duration_sum_ms = 0
+    sketch = DurationSketch()
+
+    for row in rows:
+        if row['session_count'] == 0:
+            continue
+        total_sessions += row['session_count']
+        status_counts[row['status']] = status_counts.get(row['status'], 0) + row['session_count']
+
+        if row['status'] == duration_status:
+            duration_count += row['duration_count']
+            duration_sum_ms += row['duration_sum_ms']
+            sketch.merge(DurationSketch.from_json(row['duration_sketch']))
+
+    percentiles = {}
+    for name, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+        value = sketch.quantile(q)
+        percentiles[name] = round(value / 60000, 1) if value is not None else 0
+
+    return {
+        'total_sessions': total_sessions,
+        'status_breakdown': status_counts,
+        'average_duration_minutes': (
+            duration_sum_ms / duration_count / 60000 if duration_count else 0
+        ),
+        'duration_percentiles_minutes': percentiles
+    }
+
+
+# One row per started step of each session in the window. Steps are only
+# marked in progress while a build runs, so a step ends when the next one
+# starts (or the session ends). Idle nudges are attributed to the step
+# that was running when they were sent; the partial index on
+# idle_continue_sent events serves the correlated count.
+_STEP_RUNS = '''
+    WITH steps AS (
+        SELECT s.prompt_file, b.session_id, b.step_number, b.description, b.started_at,
+               COALESCE(
+                   b.completed_at,
+                   LEAD(b.started_at) OVER (PARTITION BY b.session_id ORDER BY b.step_number),
+                   s.ended_at
+               ) AS ended_at
+        FROM build_steps b
+        JOIN sessions s ON s.id = b.session_id
+        WHERE s.started_at >= :cutoff AND b.started_at IS NOT NULL
+    ),
+    runs AS (
+        SELECT steps.*,
+               ended_at - started_at AS duration_ms,
+               (SELECT COUNT(*) FROM session_events e
+                WHERE e.session_id = steps.session_id
+                  AND e.event_type = 'idle_continue_sent'
+                  AND e.timestamp >= steps.started_at
+                  AND (steps.ended_at IS NULL OR e.timestamp < steps.ended_at)) AS nudges
+        FROM steps
+    )
+'''
+
+
+def _percentile_column(q: float, name: str) -> str:
+    """Nearest-rank percentile over ``n``/``total`` from a ranked CTE"""
+    return (f"MAX(CASE WHEN n = CAST({q} * (total - 1) AS INTEGER) + 1 "
+            f"THEN duration_ms END) AS {name}")
+
+
+def step_statistics(conn: sqlite3.Connection, cutoff_ms: int) -> List[Dict[str, Any]]:
+    """Duration distribution and idle nudges for each step of each prompt file"""
+    cursor = conn.execute(_STEP_RUNS + f'''
+        , ranked AS (
+            SELECT prompt_file, step_number, description, duration_ms, nudges,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY prompt_file, step_number
+                       ORDER BY duration_ms IS NULL, duration_ms
+                   ) AS n,
+                   COUNT(duration_ms) OVER (PARTITION BY prompt_file, step_number) AS total
+            FROM runs
+        )
+        SELECT prompt_file, step_number, MAX(description) AS description,
+               COUNT(*) AS runs,
+               COUNT(duration_ms) AS finished_runs,
+               MIN(duration_ms) AS min_ms,
+               AVG(duration_ms) AS avg_ms,
+               {_percentile_column(0.5, 'p50_ms')},
+               {_percentile_column(0.9, 'p90_ms')},
+               MAX(duration_ms) AS max_ms,
+               SUM(nudges) AS nudges,
+               AVG(nudges) AS nudges_per_run
+        FROM ranked
+        GROUP BY prompt_file, step_number
+        ORDER BY prompt_file, step_number
+    ''', {'cutoff': cutoff_ms})
+    return [dict(row) for row in cursor]
+
+
+def step_throughput(conn: sqlite3.Connection, cutoff_ms: int,
+                    hours: int = 24) -> List[Dict[str, Any]]:
+    """Steps finished per hour for the most recent active hours
+
+    ``per_hour_24h`` averages over the trailing 24 hours, counting hours
+    with no finished steps as zero.
+    """
+    cursor = conn.execute(_STEP_RUNS + '''
+        , hourly AS (
+            SELECT ended_at / 3600000 AS hour, COUNT(*) AS steps
+            FROM runs
+            WHERE ended_at IS NOT NULL
+            GROUP BY hour
+        )
+        SELECT hour * 3600000 AS hour_ms, steps,
+               SUM(steps) OVER (
+                   ORDER BY hour RANGE BETWEEN 23 PRECEDING AND CURRENT ROW
+               ) / 24.0 AS per_hour_24h
+        FROM hourly
+        ORDER BY hour DESC
+        LIMIT :hours
+    ''', {'cutoff': cutoff_ms, 'hours': hours})
+    return [dict(row) for row in reversed(cursor.fetchall())]
+
+
+def slowest_steps(conn: sqlite3.Connection, cutoff_ms: int,
+                  top: int = 3) -> List[Dict[str, Any]]:
+    """The steps of each prompt file that are most often the slowest in a run
+
+    Steps are ranked by duration within every run; per prompt file the
+    ``top`` steps with the most first places (then the best average rank)
+    are returned.
+    """
+    cursor = conn.execute(_STEP_RUNS + '''
+        , ranked AS (
+            SELECT prompt_file, session_id, step_number, description, duration_ms,
+                   RANK() OVER (PARTITION BY session_id ORDER BY duration_ms DESC) AS slow_rank
+            FROM runs
+            WHERE duration_ms IS NOT NULL
+        ),
+        per_step AS (
+            SELECT prompt_file, step_number, MAX(description) AS description,
+                   COUNT(*) AS runs,
+                   SUM(slow_rank = 1) AS slowest_runs,
+                   AVG(slow_rank) AS avg_rank,
+                   AVG(duration_ms) AS avg_ms
+            FROM ranked
+            GROUP BY prompt_file, step_number
+        ),
+        prompt_runs AS (
+            SELECT prompt_file, COUNT(DISTINCT session_id) AS prompt_runs
+            FROM ranked
+            GROUP BY prompt_file
+        ),
+        ordered AS (
+            SELECT per_step.*, prompt_runs.prompt_runs,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY per_step.prompt_file
+                       ORDER BY slowest_runs DESC, avg_rank, avg_ms DESC
+                   ) AS position
+            FROM per_step
+            JOIN prompt_runs USING (prompt_file)
+        )
+        SELECT * FROM ordered
+        WHERE position <= :top
+        ORDER BY prompt_file, position
+    ''', {'cutoff': cutoff_ms, 'top': top})
+    return [dict(row) for row in cursor]
@@ -0,0 +1,62 @@
+"""
+Compressed session archives
+"""
+
+import bz2
+import gzip
+import json
+import logging
+import lzma
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+from .models import SessionEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+# compression setting -> (file suffix, opener)
+COMPRESSORS = {
+    'gzip': ('.gz', gzip.open),
+    'bz2': ('.bz2', bz2.open),
+    'xz': ('.xz', lzma.open),
+    'none': ('', open),
+}
+
+ARCHIVE_NAME = 'session_data.jsonl'
+
+
+def archive_path(archive_dir: Path, compression: Optional[str]) -> Path:
+    """Get the archive file path for a compression setting"""
+    compression = (compression or 'none').lower()
+    if compression not in COMPRESSORS:
+        logger.warning(f"Unknown compression '{compression}', writing uncompressed archive")
+        compression = 'none'
+    return archive_dir / (ARCHIVE_NAME + COMPRESSORS[compression][0])
+
+
+def open_archive(path: Path, mode: str = 'r') -> TextIO:
+    """Open an archive file as text, picking the codec from its suffix"""
+    path = Path(path)
+    for suffix, opener in COMPRESSORS.values():
+        if suffix and path.suffix == suffix:
+            return opener(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def iter_archived_events(path: Path) -> Iterator[SessionEvent]:
+    """Stream the events recorded in a session archive"""
+    with open_archive(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get('type') != 'event':
+                continue
+            yield SessionEvent(
+                session_id=record['session_id'],
+                timestamp=datetime.fromisoformat(record['timestamp']),
+                event_type=record['event_type'],
+                data=record.get('data') or {},
+                id=record.get('id')
+            )
@@ -0,0 +1,731 @@
+"""
+Benchmarks and stress tests for Builder
+
+Run with ``python -m builder.bench``.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .config import Config
+from .log_pipeline import DATE_FORMAT, LOG_FORMAT, LogPipeline
+from .prompt_manager import BuildPrompt, BuildStep
+from . import text_prompt
+
+
+def _bench_config(db_path: Path, backend: str = 'sqlite') -> Config:
+    """Configuration pointing at a scratch database"""
+    config = Config()
+    config.set('storage_backend', backend)
+    config.set('database_path', str(db_path))
+    config.set('segment_log_dir', str(db_path.parent / 'segments'))
+    config.set('sessions_dir', str(db_path.parent / 'sessions'))
+    return config
+
+
+def _bench_prompt(steps: int = 5) -> BuildPrompt:
+    """Small synthetic prompt for benchmark sessions"""
+    return BuildPrompt(
+        name='Bench',
+        filename='bench.yaml',
+        format='yaml',
+        initial_prompt='Benchmark prompt',
+        steps=[BuildStep(number=i, content=f'Step {i}', description=f'Step {i}')
+               for i in range(1, steps + 1)]
+    )
+
+
+def _event_writer(db_path: str, events: int, start: multiprocessing.Event,
+                  backend: str = 'sqlite'):
+    """Worker process: create a session and log events into it"""
+    from .session_manager import SessionManager
+
+    session_manager = SessionManager(_bench_config(Path(db_path), backend))
+    session = session_manager.create_session(_bench_prompt())
+
+    start.wait()
+    for i in range(events):
+        session_manager.log_event(session.id, 'bench_event', {'n': i})
+
+
+def concurrent_write_stress(writers: int = 4, events: int = 500,
+                            db_path: Path = None, backend: str = 'sqlite') -> Dict[str, Any]:
+    """Run ``writers`` processes logging ``events`` events each into one store
+
+    Reports throughput and verifies that no events were lost. ``backend``
+    must be one shared between processes (sqlite or segment_log). The
+    writers open a fresh store together, so they also race to migrate it.
+    """
+    from .session_manager import SessionManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(db_path or Path(tmp) / 'stress.db')
+
+        start = multiprocessing.Event()
+        processes = [
+            multiprocessing.Process(target=_event_writer,
+                                    args=(str(db_path), events, start, backend))
+            for _ in range(writers)
+        ]
+        for process in processes:
+            process.start()
+
+        # Give workers time to open the database before timing the writes
+        time.sleep(0.5)
+        began = time.perf_counter()
+        start.set()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - began
+
+        # Fold any buffered log segments into the database before counting
+        SessionManager(_bench_config(db_path, backend)).compact_storage()
+        with sqlite3.connect(db_path) as conn:
+            written = conn.execute(
+                "SELECT COUNT(*) FROM session_events WHERE event_type = 'bench_event'"
+            ).fetchone()[0]
+
+        failed = [p.exitcode for p in processes if p.exitcode != 0]
+
+    expected = writers * events
+    return {
+        'backend': backend,
+        'writers': writers,
+        'events_per_writer': events,
+        'expected_events': expected,
+        'written_events': written,
+        'lost_events': expected - written,
+        'failed_writers': len(failed),
+        'seconds': round(elapsed, 3),
+        'events_per_second': round(written / elapsed, 1) if elapsed else None
+    }
+
+
+def backend_write_throughput(events: int = 5000) -> Dict[str, Any]:
+    """Time logging ``events`` events through each storage backend in one process"""
+    from .session_manager import SessionManager
+    from .storage import BACKENDS
+
+    results = {}
+    for backend in BACKENDS:
+        with tempfile.TemporaryDirectory() as tmp:
+            session_manager = SessionManager(_bench_config(Path(tmp) / 'bench.db', backend))
+            session = session_manager.create_session(_bench_prompt())
+
+            began = time.perf_counter()
+            for i in range(events):
+                session_manager.log_event(session.id, 'bench_event', {'n': i})
+            elapsed = time.perf_counter() - began
+
+            began = time.perf_counter()
+            compacted = session_manager.compact_storage()
+            compact_seconds = time.perf_counter() - began
+            session_manager.close()
+
+        results[backend] = {
+            'seconds': round(elapsed, 3),
+            'events_per_second': round(events / elapsed, 1) if elapsed else None,
+            'compacted_records': compacted,
+            'compact_seconds': round(compact_seconds, 3)
+        }
+
+    return {'events': events, 'backends': results}
+
+
+def _measure(load: Callable[[], Any]) -> Dict[str, Any]:
+    """Time ``load`` untraced, then run it again to trace its peak memory"""
+    began = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - began
+
+    tracemalloc.start()
+    try:
+        load()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 2 ** 20, 1)}
+
+
+def event_loading(events: int = 1_000_000) -> Dict[str, Any]:
+    """Time and memory of reading a session with ``events`` events from SQLite
+
+    Compares streaming the events, holding them all with their data still
+    undecoded, and holding them all after decoding every payload.
+    """
+    from .models import SessionEvent
+    from .session_manager import SessionManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session_manager = SessionManager(_bench_config(Path(tmp) / 'bench.db'))
+        session = session_manager.create_session(_bench_prompt())
+
+        began = time.perf_counter()
+        storage = session_manager.storage
+        with storage.batch():
+            for i in range(events):
+                storage.append_event(SessionEvent(
+                    session.id, session.started_at, 'output_received',
+                    {'n': i, 'line': f'Compiling module {i % 500} of 500'}
+                ))
+        write_seconds = time.perf_counter() - began
+
+        def stream():
+            return Counter(event.event_type
+                           for event in session_manager.iter_session_events(session.id))
+
+        def hold():
+            return session_manager.get_session_events(session.id)
+
+        def hold_decoded():
+            loaded = session_manager.get_session_events(session.id)
+            for event in loaded:
+                event.data
+            return loaded
+
+        results = {
+            'stream': _measure(stream),
+            'hold': _measure(hold),
+            'hold_decoded': _measure(hold_decoded)
+        }
+        session_manager.close()
+
+    return {'events': events, 'write_seconds': round(write_seconds, 3), 'reads': results}
+
+
+def _write_text_prompt(path: Path, size: int):
+    """Write a synthetic text prompt of at least ``size`` bytes"""
+    step = 'Implement the next part of the subsystem and verify it carefully. ' * 15
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'{text_prompt.BUILD_MARKER}\nYou will build Bench, a large generated project.\n'
+                '\n# Build Steps\n')
+        number = 0
+        while f.tell() < size:
+            number += 1
+            f.write(f'{number}. {step}\n  Notes for step {number} continue on this line.\n')
+
+
+def text_prompt_parsing(megabytes: int = 16) -> Dict[str, Any]:
+    """Time and memory of parsing text prompts of growing size up to ``megabytes``
+
+    Parsing is linear, so seconds per megabyte should stay flat as the
+    files grow.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (megabytes / 4, megabytes / 2, megabytes):
+            path = Path(tmp) / f'prompt-{size:g}mb.txt'
+            _write_text_prompt(path, int(size * 2 ** 20))
+
+            def load():
+                with open(path, 'r', encoding='utf-8') as f:
+                    return text_prompt.parse(f, str(path))
+
+            result = _measure(load)
+            result['steps'] = len(load()[1])
+            result['seconds_per_mb'] = round(result['seconds'] / size, 4)
+            results[f'{size:g}MB'] = result
+
+    return {'megabytes': megabytes, 'files': results}
+
+
+def _log_call_times(handler: logging.Handler, records: int) -> Dict[str, Any]:
+    """Time each logging call made through ``handler``, in the calling thread"""
+    logger = logging.Logger('bench')
+    logger.addHandler(handler)
+    timings = []
+    for number in range(records):
+        began = time.perf_counter()
+        logger.info('Step %d produced output: %s', number, 'x' * 120)
+        timings.append(time.perf_counter() - began)
+    timings.sort()
+    return {
+        'seconds': round(sum(timings), 3),
+        'p50_us': round(timings[len(timings) // 2] * 1e6, 1),
+        'p99_us': round(timings[int(len(timings) * 0.99)] * 1e6, 1),
+        'max_us': round(timings[-1] * 1e6, 1),
+    }
+
+
+def logging_latency(records: int = 50_000, max_mb: float = 1) -> Dict[str, Any]:
+    """Time the logging thread spends per record, direct to file vs queued
+
+    The queued pipeline rotates ``max_mb`` files and compresses rotated
+    segments on its listener thread; the caller only pays to enqueue.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        direct = logging.FileHandler(Path(tmp) / 'direct.log')
+        direct.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+        results['file_handler'] = _log_call_times(direct, records)
+        direct.close()
+
+        config = _bench_config(Path(tmp) / 'bench.db')
+        config.set('max_log_size_mb', max_mb)
+        pipeline = LogPipeline(config, log_file=Path(tmp) / 'queued.log', console=False)
+        pipeline.start()
+        results['queued'] = _log_call_times(pipeline.handler, records)
+        began = time.perf_counter()
+        pipeline.stop()
+        results['queued']['drain_seconds'] = round(time.perf_counter() - began, 3)
+        results['queued']['rotated_segments'] = len(list(Path(tmp).glob('queued.log.*')))
+
+    return {'records': records, 'max_log_size_mb': max_mb, 'handlers': results}
+
+
+# Read-only commands whose startup the startup benchmark checks
+STARTUP_COMMANDS = (('--version',), ('status',), ('list',), ('prompt', 'list'), ('stats',))
+
+
+def _import_times(stderr: str) -> Dict[str, float]:
+    """Cumulative milliseconds of each top-level import in ``-X importtime`` output"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level
+        if cumulative.strip().isdigit() and not name[1:].startswith(' '):
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def _builder_modules(stderr: str) -> List[str]:
+    """Names of every Builder module imported, at any depth, in ``-X importtime`` output"""
+    names = (line.rsplit('|', 1)[-1].strip() for line in stderr.splitlines()
+             if line.startswith('import time:'))
+    return sorted(name for name in names if name == 'builder' or name.startswith('builder.'))
+
+
+def startup_time(commands: Sequence[Sequence[str]] = STARTUP_COMMANDS, runs: int = 5,
+                 budget_ms: float = 150.0) -> Dict[str, Any]:
+    """Wall time and import cost of starting the CLI for read-only commands
+
+    Each command runs in a fresh interpreter against a scratch configuration.
+    An interpreter that only imports click sets ``baseline_ms``, the floor no
+    click command can go below; ``overhead_ms`` is a command's wall time above
+    it, and commands whose overhead exceeds ``budget_ms`` are listed in
+    ``over_budget``. ``builder_import_ms`` counts Builder's own modules and
+    everything they import, which is what lazy imports control, and
+    ``builder_modules`` names the modules a command loaded.
+    """
+    def fastest(args: List[str], cwd: str) -> float:
+        wall = []
+        for _ in range(runs):
+            began = time.perf_counter()
+            subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True)
+            wall.append(time.perf_counter() - began)
+        return min(wall) * 1000
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = Path(tmp) / 'config.yaml'
+        _bench_config(Path(tmp) / 'bench.db').save(config_path)
+        baseline_ms = fastest(['-c', 'import click'], tmp)
+
+        for command in commands:
+            args = ['-m', 'builder.cli', '-c', str(config_path), *command]
+            # Also creates the database and compiles bytecode
+            warmup = subprocess.run([sys.executable, *args], cwd=tmp, capture_output=True,
+                                    text=True)
+            if warmup.returncode:
+                raise RuntimeError(f"builder {' '.join(command)} failed: {warmup.stderr}")
+            wall_ms = fastest(args, tmp)
+
+            import_log = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=tmp,
+                                        capture_output=True, text=True).stderr
+            imports = _import_times(import_log)
+            builder_ms = sum(ms for name, ms in imports.items()
+                             if name == 'builder' or name.startswith('builder.'))
+            slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:5]
+            results[' '.join(command)] = {
+                'wall_ms': round(wall_ms, 1),
+                'overhead_ms': round(wall_ms - baseline_ms, 1),
+                'import_ms': round(sum(imports.values()), 1),
+                'builder_import_ms': round(builder_ms, 1),
+                'slowest_imports': {name: round(ms, 1) for name, ms in slowest},
+                'builder_modules': _builder_modules(import_log)
+            }
+
+    return {
+        'baseline_ms': round(baseline_ms, 1),
+        'budget_ms': budget_ms,
+        'commands': results,
+        'over_budget': [name for name, result in results.items()
+                        if result['overhead_ms'] > budget_ms]
+    }
+
+
+def _timings_ms(timings: List[float]) -> Dict[str, float]:
+    """Summary of per-operation times given in seconds"""
+    timings = sorted(timings)
+    return {
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95)] * 1000, 3),
+        'max_ms': round(timings[-1] * 1000, 3),
+    }
+
+
+def prompt_parsing(megabytes: float = 2) -> Dict[str, Any]:
+    """Parse throughput of the same prompt as text and as YAML, without the cache"""
+    from .prompt_manager import PromptManager
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _bench_config(Path(tmp) / 'bench.db')
+        config.set('prompt_cache', False)
+        prompt_manager = PromptManager(config)
+
+        text_path = Path(tmp) / 'bench.txt'
+        _write_text_prompt(text_path, int(megabytes * 2 ** 20))
+        yaml_path = Path(tmp) / 'bench.yaml'
+        prompt_manager.convert_prompt(str(text_path), str(yaml_path))
+
+        for label, path in (('txt', text_path), ('yaml', yaml_path)):
+            size_mb = path.stat().st_size / 2 ** 20
+            # Best of several parses, as a single parse of a small file is noisy
+            timings = []
+            for _ in range(5):
+                began = time.perf_counter()
+                prompt = prompt_manager.load_prompt(str(path))
+                timings.append(time.perf_counter() - began)
+            elapsed = min(timings)
+            results[label] = {
+                'size_mb': round(size_mb, 2),
+                'steps': len(prompt.steps),
+                'seconds': round(elapsed, 4),
+                'mb_per_second': round(size_mb / elapsed, 2),
+            }
+
+    return results
+
+
+def _capture(lines: int, state: str) -> str:
+    """Synthetic Claude pane capture of ``lines`` lines ending in ``state``"""
+    body = [f"  Edited src/module_{n}.py: refactored handler and updated tests ({n})"
+            for n in range(lines - 3)]
+    endings = {
+        'busy': ['Thinking about the next change...', '', ''],
+        'idle': ['Updated the configuration loader.', '', '>'],
+        'done': ['Step complete. Ready for the next step.', '', '>'],
+    }
+    return '\n'.join(body + endings[state])
+
+
+def detector_classification(captures: int = 5000) -> Dict[str, Any]:
+    """Time per capture of each output check on busy, idle and finished panes, best of three"""
+    from .detection import classify_idle, classify_ready, classify_todo
+
+    todo_patterns = Config().get('todo_patterns')
+    checks = {
+        'todo': lambda output: classify_todo(output, todo_patterns),
+        'idle': classify_idle,
+        'ready': classify_ready,
+    }
+    # Line counts the orchestrator captures for each check
+    sizes = {'todo': 150, 'idle': 20, 'ready': 50}
+
+    results = {}
+    for name, check in checks.items():
+        outputs = [_capture(sizes[name], state) for state in ('busy', 'idle', 'done')]
+        timings = []
+        for _ in range(3):
+            began = time.perf_counter()
+            for n in range(captures):
+                check(outputs[n % 3])
+            timings.append(time.perf_counter() - began)
+        elapsed = min(timings)
+        results[name] = {'lines': sizes[name],
+                         'per_capture_us': round(elapsed / captures * 1e6, 2)}
+    return {'captures': captures, 'checks': results}
+
+
+def tmux_round_trip(rounds: int = 30) -> Dict[str, Any]:
+    """Latency from sending a line through tmux to seeing it in a pane capture
+
+    Runs ClaudeInterface in tmux mode with ``cat`` standing in for Claude.
+    """
+    import asyncio
+    import shutil
+    import uuid
+    from .claude_interface import ClaudeInterface
+
+    if not shutil.which('tmux'):
+        return {'skipped': 'tmux is not installed'}
+
+    async def round_trip(claude: ClaudeInterface, marker: str, timeout: float) -> float:
+        began = time.perf_counter()
+        await claude.send_message(marker)
+        # Typed once, echoed back once by cat
+        while (await claude.get_recent_output(lines=5)).count(marker) < 2:
+            if time.perf_counter() - began > timeout:
+                raise RuntimeError("tmux round trip timed out")
+        return time.perf_counter() - began
+
+    async def measure(config) -> List[float]:
+        claude = ClaudeInterface(config)
+        await claude.start(str(uuid.uuid4()))
+        try:
+            # The pane's shell may take seconds to start; wait for it untimed
+            await round_trip(claude, 'bench-warmup', timeout=60)
+            return [await round_trip(claude, f"bench-marker-{n}", timeout=5)
+                    for n in range(rounds)]
+        finally:
+            await claude.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _bench_config(Path(tmp) / 'bench.db')
+        config.set('use_tmux', True)
+        config.set('claude_command', 'cat')
+        config.set('claude_args', [])
+        config.set('initial_wait', 0.2)
+        timings = asyncio.run(measure(config))
+
+    # send_message waits 0.5s between the text and Enter for the Claude UI
+    return {'rounds': rounds, 'send_delay_ms': 500, **_timings_ms(timings)}
+
+
+# Scripted stand-in for Claude: a TODO list, then "Done." after every message
+FAKE_CLAUDE = (
+    "import sys\n"
+    "print('Plan: TODO list ready.'); print('>'); sys.stdout.flush()\n"
+    "for line in sys.stdin:\n"
+    "    print('Finished: ' + line.strip()[:40]); print('Done.'); print('>')\n"
+    "    sys.stdout.flush()\n"
+)
+
+
+@contextmanager
+def _virtual_clock(module):
+    """Make ``module``'s asyncio.sleep and time.time run on an instant virtual clock
+
+    Each sleep advances the clock and yields to the event loop for a
+    millisecond, so fixed waits cost nothing while subprocess I/O still
+    happens in real time.
+    """
+    import asyncio
+
+    clock = [time.time()]
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds, result=None):
+        clock[0] += seconds
+        await real_sleep(0.001)
+        return result
+
+    fake_asyncio = SimpleNamespace(**{name: getattr(asyncio, name) for name in dir(asyncio)
+                                      if not name.startswith('__')})
+    fake_asyncio.sleep = sleep
+    fake_time = SimpleNamespace(**{name: getattr(time, name) for name in dir(time)
+                                   if not name.startswith('__')})
+    fake_time.time = lambda: clock[0]
+
+    saved = module.asyncio, module.time
+    module.asyncio, module.time = fake_asyncio, fake_time
+    try:
+        yield clock
+    finally:
+        module.asyncio, module.time = saved
+
+
+def step_transitions(steps: int = 10) -> Dict[str, Any]:
+    """End-to-end build against a scripted fake Claude, with waits on a virtual clock
+
+    Reports the real time between consecutive steps being sent: Builder's
+    own overhead for detection, captures and database writes plus the fake
+    Claude's replies, without the profile's fixed waits.
+    """
+    import asyncio
+    from . import orchestrator as orchestrator_module
+    from .prompt_manager import PromptManager
+    from .session_manager import SessionManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _bench_config(Path(tmp) / 'bench.db')
+        config.set('use_tmux', False)
+        config.set('claude_command', sys.executable)
+        config.set('claude_args', ['-u', '-c', FAKE_CLAUDE])
+        config.set('initial_wait', 0)
+        config.set('prompt_hot_reload', False)
+        config.set('trace_sessions', False)
+        config.apply_profile('fast')
+
+        session_manager = SessionManager(config)
+        prompt = _bench_prompt(steps)
+        session = session_manager.create_session(prompt)
+        orchestrator = orchestrator_module.BuildOrchestrator(
+            config, session_manager, PromptManager(config))
+
+        sent = []
+        send_next_step = orchestrator._send_next_step
+
+        async def timed_send_next_step():
+            result = await send_next_step()
+            if result:
+                sent.append((time.perf_counter(), clock[0]))
+            return result
+
+        orchestrator._send_next_step = timed_send_next_step
+        with _virtual_clock(orchestrator_module) as clock:
+            began = time.perf_counter()
+            asyncio.run(orchestrator.run(session, prompt))
+            elapsed = time.perf_counter() - began
+
+        completed = session_manager.get_session(session.id).status.value
+        session_manager.close()
+
+    gaps = [later[0] - earlier[0] for earlier, later in zip(sent, sent[1:])]
+    virtual_gaps = [later[1] - earlier[1] for earlier, later in zip(sent, sent[1:])]
+    result = {'steps': steps, 'steps_sent': len(sent), 'status': completed,
+              'seconds': round(elapsed, 3)}
+    if gaps:
+        result.update(_timings_ms(gaps))
+        result['simulated_seconds_per_step'] = round(sum(virtual_gaps) / len(virtual_gaps), 1)
+    return result
+
+
+# Benchmarks run by `builder bench`, with their quick-mode workloads
+SUITE = {
+    'event_writes': lambda quick: backend_write_throughput(1000 if quick else 5000),
+    'prompt_parsing': lambda quick: prompt_parsing(0.5 if quick else 2),
+    'detection': lambda quick: detector_classification(1000 if quick else 5000),
+    'tmux_round_trip': lambda quick: tmux_round_trip(5 if quick else 30),
+    'step_transitions': lambda quick: step_transitions(3 if quick else 10),
+}
+
+
+def run_suite(names: Sequence[str] = (), quick: bool = False,
+              progress: Callable[[str], None] = None) -> Dict[str, Any]:
+    """Run the named suite benchmarks (all by default) into one JSON-ready report"""
+    import platform
+    from . import __version__
+
+    results = {}
+    for name in names or SUITE:
+        if progress:
+            progress(name)
+        began = time.perf_counter()
+        results[name] = SUITE[name](quick)
+        results[name]['wall_seconds'] = round(time.perf_counter() - began, 3)
+
+    return {
+        'builder_version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'quick': quick,
+        'results': results,
+    }
+
+
+def _flatten(value: Any, prefix: str = '') -> Dict[str, float]:
+    """Numeric leaves of a result as dotted paths"""
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}{key}."))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix[:-1]: value}
+    return {}
+
+
+def _better(metric: str) -> Optional[str]:
+    """Whether higher or lower values of a metric are better, if it is a measurement"""
+    name = metric.rsplit('.', 1)[-1]
+    if name.endswith('_per_second'):
+        return 'higher'
+    if name.endswith(('_ms', '_us', 'seconds')) and name != 'simulated_seconds_per_step':
+        return 'lower'
+    return None
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """Changes in the metrics both reports measured; worse by over ``threshold`` is a regression"""
+    before = _flatten(baseline.get('results', {}))
+    after = _flatten(current.get('results', {}))
+    changes = []
+    for metric in sorted(before.keys() & after.keys()):
+        better = _better(metric)
+        if better is None or metric.endswith('wall_seconds') or not before[metric]:
+            continue
+        change = (after[metric] - before[metric]) / before[metric]
+        worse = change < -threshold if better == 'higher' else change > threshold
+        changes.append({'metric': metric, 'baseline': before[metric],
+                        'current': after[metric], 'change': round(change, 4),
+                        'regression': worse})
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builder benchmarks')
+    parser.add_argument('benchmark', nargs='?', default='stress',
+                        choices=['stress', 'backends', 'events', 'prompts', 'startup',
+                                 'logging', 'suite'],
+                        help='stress: concurrent writers; backends: per-backend write cost; '
+                             'events: time and memory of loading one large session; '
+                             'prompts: parsing multi-megabyte text prompts; '
+                             'startup: CLI start-up time of read-only commands; '
+                             'logging: time a logging call blocks its caller; '
+                             'suite: the `builder bench` suite')
+    parser.add_argument('--writers', type=int, default=4, help='Concurrent writer processes')
+    parser.add_argument('--events', type=int,
+                        help='Events per writer (default 500), per backend (default 5000) '
+                             'or in the session (default 1000000)')
+    parser.add_argument('--backend', default='sqlite', choices=['sqlite', 'segment_log'],
+                        help='Storage backend for the stress test')
+    parser.add_argument('--megabytes', type=int, default=16,
+                        help='Size of the largest prompt file to parse')
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help='Most milliseconds a command may take over a bare click import')
+    args = parser.parse_args()
+
+    if args.benchmark == 'backends':
+        print(json.dumps(backend_write_throughput(args.events or 5000), indent=2))
+        return
+    if args.benchmark == 'events':
+        print(json.dumps(event_loading(args.events or 1_000_000), indent=2))
+        return
+    if args.benchmark == 'prompts':
+        print(json.dumps(text_prompt_parsing(args.megabytes), indent=2))
+        return
+    if args.benchmark == 'suite':
+        print(json.dumps(run_suite(), indent=2))
+        return
+    if args.benchmark == 'logging':
+        print(json.dumps(logging_latency(), indent=2))
+        return
+    if args.benchmark == 'startup':
+        result = startup_time(budget_ms=args.budget_ms)
+        print(json.dumps(result, indent=2))
+        if result['over_budget']:
+            raise SystemExit(1)
+        return
+
+    result = concurrent_write_stress(args.writers, args.events or 500, backend=args.backend)
+    print(json.dumps(result, indent=2))
+
+    if result['lost_events'] or result['failed_writers']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,12 +4,14 @@ Claude CLI interface wrapper with async support
 
 import asyncio
 import logging
+import shlex
 import subprocess
 from typing import Optional, List
 from pathlib import Path
 
 from .config import Config
 from .exceptions import ClaudeError
+from .trace import span, traced
 
 
 logger = logging.getLogger(__name__)
@@ -22,18 +24,25 @@ class ClaudeInterface:
         self.config = config
         self.process: Optional[asyncio.subprocess.Process] = None
         self.session_id: Optional[str] = None
+        self.output_path: Optional[Path] = None
         self.output_buffer = []
         self.max_buffer_size = 10000
+        self.output_log = None
         
         # Tmux integration if enabled
         self.use_tmux = config.use_tmux
         self.tmux_session = None
         self.tmux_window = 1  # Claude window
     
+    @traced('claude')
     async def start(self, session_id: str):
         """Start Claude CLI session"""
         self.session_id = session_id
         
+        # Captured output is kept per session so it can be tailed and searched
+        self.output_path = self.config.session_dir(session_id) / 'output.log'
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        
         if self.use_tmux:
             await self._start_tmux_session()
         else:
@@ -70,6 +79,13 @@ class ClaudeInterface:
             claude_cmd, 'Enter'
         ]
         await self._run_command(send_cmd)
+        
+        # Mirror the Claude pane into the session output log
+        pipe_cmd = [
+            'tmux', 'pipe-pane', '-o', '-t', f"{self.tmux_session}:{self.tmux_window}",
+            f"cat >> {shlex.quote(str(self.output_path.resolve()))}"
+        ]
+        await self._run_command(pipe_cmd)
     
     async def _start_direct_session(self):
         """Start Claude process directly"""
@@ -83,6 +99,7 @@ class ClaudeInterface:
         )
         
         # Start output monitoring
+        self.output_log = open(self.output_path, 'a', encoding='utf-8', buffering=1)
         asyncio.create_task(self._monitor_output())
     
     async def _monitor_output(self):
@@ -98,6 +115,8 @@ class ClaudeInterface:
                 
                 decoded_line = line.decode('utf-8', errors='ignore')
                 self.output_buffer.append(decoded_line)
+                if self.output_log:
+                    self.output_log.write(decoded_line)
                 
                 # Maintain buffer size
                 if len(self.output_buffer) > self.max_buffer_size:
@@ -107,6 +126,7 @@ class ClaudeInterface:
                 logger.error(f"Error monitoring output: {e}")
                 break
     
+    @traced('claude')
     async def send_message(self, message: str):
         """Send a message to Claude"""
         if self.use_tmux:
@@ -143,6 +163,7 @@ class ClaudeInterface:
         self.process.stdin.write(f"{message}\n".encode())
         await self.process.stdin.drain()
     
+    @traced('claude')
     async def get_recent_output(self, lines: int = 50, offset: int = 0) -> str:
         """Get recent output from Claude"""
         if self.use_tmux:
@@ -152,13 +173,17 @@ class ClaudeInterface:
     
     async def _get_tmux_output(self, lines: int, offset: int) -> str:
         """Get output from tmux pane"""
+        # Capture the visible pane plus enough history, then count lines back
+        # from the last non-blank one: "-E -0" would end at the pane's top line
         cmd = [
             'tmux', 'capture-pane', '-t', f"{self.tmux_session}:{self.tmux_window}",
-            '-p', '-S', f"-{lines + offset}", '-E', f"-{offset}"
+            '-p', '-S', f"-{lines + offset}"
         ]
         
         result = await self._run_command(cmd, capture_output=True)
-        return result.stdout.decode('utf-8', errors='ignore')
+        pane_lines = result.stdout.decode('utf-8', errors='ignore').rstrip().split('\n')
+        end_idx = len(pane_lines) - offset
+        return '\n'.join(pane_lines[max(0, end_idx - lines):max(0, end_idx)]) + '\n'
     
     async def _get_direct_output(self, lines: int, offset: int) -> str:
         """Get output from buffer"""
@@ -167,6 +192,7 @@ class ClaudeInterface:
         
         return ''.join(self.output_buffer[start_idx:end_idx])
     
+    @traced('claude')
     async def is_running(self) -> bool:
         """Check if Claude is still running"""
         if self.use_tmux:
@@ -183,6 +209,7 @@ class ClaudeInterface:
         except subprocess.CalledProcessError:
             return False
     
+    @traced('claude')
     async def stop(self):
         """Stop Claude session"""
         if self.use_tmux and self.tmux_session:
@@ -197,10 +224,18 @@ class ClaudeInterface:
             self.process.terminate()
             await self.process.wait()
         
+        if self.output_log:
+            self.output_log.close()
+            self.output_log = None
+        
         logger.info("Claude session stopped")
     
     async def _run_command(self, cmd: List[str], capture_output: bool = False):
         """Run a shell command"""
+        with span(' '.join(cmd[:2]), 'claude'):
+            return await self._run_subprocess(cmd, capture_output)
+    
+    async def _run_subprocess(self, cmd: List[str], capture_output: bool):
         if capture_output:
             proc = await asyncio.create_subprocess_exec(
                 *cmd,
@@ -6,20 +6,17 @@ A simplified, powerful system for managing sequential Claude sessions
 to execute complex, multi-step build processes.
 """
 
-import asyncio
 import click
+import json
 import sys
+import time
+from collections import Counter
 from pathlib import Path
-from datetime import datetime
 from typing import Optional
 
-# Import our modules
-from .config import Config, BuildProfile
-from .orchestrator import BuildOrchestrator
-from .session_manager import SessionManager
-from .prompt_manager import PromptManager
-from .monitor import BuildMonitor
-from .utils import setup_logging, print_banner
+# Commands import the rest of Builder when they run, so that --help,
+# --version and read-only commands skip asyncio and unused storage code
+from .exceptions import BuilderError, SessionError
 
 # Version
 __version__ = "2.0.0"
@@ -29,9 +26,14 @@ __version__ = "2.0.0"
 @click.version_option(version=__version__)
 @click.option('--config', '-c', type=click.Path(), help='Configuration file path')
 @click.option('--profile', '-p', type=str, help='Build profile (fast/normal/careful)')
+@click.option('--profile-cpu', is_flag=True, help='Run the command under cProfile')
+@click.option('--profile-mem', is_flag=True, help='Trace memory allocations with tracemalloc')
 @click.pass_context
-def cli(ctx, config, profile):
+def cli(ctx, config, profile, profile_cpu, profile_mem):
     """Builder - Autonomous Build Orchestration System"""
+    from .config import Config
+    from .utils import setup_logging
+    
     ctx.ensure_object(dict)
     
     # Load configuration
@@ -42,8 +44,71 @@ def cli(ctx, config, profile):
     if profile:
         ctx.obj['config'].apply_profile(profile)
     
-    # Setup logging
-    setup_logging(ctx.obj['config'].log_level)
+    # Setup logging; the pipeline and log files are only created once something is logged
+    setup_logging(ctx.obj['config'].log_level, ctx.obj['config'])
+    
+    if profile_cpu or profile_mem:
+        from .profiling import Profiler
+        profiler = Profiler(ctx.obj['config'], cpu=profile_cpu, memory=profile_mem)
+        profiler.start()
+        ctx.call_on_close(lambda: _write_profiles(profiler))
+
+
+def _write_profiles(profiler):
+    for path in profiler.stop():
+        click.echo(f"Profile written to {path}", err=True)
+
+
+def _session_manager(config):
+    """Open session storage, importing it only for commands that need it"""
+    from .session_manager import SessionManager
+    return SessionManager(config)
+
+
+def _prompt_manager(config):
+    """Create a prompt manager, importing it only for commands that need it"""
+    from .prompt_manager import PromptManager
+    return PromptManager(config)
+
+
+def _daemon_client(config):
+    """Connection to a running `builder daemon`, or None to use storage directly"""
+    if not config.daemon_socket.exists():
+        return None  # Skip importing the client when no daemon has started
+    from .rpc import DaemonClient
+    return DaemonClient.connect(config)
+
+
+def _decode_details(records):
+    from .codec import decode_detail
+    return [decode_detail(record) for record in records]
+
+
+def _start_in_daemon(client, config, prompt_file, speed, resume):
+    """Hand a build to the daemon and return once it is running there"""
+    from .utils import print_banner
+    
+    if not resume:
+        if not prompt_file:
+            prompt_file = _prompt_manager(config).select_prompt().path
+        elif Path(prompt_file).exists():
+            # The daemon may run in another directory
+            prompt_file = str(Path(prompt_file).resolve())
+    
+    try:
+        with client:
+            started = client.call('start', prompt_file=prompt_file, speed=speed, resume=resume)
+    except BuilderError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    
+    session_id = started['session']['id']
+    print_banner()
+    click.echo(f"Session ID: {session_id}")
+    click.echo(f"Project: {started['project']}")
+    click.echo(f"Steps: {started['steps']}")
+    click.echo(f"Speed: {speed}")
+    click.echo(f"Running in the daemon; follow it with: builder attach {session_id}")
 
 
 @cli.command()
@@ -58,9 +123,14 @@ def start(ctx, prompt_file, speed, resume, dry_run):
     config = ctx.obj['config']
     config.apply_profile(speed)
     
+    client = None if dry_run else _daemon_client(config)
+    if client:
+        _start_in_daemon(client, config, prompt_file, speed, resume)
+        return
+    
     # Initialize managers
-    session_manager = SessionManager(config)
-    prompt_manager = PromptManager(config)
+    session_manager = _session_manager(config)
+    prompt_manager = _prompt_manager(config)
     
     try:
         if resume:
@@ -87,6 +157,10 @@ def start(ctx, prompt_file, speed, resume, dry_run):
             # Create new session
             session = session_manager.create_session(prompt)
         
+        import asyncio
+        from .orchestrator import BuildOrchestrator
+        from .utils import print_banner
+        
         # Print session info
         print_banner()
         click.echo(f"Session ID: {session.id}")
@@ -118,11 +192,30 @@ def start(ctx, prompt_file, speed, resume, dry_run):
 def status(ctx, session, detailed):
     """Show build session status"""
     config = ctx.obj['config']
-    session_manager = SessionManager(config)
+    session_manager = _session_manager(config)
+    
+    client = _daemon_client(config)
+    if client:
+        # Sessions come from the daemon; the manager only formats them
+        try:
+            with client:
+                details = _decode_details(client.call('status', session_id=session,
+                                                      detailed=detailed))
+        except BuilderError as e:
+            click.echo(str(e), err=True)
+            return
+        if not session:
+            if not details:
+                click.echo("No active sessions")
+                return
+            click.echo("Active Sessions:")
+        for detail in details:
+            session_manager.display_session_status(detail, detailed)
+        return
     
     if session:
         # Show specific session
-        session_info = session_manager.get_session(session)
+        session_info = session_manager.get_session_detail(session)
         if not session_info:
             click.echo(f"Session {session} not found", err=True)
             return
@@ -136,8 +229,13 @@ def status(ctx, session, detailed):
             return
         
         click.echo("Active Sessions:")
-        for sess in active_sessions:
-            session_manager.display_session_summary(sess)
+        if detailed:
+            # Load every session's steps in bulk rather than one by one
+            for detail in session_manager.get_session_details([s.id for s in active_sessions]):
+                session_manager.display_session_status(detail, detailed)
+        else:
+            for sess in active_sessions:
+                session_manager.display_session_summary(sess)
 
 
 @cli.command()
@@ -146,6 +244,8 @@ def status(ctx, session, detailed):
 @click.pass_context
 def monitor(ctx, port, host):
     """Start the web-based monitoring dashboard"""
+    from .monitor import BuildMonitor
+    
     config = ctx.obj['config']
     monitor = BuildMonitor(config)
     
@@ -153,26 +253,105 @@ def monitor(ctx, port, host):
     monitor.start(host, port)
 
 
+@cli.command()
+@click.option('--stop', is_flag=True, help='Stop the running daemon')
+@click.option('--status', 'show_status', is_flag=True, help='Show whether the daemon is running')
+@click.pass_context
+def daemon(ctx, stop, show_status):
+    """Run the Builder daemon in the foreground
+    
+    While it runs, start, status, kill, list and attach send their work to
+    it over a Unix socket instead of opening storage themselves.
+    """
+    from .rpc import DaemonClient
+    
+    config = ctx.obj['config']
+    client = DaemonClient.connect(config)
+    
+    if stop or show_status:
+        if not client:
+            click.echo("Daemon is not running")
+            sys.exit(0 if show_status else 1)
+        with client:
+            if stop:
+                client.call('shutdown')
+                click.echo("Daemon stopping")
+            else:
+                info = client.call('ping')
+                click.echo(f"Daemon running (pid {info['pid']}) on {config.daemon_socket}")
+                click.echo(f"Builds: {len(info['builds'])}")
+                metrics = info.get('metrics') or {}
+                if metrics:
+                    click.echo(f"Memory: {metrics['rss_mb']} MB RSS, "
+                               f"CPU: {metrics['cpu_seconds']}s, "
+                               f"open files: {metrics['open_fds']}, "
+                               f"threads: {metrics['threads']}")
+        return
+    
+    if client:
+        client.close()
+        click.echo(f"Daemon already running on {config.daemon_socket}", err=True)
+        sys.exit(1)
+    
+    from .daemon import run_daemon
+    
+    click.echo(f"Builder daemon listening on {config.daemon_socket}")
+    try:
+        run_daemon(config)
+    except BuilderError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
 @cli.command()
 @click.argument('session_id')
 @click.pass_context
 def attach(ctx, session_id):
     """Attach to a running build session"""
+    from .models import SessionStatus
+    
     config = ctx.obj['config']
-    session_manager = SessionManager(config)
+    session_manager = _session_manager(config)
     
-    session = session_manager.get_session(session_id)
-    if not session or session.status != 'active':
-        click.echo(f"No active session found: {session_id}", err=True)
-        return
+    client = _daemon_client(config)
+    if client:
+        try:
+            with client:
+                tmux_session = client.call('attach', session_id=session_id)['tmux_session']
+        except BuilderError as e:
+            click.echo(str(e), err=True)
+            return
+    else:
+        session = session_manager.get_session(session_id)
+        if not session or session.status != SessionStatus.ACTIVE:
+            click.echo(f"No active session found: {session_id}", err=True)
+            return
+        tmux_session = f'build-{session_id[:8]}' if config.use_tmux else None
     
     # Use tmux attach if available, otherwise show logs
-    if config.use_tmux:
+    if tmux_session:
         import subprocess
-        subprocess.run(['tmux', 'attach-session', '-t', f'build-{session_id[:8]}'])
+        subprocess.run(['tmux', 'attach-session', '-t', tmux_session])
     else:
-        # Stream logs
-        session_manager.stream_logs(session_id)
+        # Follow events and captured output until the session ends
+        session_manager.stream_logs(session_id, follow=True)
+
+
+@cli.command()
+@click.argument('session_id')
+@click.option('--follow', '-f', is_flag=True, help='Keep following new events and output')
+@click.option('--interval', type=float, default=0.5, help='Poll interval in seconds when following')
+@click.pass_context
+def logs(ctx, session_id, follow, interval):
+    """Show a session's events and captured output"""
+    config = ctx.obj['config']
+    session_manager = _session_manager(config)
+    
+    if not session_manager.get_session(session_id):
+        click.echo(f"Session {session_id} not found", err=True)
+        return
+    
+    session_manager.stream_logs(session_id, follow=follow, poll_interval=interval)
 
 
 @cli.command()
@@ -182,12 +361,23 @@ def attach(ctx, session_id):
 def kill(ctx, session_id, force):
     """Kill a running build session"""
     config = ctx.obj['config']
-    session_manager = SessionManager(config)
+    session_manager = _session_manager(config)
     
     if not force:
         click.confirm(f"Are you sure you want to kill session {session_id}?", abort=True)
     
-    if session_manager.kill_session(session_id):
+    client = _daemon_client(config)
+    if client:
+        try:
+            with client:
+                killed = client.call('kill', session_id=session_id)
+        except BuilderError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+    else:
+        killed = session_manager.kill_session(session_id)
+    
+    if killed:
         click.echo(f"Session {session_id} killed")
     else:
         click.echo(f"Failed to kill session {session_id}", err=True)
@@ -196,60 +386,275 @@ def kill(ctx, session_id, force):
 @cli.command()
 @click.option('--all', '-a', is_flag=True, help='List all sessions (not just active)')
 @click.option('--limit', '-l', type=int, default=10, help='Number of sessions to show')
+@click.option('--after', type=str, help='Cursor from a previous page (with --all)')
+@click.option('--detailed', '-d', is_flag=True, help='Show steps and event counts')
 @click.pass_context
-def list(ctx, all, limit):
+def list(ctx, all, limit, after, detailed):
     """List build sessions"""
     config = ctx.obj['config']
-    session_manager = SessionManager(config)
-    
+    session_manager = _session_manager(config)
+    next_cursor = None
+
+    client = _daemon_client(config)
+    if client:
+        try:
+            with client:
+                page = client.call('list', all=all, limit=limit, after=after, detailed=detailed)
+        except BuilderError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        details = _decode_details(page['sessions'])
+        if all:
+            click.echo(f"All Sessions (showing {len(details)} of {page['total']}):")
+        else:
+            click.echo(f"Active Sessions ({len(details)}):")
+        if not details:
+            click.echo("No sessions found")
+            return
+        for detail in details:
+            session_manager.display_session_status(detail, detailed)
+        if page['next_cursor']:
+            click.echo(f"\nNext page: builder list --all --limit {limit} --after {page['next_cursor']}")
+        return
+
     if all:
-        sessions = session_manager.get_all_sessions(limit=limit)
+        try:
+            sessions, next_cursor = session_manager.get_sessions_page(after=after, limit=limit)
+        except SessionError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
         click.echo(f"All Sessions (showing {len(sessions)} of {session_manager.count_sessions()}):")
     else:
         sessions = session_manager.get_active_sessions()
         click.echo(f"Active Sessions ({len(sessions)}):")
-    
+
     if not sessions:
         click.echo("No sessions found")
         return
-    
-    for session in sessions:
-        session_manager.display_session_summary(session)
+
+    if detailed:
+        for detail in session_manager.get_session_details([s.id for s in sessions]):
+            session_manager.display_session_status(detail, detailed)
+    else:
+        for session in sessions:
+            session_manager.display_session_summary(session)
+
+    if next_cursor:
+        click.echo(f"\nNext page: builder list --all --limit {limit} --after {next_cursor}")
 
 
 @cli.command()
 @click.argument('session_id')
-@click.option('--format', '-f', type=click.Choice(['markdown', 'json', 'html']), 
+@click.option('--page-size', '-n', type=int, default=100, help='Events fetched per page')
+@click.option('--after', type=int, help='Only show events after this event id')
+@click.option('--no-pager', is_flag=True, help='Print all events without a pager')
+@click.pass_context
+def events(ctx, session_id, page_size, after, no_pager):
+    """Page through a session's events"""
+    config = ctx.obj['config']
+    session_manager = _session_manager(config)
+
+    if not session_manager.get_session(session_id):
+        click.echo(f"Session {session_id} not found", err=True)
+        return
+
+    def pages():
+        # Fetch lazily so the pager only pulls pages as the user scrolls
+        cursor = after
+        while True:
+            page, cursor = session_manager.get_events_page(
+                session_id, after=cursor, limit=page_size
+            )
+            for event in page:
+                yield session_manager.format_event(event) + "\n"
+            if cursor is None:
+                break
+
+    if no_pager:
+        for line in pages():
+            click.echo(line, nl=False)
+    else:
+        click.echo_via_pager(pages())
+
+
+@cli.command()
+@click.argument('session_id')
+@click.option('--format', '-f', type=click.Choice(['markdown', 'json', 'jsonl', 'html']),
               default='markdown', help='Output format')
 @click.option('--output', '-o', type=click.Path(), help='Output file path')
 @click.pass_context
 def summary(ctx, session_id, format, output):
     """Generate a session summary report"""
     config = ctx.obj['config']
-    session_manager = SessionManager(config)
-    
-    summary = session_manager.generate_summary(session_id, format)
-    if not summary:
+    session_manager = _session_manager(config)
+
+    if not session_manager.get_session(session_id):
         click.echo(f"Could not generate summary for session {session_id}", err=True)
         return
-    
+
+    # Stream straight to the destination instead of building the report in memory
     if output:
-        Path(output).write_text(summary)
+        with open(output, 'w', encoding='utf-8') as f:
+            session_manager.write_summary(session_id, f, format)
         click.echo(f"Summary written to {output}")
     else:
-        click.echo(summary)
+        session_manager.write_summary(session_id, sys.stdout, format)
+
+
+@cli.command()
+@click.argument('session_id')
+@click.option('--output', '-o', type=click.Path(), help='Write the complete trace to this file')
+@click.option('--top', '-n', type=int, default=10, help='Number of longest spans to list')
+@click.pass_context
+def trace(ctx, session_id, output, top):
+    """Summarize a session's timeline trace, or export it for Perfetto"""
+    from .trace import TRACE_FILE_NAME, load_trace, summarize_trace
+    
+    config = ctx.obj['config']
+    path = config.session_dir(session_id) / TRACE_FILE_NAME
+    
+    try:
+        events = load_trace(path)
+    except SessionError:
+        click.echo(f"No trace recorded for session {session_id}", err=True)
+        sys.exit(1)
+    
+    if output:
+        # A live trace has no closing bracket; write a complete copy
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        click.echo(f"Trace written to {output}; open it in https://ui.perfetto.dev "
+                   f"or chrome://tracing")
+        return
+    
+    summary = summarize_trace(events, top)
+    click.echo(f"Trace: {path} ({summary['events']} events over "
+               f"{_trace_time(summary['wall_us'])})")
+    click.echo("\nTime by category:")
+    for category, totals in summary['categories'].items():
+        click.echo(f"  {category:<8} {_trace_time(totals['us']):>10}  {totals['spans']} spans")
+    click.echo("\nLongest spans:")
+    for span in summary['longest']:
+        click.echo(f"  {_trace_time(span['us']):>10}  {span['category']:<8} {span['name']}")
+    click.echo("\nOpen it in https://ui.perfetto.dev or chrome://tracing")
+
+
+def _trace_time(us: int) -> str:
+    from .utils import format_duration
+    if us < 1_000_000:
+        return f"{us / 1000:.1f}ms"
+    return format_duration(us / 1_000_000)
+
+
+@cli.command()
+@click.argument('query')
+@click.option('--limit', '-l', type=int, default=20, help='Maximum number of results')
+@click.option('--session', '-s', help='Only search this session')
+@click.option('--raw', is_flag=True, help='Pass the query through as FTS5 syntax')
+@click.pass_context
+def search(ctx, query, limit, session, raw):
+    """Search step content, events and captured output"""
+    config = ctx.obj['config']
+    session_manager = _session_manager(config)
+
+    try:
+        results = session_manager.search(query, limit=limit, session_id=session, raw=raw)
+    except Exception as e:
+        click.echo(f"Search failed: {e}", err=True)
+        sys.exit(1)
+
+    if not results:
+        click.echo("No matches found")
+        return
+
+    for result in results:
+        snippet = ' '.join(result.snippet.split())
+        click.echo(f"{result.session_id[:8]}  {result.source} {result.ref:<6} {snippet}")
 
 
 @cli.command()
 @click.option('--days', '-d', type=int, default=30, help='Number of days to analyze')
+@click.option('--by-step', is_flag=True, help='Per-step durations, idle nudges and throughput')
+@click.option('--by-prompt', is_flag=True, help='Consistently slowest steps of each prompt')
+@click.option('--storage', is_flag=True, help='Content deduplication savings and database size')
 @click.pass_context
-def stats(ctx, days):
+def stats(ctx, days, by_step, by_prompt, storage):
     """Show build statistics"""
     config = ctx.obj['config']
-    session_manager = SessionManager(config)
+    session_manager = _session_manager(config)
+    
+    try:
+        if by_step:
+            session_manager.display_step_statistics(session_manager.get_step_statistics(days))
+        if by_prompt:
+            session_manager.display_prompt_statistics(session_manager.get_prompt_statistics(days))
+        if storage:
+            session_manager.display_content_statistics(session_manager.get_content_statistics())
+    except SessionError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
     
-    stats = session_manager.get_statistics(days)
-    session_manager.display_statistics(stats)
+    if not (by_step or by_prompt or storage):
+        stats = session_manager.get_statistics(days)
+        session_manager.display_statistics(stats)
+
+
+@cli.command()
+@click.pass_context
+def compact(ctx):
+    """Compact buffered writes into the database (segment_log storage)"""
+    config = ctx.obj['config']
+    session_manager = _session_manager(config)
+
+    compacted = session_manager.compact_storage()
+    click.echo(f"Compacted {compacted} log records "
+               f"({config.get('storage_backend', 'sqlite')} storage)")
+
+
+@cli.command()
+@click.argument('names', nargs=-1)
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write the JSON results here')
+@click.option('--compare', type=click.Path(exists=True, dir_okay=False),
+              help='Results of an earlier run to compare against')
+@click.option('--threshold', type=float, default=10.0,
+              help='Percent change counted as a regression when comparing')
+@click.option('--quick', is_flag=True, help='Smaller workloads, for a fast check')
+def bench(names, output, compare, threshold, quick):
+    """Run the benchmark suite (all benchmarks, or the NAMES given)"""
+    import logging
+    from .bench import SUITE, compare_results, run_suite
+
+    unknown = [name for name in names if name not in SUITE]
+    if unknown:
+        raise click.BadParameter(f"{', '.join(unknown)} (choose from {', '.join(SUITE)})",
+                                 param_hint='NAMES')
+
+    # Keep the benchmarked builds' progress messages out of the JSON on stdout
+    logging.getLogger().setLevel(logging.WARNING)
+    results = run_suite(names, quick=quick,
+                        progress=lambda name: click.echo(f"Running {name}...", err=True))
+    report = json.dumps(results, indent=2)
+    if output:
+        Path(output).write_text(report + '\n', encoding='utf-8')
+        click.echo(f"Results written to {output}", err=True)
+    else:
+        click.echo(report)
+
+    if not compare:
+        return
+    with open(compare, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    changes = compare_results(baseline, results, threshold / 100)
+    click.echo(f"\nCompared with {compare} (builder {baseline.get('builder_version', '?')}):",
+               err=True)
+    for change in changes:
+        flag = '  REGRESSION' if change['regression'] else ''
+        click.echo(f"  {change['metric']:<48} {change['baseline']:>12g} -> "
+                   f"{change['current']:<12g} {change['change']:+.1%}{flag}", err=True)
+    regressions = [change for change in changes if change['regression']]
+    if regressions:
+        click.echo(f"{len(regressions)} metric(s) regressed by more than {threshold:g}%", err=True)
+        sys.exit(1)
 
 
 @cli.group()
@@ -263,33 +668,89 @@ def prompt():
 def prompt_list(ctx):
     """List available prompts"""
     config = ctx.obj['config']
-    prompt_manager = PromptManager(config)
+    prompt_manager = _prompt_manager(config)
     
-    prompts = prompt_manager.list_prompts()
+    prompts = prompt_manager.list_prompt_summaries()
     if not prompts:
         click.echo("No prompts found")
         return
     
     click.echo("Available Prompts:")
     for p in prompts:
-        click.echo(f"  {p.name} - {len(p.steps)} steps")
+        click.echo(f"  {p.name} - {p.step_count} steps")
         if p.description:
             click.echo(f"    {p.description}")
 
 
+def _echo_bulk_results(results, report: Optional[str], failed: set):
+    """Print bulk prompt results as they arrive, then a summary and optional JSON report
+    
+    With ``--report -`` the report goes to stdout and progress to stderr.
+    Exits with status 1 if any result has a status in ``failed``.
+    """
+    err = report == '-'
+    marks = {'valid': '✓', 'converted': '✓', 'skipped': '-'}
+    
+    began = time.perf_counter()
+    entries = []
+    for result in results:
+        entries.append(result)
+        line = f"{marks.get(result['status'], '✗')} {result['file']}: {result['status']}"
+        if result.get('cached'):
+            line += " (unchanged)"
+        if result.get('error'):
+            line += f" - {result['error']}"
+        click.echo(line, err=err)
+        for warning in result.get('warnings', ()):
+            click.echo(f"    ! {warning}", err=err)
+    
+    counts = Counter(entry['status'] for entry in entries)
+    summary = {'files': len(entries), **counts,
+               'seconds': round(time.perf_counter() - began, 3)}
+    click.echo(f"{len(entries)} files: " +
+               ", ".join(f"{count} {status}" for status, count in sorted(counts.items())),
+               err=err)
+    
+    if report:
+        data = json.dumps({'summary': summary, 'results': entries}, indent=2)
+        if report == '-':
+            click.echo(data)
+        else:
+            Path(report).write_text(data + '\n', encoding='utf-8')
+    
+    if failed & set(counts):
+        sys.exit(1)
+
+
 @prompt.command('validate')
-@click.argument('prompt_file')
+@click.argument('prompt_file', required=False)
+@click.option('--all', 'all_prompts', is_flag=True,
+              help='Validate every prompt in PROMPT_FILE as a directory (default: prompts directory)')
+@click.option('--jobs', '-j', type=click.IntRange(min=1),
+              help='Worker processes for --all (default: one per CPU)')
+@click.option('--report', type=click.Path(dir_okay=False),
+              help='Write a JSON report of --all results to this file, or - for stdout')
 @click.pass_context
-def prompt_validate(ctx, prompt_file):
-    """Validate a prompt file"""
+def prompt_validate(ctx, prompt_file, all_prompts, jobs, report):
+    """Validate a prompt file, or a directory of them with --all"""
     config = ctx.obj['config']
-    prompt_manager = PromptManager(config)
+    prompt_manager = _prompt_manager(config)
+    
+    if all_prompts:
+        if prompt_file and not Path(prompt_file).is_dir():
+            raise click.BadParameter(f"{prompt_file} is not a directory", param_hint='PROMPT_FILE')
+        _echo_bulk_results(prompt_manager.validate_all(prompt_file, jobs), report, {'invalid'})
+        return
+    if not prompt_file:
+        raise click.UsageError("Give a prompt file, or --all to validate a directory")
     
     try:
         prompt = prompt_manager.load_prompt(prompt_file)
         click.echo(f"✓ Prompt is valid: {prompt.name}")
         click.echo(f"  Steps: {len(prompt.steps)}")
         click.echo(f"  Format: {prompt.format}")
+        for warning in prompt_manager.validate_prompt(prompt):
+            click.echo(f"  ! {warning}")
     except Exception as e:
         click.echo(f"✗ Invalid prompt: {e}", err=True)
         sys.exit(1)
@@ -298,11 +759,31 @@ def prompt_validate(ctx, prompt_file):
 @prompt.command('convert')
 @click.argument('input_file')
 @click.argument('output_file')
+@click.option('--all', 'all_prompts', is_flag=True,
+              help='Convert every prompt in INPUT_FILE into OUTPUT_FILE, both directories')
+@click.option('--to', 'to_format', type=click.Choice(['yaml', 'text']),
+              help='Target format for --all')
+@click.option('--jobs', '-j', type=click.IntRange(min=1),
+              help='Worker processes for --all (default: one per CPU)')
+@click.option('--report', type=click.Path(dir_okay=False),
+              help='Write a JSON report of --all results to this file, or - for stdout')
 @click.pass_context
-def prompt_convert(ctx, input_file, output_file):
-    """Convert prompt between formats (txt <-> yaml)"""
+def prompt_convert(ctx, input_file, output_file, all_prompts, to_format, jobs, report):
+    """Convert prompt between formats (txt <-> yaml)
+    
+    With --all, converts a directory; outputs newer than their source are skipped.
+    """
     config = ctx.obj['config']
-    prompt_manager = PromptManager(config)
+    prompt_manager = _prompt_manager(config)
+    
+    if all_prompts:
+        if not Path(input_file).is_dir():
+            raise click.BadParameter(f"{input_file} is not a directory", param_hint='INPUT_FILE')
+        if not to_format:
+            raise click.UsageError("--all needs --to yaml or --to text")
+        _echo_bulk_results(prompt_manager.convert_all(input_file, output_file, to_format, jobs),
+                           report, {'failed'})
+        return
     
     try:
         prompt_manager.convert_prompt(input_file, output_file)
@@ -316,6 +797,8 @@ def prompt_convert(ctx, input_file, output_file):
 @click.pass_context
 def init(ctx):
     """Initialize Builder configuration"""
+    from .config import Config
+    
     config_dir = Path.home() / '.builder'
     config_dir.mkdir(exist_ok=True)
     
@@ -0,0 +1,90 @@
+"""
+JSON encoding of session models
+
+Sessions, steps and events become plain dicts with enums as their values
+and datetimes as epoch milliseconds. The segment log stores them this way
+and the daemon sends them to its clients in the same form.
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from .models import BuildStep, Session, SessionDetail, SessionEvent, SessionStatus, StepStatus
+
+
+# Fields stored as epoch milliseconds
+TIME_FIELDS = {'started_at', 'ended_at', 'completed_at', 'timestamp'}
+
+
+def to_ms(value: Optional[datetime]) -> Optional[int]:
+    """Convert a local datetime to integer epoch milliseconds"""
+    if value is None:
+        return None
+    return int(round(value.timestamp() * 1000))
+
+
+def from_ms(value: Optional[int]) -> Optional[datetime]:
+    """Convert integer epoch milliseconds to a local datetime"""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1000)
+
+
+def encode_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return to_ms(value)
+    return value
+
+
+def encode_record(obj) -> Dict[str, Any]:
+    """Convert a session model to a JSON-safe dict"""
+    return {name: encode_value(value) for name, value in obj.as_dict().items()}
+
+
+def encode_changes(changes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {key: encode_value(value) for key, value in (changes or {}).items()}
+
+
+def decode_changes(changes: Dict[str, Any], status_type) -> Dict[str, Any]:
+    """Convert encoded field values back to model values"""
+    decoded = {}
+    for key, value in changes.items():
+        if key in TIME_FIELDS:
+            value = from_ms(value)
+        elif key == 'status':
+            value = status_type(value)
+        decoded[key] = value
+    return decoded
+
+
+def decode_session(record: Dict[str, Any]) -> Session:
+    return Session(**decode_changes(record, SessionStatus))
+
+
+def decode_step(record: Dict[str, Any]) -> BuildStep:
+    return BuildStep(**decode_changes(record, StepStatus))
+
+
+def decode_event(record: Optional[Dict[str, Any]]) -> Optional[SessionEvent]:
+    if record is None:
+        return None
+    return SessionEvent(**decode_changes(record, None))
+
+
+def encode_detail(detail: SessionDetail) -> Dict[str, Any]:
+    return {
+        'session': encode_record(detail.session),
+        'steps': [encode_record(step) for step in detail.steps],
+        'event_counts': detail.event_counts,
+    }
+
+
+def decode_detail(record: Dict[str, Any]) -> SessionDetail:
+    return SessionDetail(
+        decode_session(record['session']),
+        [decode_step(step) for step in record.get('steps', [])],
+        record.get('event_counts', {}),
+    )
@@ -2,6 +2,7 @@
 Configuration management for Builder
 """
 
+import copy
 import os
 import yaml
 from pathlib import Path
@@ -94,11 +95,14 @@ class Config:
             'prompts_dir': 'build_prompts',
             'sessions_dir': 'build-sessions',
             'templates_dir': 'templates',
+            'prompt_cache': True,  # cache parsed prompts and the listing index under sessions_dir
             
             # Session settings
             'session_name_prefix': 'build',
             'max_retries': 3,
             'retry_delay': 60,
+            'prompt_hot_reload': True,  # apply edits to the prompt file to pending steps
+            'prompt_reload_interval': 5,  # seconds between prompt file checks
             
             # Claude settings
             'claude_command': 'claude',
@@ -117,6 +121,16 @@ class Config:
             
             # Database
             'database_path': 'builder.db',
+            'database_busy_timeout': 30,  # seconds to wait for a lock
+            'database_busy_retries': 5,  # write attempts before giving up
+            'storage_backend': 'sqlite',  # sqlite, memory or segment_log
+            'segment_log_dir': 'builder-segments',  # segment_log backend only
+            'segment_max_mb': 16,  # size at which a new log segment starts
+            'segment_compact_segments': 8,  # compact into SQLite beyond this many segments
+            
+            # Daemon
+            'use_daemon': True,  # send commands to `builder daemon` when it is running
+            'daemon_socket': 'builder.sock',  # relative to sessions_dir
             
             # Monitoring
             'enable_web_monitor': True,
@@ -130,8 +144,19 @@ class Config:
             # Advanced
             'capture_screenshots': False,
             'archive_completed': True,
-            'compression': 'gzip',
-            'max_log_size_mb': 100,
+            'compression': 'gzip',  # gzip, bz2, xz or none
+            'archive_event_retention': 'downsample',  # keep, downsample or delete
+            'archive_downsample_every': 10,  # keep every Nth event of each type
+            'max_log_size_mb': 100,  # size at which a log file rotates
+            'log_backup_count': 5,  # rotated log segments kept, compressed per `compression`
+            'trace_sessions': True,  # record a timeline to <session>/trace.json
+            'trace_buffer_events': 10000,  # trace events buffered before writing
+            'profile_snapshot_interval': 300,  # seconds between --profile-mem snapshots
+            'profile_top': 25,  # entries listed in profiling reports
+            'monitor_event_loop': True,  # measure event loop lag and process metrics in builds
+            'loop_check_interval': 0.1,  # seconds between event loop lag checks
+            'loop_lag_threshold': 0.25,  # seconds of lag logged as a blocked loop, with its stack
+            'process_metrics_interval': 10,  # seconds between RSS, CPU and fd samples
             'debug_output': False  # Enable debug output capture
         }
     
@@ -166,6 +191,15 @@ class Config:
         """Get sessions directory path"""
         return Path(self._config['sessions_dir'])
     
+    def session_dir(self, session_id: str) -> Path:
+        """Get the per-session working directory (logs, captured output)"""
+        return self.sessions_dir / session_id
+    
+    @property
+    def daemon_socket(self) -> Path:
+        """Get the daemon socket path; relative paths are under sessions_dir"""
+        return self.sessions_dir / self._config.get('daemon_socket', 'builder.sock')
+    
     @property
     def database_path(self) -> Path:
         """Get database path"""
@@ -193,6 +227,12 @@ class Config:
         cmd.extend(self._config.get('claude_args', []))
         return cmd
     
+    def copy(self) -> 'Config':
+        """Independent copy, so a build can apply its own profile"""
+        config = Config(copy.deepcopy(self._config))
+        config._profile = self._profile
+        return config
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
         return {
@@ -0,0 +1,302 @@
+"""
+Builder daemon: one long-lived process that runs builds for thin clients
+
+The daemon keeps the storage backend, the prompt manager and every running
+orchestrator in one process and answers JSON-RPC requests (see rpc.py) on
+a Unix-domain socket. ``start`` returns as soon as the session exists while
+the build carries on in the daemon, and read results are served from memory
+until storage reports a change. Requests touch storage and prompt files on a
+worker thread, so a slow disk never stalls the builds running on the loop.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import __version__
+from .codec import encode_detail, encode_record
+from .config import Config
+from .exceptions import BuilderError, DaemonError, SessionError
+from .loop_monitor import process_metrics
+from .models import SessionStatus
+from .orchestrator import BuildOrchestrator
+from .prompt_manager import PromptManager
+from .rpc import (APPLICATION_ERROR, INTERNAL_ERROR, INVALID_PARAMS, INVALID_REQUEST,
+                  METHOD_NOT_FOUND, PARSE_ERROR, DaemonClient, error_response, response)
+from .session_manager import SessionManager
+
+
+logger = logging.getLogger(__name__)
+
+
+class BuilderDaemon:
+    """Hosts build orchestrators and serves the daemon RPC methods
+
+    Methods are the ``rpc_*`` coroutines and functions below; their keyword
+    arguments are the request params.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.socket_path = config.daemon_socket
+        self.session_manager = SessionManager(config)
+        self.prompt_manager = PromptManager(config)
+
+        # Running builds by session ID
+        self.builds: Dict[str, Tuple[BuildOrchestrator, asyncio.Task]] = {}
+
+        # Encoded read results, valid while the storage change token holds
+        self._cache: Dict[Tuple, Any] = {}
+        self._cache_token = None
+
+        # One thread, so storage objects bound to the thread that created
+        # them (SQLite's change-token connection) are only used there
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix='builder-daemon-storage')
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def serve(self):
+        """Listen on the socket until shutdown is requested or a signal arrives"""
+        self._claim_socket()
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._stopping.set)
+
+        self._server = await asyncio.start_unix_server(self._handle_client,
+                                                       path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Daemon listening on {self.socket_path} (pid {os.getpid()})")
+
+        try:
+            await self._stopping.wait()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            await self._stop_builds()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            await self._off_loop(self.session_manager.close)
+            self._executor.shutdown()
+            logger.info("Daemon stopped")
+
+    def _claim_socket(self):
+        """Remove a stale socket, refusing to start beside a live daemon"""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.socket_path.exists():
+            return
+        try:
+            DaemonClient(self.socket_path, timeout=2).close()
+        except DaemonError:
+            self.socket_path.unlink()
+        else:
+            raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+
+    async def _stop_builds(self):
+        """Interrupt the builds still running when the daemon stops"""
+        for session_id, (orchestrator, task) in list(self.builds.items()):
+            logger.info(f"Interrupting build {session_id} for daemon shutdown")
+            orchestrator.interrupt()
+            task.cancel()
+        tasks = [task for _, task in self.builds.values()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self._dispatch(line)
+                if reply is not None:
+                    writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+                    await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logger.debug(f"Dropping daemon client: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """Run one request; returns None for notifications"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return error_response(None, PARSE_ERROR, "Parse error")
+
+        if (not isinstance(request, dict) or request.get('jsonrpc') != '2.0'
+                or not isinstance(request.get('method'), str)):
+            request_id = request.get('id') if isinstance(request, dict) else None
+            return error_response(request_id, INVALID_REQUEST, "Invalid request")
+
+        request_id = request.get('id')
+        method = self._method(request['method'])
+        if method is None:
+            reply = error_response(request_id, METHOD_NOT_FOUND,
+                                   f"Unknown method: {request['method']}")
+        else:
+            reply = await self._call(method, request_id, request.get('params') or {})
+        return reply if 'id' in request else None
+
+    def _method(self, name: str) -> Optional[Callable]:
+        if not name.isidentifier():
+            return None
+        return getattr(self, f'rpc_{name}', None)
+
+    async def _call(self, method: Callable, request_id: Any, params: Any) -> Dict[str, Any]:
+        if not isinstance(params, dict):
+            return error_response(request_id, INVALID_PARAMS, "Params must be an object")
+        try:
+            inspect.signature(method).bind(**params)
+        except TypeError as e:
+            return error_response(request_id, INVALID_PARAMS, str(e))
+
+        try:
+            result = method(**params)
+            if inspect.isawaitable(result):
+                result = await result
+        except (BuilderError, ValueError) as e:
+            return error_response(request_id, APPLICATION_ERROR, str(e),
+                                  {'type': type(e).__name__})
+        except Exception as e:
+            logger.exception(f"Daemon method {method.__name__} failed")
+            return error_response(request_id, INTERNAL_ERROR, str(e))
+        return response(request_id, result)
+
+    async def _off_loop(self, function: Callable[..., Any], *args) -> Any:
+        """Run blocking storage or file work on the daemon's worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _cached(self, key: Tuple, load: Callable[[], Any]) -> Any:
+        """Return ``load()``, reusing the last result until storage changes"""
+        token = self.session_manager.storage.change_token()
+        if token is None or token != self._cache_token:
+            self._cache = {}
+            self._cache_token = token
+        if key not in self._cache:
+            self._cache[key] = load()
+        return self._cache[key]
+
+    def _describe(self, session_ids: List[str], detailed: bool) -> List[Dict[str, Any]]:
+        """Encoded sessions, with steps if detailed, flagged if running here"""
+        if detailed:
+            records = [encode_detail(detail)
+                       for detail in self.session_manager.get_session_details(session_ids)]
+        else:
+            records = [{'session': encode_record(session)}
+                       for session in map(self.session_manager.get_session, session_ids)
+                       if session]
+        for record in records:
+            record['running'] = record['session']['id'] in self.builds
+        return records
+
+    async def _run_build(self, orchestrator: BuildOrchestrator, session, prompt):
+        try:
+            await orchestrator.run(session, prompt)
+        except asyncio.CancelledError:
+            self.session_manager.archive_session(session.id, status='interrupted')
+        except Exception as e:
+            logger.error(f"Build {session.id} failed: {e}")
+            self.session_manager.archive_session(session.id, status='failed')
+        finally:
+            self.builds.pop(session.id, None)
+
+    def rpc_ping(self) -> Dict[str, Any]:
+        return {'pid': os.getpid(), 'version': __version__, 'builds': sorted(self.builds),
+                'metrics': process_metrics()}
+
+    async def rpc_start(self, prompt_file: Optional[str] = None, speed: str = 'normal',
+                        resume: Optional[str] = None) -> Dict[str, Any]:
+        """Create or resume a session and start its build in the background"""
+        config = self.config.copy()
+        config.apply_profile(speed)
+
+        if resume:
+            if resume in self.builds:
+                raise SessionError(f"Session {resume} is already running")
+            session, prompt = await self._off_loop(self._resume, resume)
+        elif prompt_file:
+            session, prompt = await self._off_loop(self._create, prompt_file)
+        else:
+            raise SessionError("A prompt file is required")
+
+        orchestrator = BuildOrchestrator(config, self.session_manager, self.prompt_manager)
+        task = asyncio.get_running_loop().create_task(
+            self._run_build(orchestrator, session, prompt))
+        self.builds[session.id] = (orchestrator, task)
+
+        return {'session': encode_record(session), 'project': prompt.name,
+                'steps': len(prompt.steps)}
+
+    def _resume(self, session_id: str):
+        session = self.session_manager.resume_session(session_id)
+        if not session:
+            raise SessionError(f"Session {session_id} not found or cannot be resumed")
+        return session, self.prompt_manager.load_prompt(session.prompt_file)
+
+    def _create(self, prompt_file: str):
+        prompt = self.prompt_manager.load_prompt(prompt_file)
+        return self.session_manager.create_session(prompt), prompt
+
+    async def rpc_status(self, session_id: Optional[str] = None,
+                         detailed: bool = False) -> List[Dict[str, Any]]:
+        """One session, or all active sessions"""
+        if session_id:
+            records = await self._off_loop(self._cached, ('status', session_id, detailed),
+                                           lambda: self._describe([session_id], detailed))
+            if not records:
+                raise SessionError(f"Session {session_id} not found")
+            return records
+        return await self._off_loop(self._cached, ('status', None, detailed), lambda: (
+            self._describe([s.id for s in self.session_manager.get_active_sessions()], detailed)))
+
+    async def rpc_list(self, all: bool = False, limit: int = 10, after: Optional[str] = None,
+                       detailed: bool = False) -> Dict[str, Any]:
+        """Active sessions, or one page of all sessions"""
+        def load():
+            if not all:
+                sessions = self.session_manager.get_active_sessions()
+                return {'sessions': self._describe([s.id for s in sessions], detailed),
+                        'next_cursor': None, 'total': len(sessions)}
+            sessions, next_cursor = self.session_manager.get_sessions_page(after=after, limit=limit)
+            return {'sessions': self._describe([s.id for s in sessions], detailed),
+                    'next_cursor': next_cursor,
+                    'total': self.session_manager.count_sessions()}
+
+        return await self._off_loop(self._cached, ('list', all, limit, after, detailed), load)
+
+    async def rpc_kill(self, session_id: str) -> bool:
+        """Stop a session, cancelling its build if it runs in this daemon"""
+        killed = await self._off_loop(self.session_manager.kill_session, session_id)
+        build = self.builds.get(session_id)
+        if build:
+            orchestrator, task = build
+            orchestrator.interrupt()
+            task.cancel()
+            killed = True
+        return killed
+
+    async def rpc_attach(self, session_id: str) -> Dict[str, Any]:
+        """What a client needs to attach to an active session"""
+        session = await self._off_loop(self.session_manager.get_session, session_id)
+        if not session or session.status != SessionStatus.ACTIVE:
+            raise SessionError(f"No active session found: {session_id}")
+        return {'session': encode_record(session), 'running': session_id in self.builds,
+                'tmux_session': f"build-{session_id[:8]}" if self.config.use_tmux else None}
+
+    def rpc_shutdown(self) -> bool:
+        """Stop the daemon once this reply is sent"""
+        asyncio.get_running_loop().call_soon(self._stopping.set)
+        return True
+
+
+def run_daemon(config: Config):
+    """Run the daemon in the foreground until it is stopped"""
+    asyncio.run(BuilderDaemon(config).serve())
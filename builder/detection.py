@@ -0,0 +1,95 @@
+"""
+Classification of captured Claude output
+
+The orchestrator decides when to nudge Claude or send the next step from
+the last lines of its output. Each check here is a pure function of that
+text, so it can be benchmarked and tuned on its own.
+"""
+
+from typing import List, NamedTuple, Sequence
+
+
+# Words that mean Claude is still working, for each check
+TODO_BUSY = ('thinking', 'typing', 'processing', '...')
+IDLE_BUSY = ('thinking', 'typing', 'processing', 'writing',
+             'creating', 'building', 'implementing', '...')
+READY_BUSY = ('thinking', 'typing', 'processing', 'working', 'building',
+              'compiling', 'creating', 'implementing', 'writing', 'generating',
+              'analyzing', 'designing', 'developing')
+
+# Phrases that mean Claude is waiting for the next step, so an idle nudge is not needed
+WAITING_PHRASES = (
+    'ready.', 'done.', 'finished.', 'complete.', 'completed step',
+    'step complete', 'task complete', 'all set', 'waiting for',
+    'please provide', 'next step'
+)
+
+# Phrases that mean Claude has finished the current step
+COMPLETION_PHRASES = (
+    'ready.', 'done.', 'finished.', 'complete.', 'completed',
+    'step complete', "i've completed", 'i have completed',
+    'successfully created', 'successfully implemented',
+    'task complete', 'all set', 'ready for the next'
+)
+
+
+class OutputState(NamedTuple):
+    """What a check found in the output"""
+    at_prompt: bool
+    busy: bool
+    matched: bool  # TODO list, waiting phrase or completion phrase, by check
+
+
+def _last_line(lines: List[str]) -> str:
+    """Last non-empty line, stripped"""
+    for line in reversed(lines):
+        if line.strip():
+            return line.strip()
+    return ''
+
+
+def _at_prompt(lines: List[str]) -> bool:
+    """Whether Claude's ``>`` prompt is on one of the last lines"""
+    last_line = _last_line(lines)
+    return (
+        last_line == '>' or
+        last_line.endswith('>') or
+        (len(lines) > 1 and any(line.strip() in ('>', '> ') for line in lines[-3:]))
+    )
+
+
+def classify_todo(output: str, patterns: Sequence[str]) -> OutputState:
+    """Whether Claude has written its TODO list and is back at the prompt"""
+    output_lower = output.lower()
+    lines = output.strip().split('\n')
+    last_line = _last_line(lines)
+    at_prompt = (
+        last_line == '>' or
+        last_line.endswith('>') or
+        (len(lines) > 1 and lines[-1].strip() == '' and lines[-2].strip() == '>')
+    )
+    return OutputState(
+        at_prompt=at_prompt,
+        busy=any(indicator in output_lower for indicator in TODO_BUSY),
+        matched=any(pattern in output_lower for pattern in patterns),
+    )
+
+
+def classify_idle(output: str) -> OutputState:
+    """Whether idle output is Claude stalled at the prompt; matched if it awaits a step"""
+    output_lower = output.lower()
+    return OutputState(
+        at_prompt=_at_prompt(output.strip().split('\n')),
+        busy=any(indicator in output_lower for indicator in IDLE_BUSY),
+        matched=any(phrase in output_lower for phrase in WAITING_PHRASES),
+    )
+
+
+def classify_ready(output: str) -> OutputState:
+    """Whether Claude looks ready for the next step; matched if it reports completion"""
+    output_lower = output.lower()
+    return OutputState(
+        at_prompt=_at_prompt(output.strip().split('\n')),
+        busy=any(word in output_lower for word in READY_BUSY),
+        matched=any(phrase in output_lower for phrase in COMPLETION_PHRASES),
+    )
@@ -35,4 +35,8 @@ class ClaudeError(BuilderError):
 
 class ConfigError(BuilderError):
     """Error related to configuration"""
-    pass
\ No newline at end of file
+    pass
+
+class DaemonError(BuilderError):
+    """Error talking to the Builder daemon"""
+    pass
@@ -0,0 +1,154 @@
+"""
+Streaming summary and export renderers for build sessions
+
+Renderers write straight to a text stream while pulling steps and events
+from iterators, so output starts immediately and memory use does not
+depend on the size of the session.
+"""
+
+import json
+import html
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+
+STEP_ICONS = {
+    'completed': "✅",
+    'in_progress': "🔄",
+    'failed': "❌",
+    'pending': "⏳",
+    'skipped': "⏭️"
+}
+
+
+def to_record(obj) -> Dict[str, Any]:
+    """Convert a session model to a JSON-serializable dict"""
+    record = obj.as_dict()
+    for name, value in record.items():
+        if isinstance(value, Enum):
+            record[name] = value.value
+        elif isinstance(value, datetime):
+            record[name] = value.isoformat()
+    return record
+
+
+def _events_line(event_counts: Optional[Dict[str, int]]) -> str:
+    """Total event count with the most frequent types"""
+    if event_counts is None:
+        return 'N/A'
+    top = sorted(event_counts.items(), key=lambda item: -item[1])[:3]
+    breakdown = ', '.join(f"{count} {event_type}" for event_type, count in top)
+    return f"{sum(event_counts.values())}" + (f" ({breakdown})" if breakdown else '')
+
+
+def write_markdown_summary(out: TextIO, session, steps: Iterable,
+                           event_counts: Optional[Dict[str, int]] = None):
+    """Write a markdown summary"""
+    out.write(f"""# Build Session Summary
+
+## Session: {session.id}
+
+### Overview
+- **Project**: {session.project_name}
+- **Status**: {session.status.value}
+- **Started**: {session.started_at.strftime('%Y-%m-%d %H:%M:%S')}
+- **Ended**: {session.ended_at.strftime('%Y-%m-%d %H:%M:%S') if session.ended_at else 'N/A'}
+- **Duration**: {session.duration or 'N/A'}
+- **Progress**: {session.current_step}/{session.total_steps} steps ({session.progress_percentage}%)
+- **Events**: {_events_line(event_counts)}
+
+### Build Steps
+""")
+
+    for step in steps:
+        icon = STEP_ICONS.get(step.status.value, "❓")
+        out.write(f"\n{icon} **Step {step.step_number}**: {step.description or 'N/A'}\n")
+        if step.duration:
+            out.write(f"   - Duration: {step.duration}\n")
+        if step.error:
+            out.write(f"   - Error: {step.error}\n")
+
+    if session.error:
+        out.write(f"\n### Error\n{session.error}\n")
+
+    out.write(f"\n---\n*Generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
+
+
+def write_html_summary(out: TextIO, session, steps: Iterable,
+                       event_counts: Optional[Dict[str, int]] = None):
+    """Write an HTML summary"""
+    out.write(f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>Session {session.id}</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        .status-completed {{ color: green; }}
+        .status-failed {{ color: red; }}
+        .status-active {{ color: blue; }}
+        .step {{ margin: 10px 0; padding: 10px; border-left: 3px solid #ccc; }}
+        .step-completed {{ border-color: green; }}
+        .step-failed {{ border-color: red; }}
+        .step-in_progress {{ border-color: orange; }}
+    </style>
+</head>
+<body>
+    <h1>Build Session Summary</h1>
+    <h2>Session: {session.id}</h2>
+
+    <h3>Overview</h3>
+    <ul>
+        <li><strong>Project</strong>: {html.escape(session.project_name)}</li>
+        <li><strong>Status</strong>: <span class="status-{session.status.value}">{session.status.value}</span></li>
+        <li><strong>Progress</strong>: {session.current_step}/{session.total_steps} ({session.progress_percentage}%)</li>
+        <li><strong>Duration</strong>: {session.duration or 'N/A'}</li>
+        <li><strong>Events</strong>: {html.escape(_events_line(event_counts))}</li>
+    </ul>
+
+    <h3>Build Steps</h3>
+""")
+
+    for step in steps:
+        out.write(f"""
+    <div class="step step-{step.status.value}">
+        <strong>Step {step.step_number}</strong>: {html.escape(step.description or 'N/A')}
+        <br>Status: {step.status.value}
+        {f'<br>Duration: {step.duration}' if step.duration else ''}
+    </div>
+""")
+
+    out.write("""
+</body>
+</html>
+""")
+
+
+def _write_json_array(out: TextIO, key: str, items: Iterable, last: bool = False):
+    """Write one ``"key": [...]`` member of the top-level JSON object"""
+    out.write(f'  "{key}": [')
+    first = True
+    for item in items:
+        out.write('\n    ' if first else ',\n    ')
+        out.write(json.dumps(to_record(item), default=str))
+        first = False
+    out.write('\n  ]' if not first else ']')
+    out.write('\n' if last else ',\n')
+
+
+def write_json_export(out: TextIO, session, steps: Iterable, events: Iterable):
+    """Write a JSON document with the session, its steps and its events"""
+    out.write('{\n')
+    out.write(f'  "session": {json.dumps(to_record(session), default=str)},\n')
+    _write_json_array(out, 'steps', steps)
+    _write_json_array(out, 'events', events, last=True)
+    out.write('}\n')
+
+
+def write_jsonl_export(out: TextIO, session, steps: Iterable, events: Iterable):
+    """Write one JSON record per line: the session, then steps, then events"""
+    out.write(json.dumps({'type': 'session', **to_record(session)}, default=str) + '\n')
+    for step in steps:
+        out.write(json.dumps({'type': 'step', **to_record(step)}, default=str) + '\n')
+    for event in events:
+        out.write(json.dumps({'type': 'event', **to_record(event)}, default=str) + '\n')
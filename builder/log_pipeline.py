@@ -0,0 +1,158 @@
+"""
+Non-blocking log pipeline
+
+Threads that log only put records on a queue; a QueueListener thread
+formats them and does the file I/O, so the event loop never waits on disk.
+Log files rotate by size (``max_log_size_mb``) and rotated segments are
+compressed with the ``compression`` codec. Records logged while a build
+runs also go to that session's own log file.
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .archive import COMPRESSORS
+
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SESSION_LOG_NAME = 'builder.log'
+
+# Session log files kept open at once; the least recently used is closed beyond this
+MAX_OPEN_SESSION_LOGS = 16
+
+# Session whose build is running in the current task or thread; the
+# orchestrator sets it so its records also reach the session's log file
+current_session: ContextVar[Optional[str]] = ContextVar('builder_session', default=None)
+
+
+class SessionTagFilter(logging.Filter):
+    """Record the current session on each record, in the thread that logs it"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'session_id'):
+            record.session_id = current_session.get()
+        return True
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-rotated log file whose rotated segments are compressed
+
+    Rotation happens in the listener thread, so compressing a segment
+    delays only the records queued behind it.
+    """
+
+    def __init__(self, filename: Path, max_bytes: int, backup_count: int,
+                 compression: Optional[str] = 'gzip'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding='utf-8', delay=True)
+        compression = (compression or 'none').lower()
+        self.suffix, self.opener = COMPRESSORS.get(compression, COMPRESSORS['none'])
+        if self.suffix:
+            self.namer = self._compressed_name
+            self.rotator = self._compress
+
+    def _compressed_name(self, name: str) -> str:
+        return name + self.suffix
+
+    def _compress(self, source: str, dest: str):
+        with open(source, 'rb') as src, self.opener(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+
+class SessionLogHandler(logging.Handler):
+    """Writes records tagged with a session to that session's log file"""
+
+    def __init__(self, sessions_dir: Path, max_bytes: int, backup_count: int,
+                 compression: Optional[str]):
+        super().__init__()
+        self.sessions_dir = Path(sessions_dir)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compression = compression
+        self._files: 'OrderedDict[str, CompressingRotatingFileHandler]' = OrderedDict()
+
+    def _file(self, session_id: str) -> CompressingRotatingFileHandler:
+        handler = self._files.get(session_id)
+        if handler is None:
+            session_dir = self.sessions_dir / session_id
+            session_dir.mkdir(parents=True, exist_ok=True)
+            handler = CompressingRotatingFileHandler(
+                session_dir / SESSION_LOG_NAME, self.max_bytes, self.backup_count,
+                self.compression)
+            handler.setFormatter(self.formatter)
+            self._files[session_id] = handler
+            while len(self._files) > MAX_OPEN_SESSION_LOGS:
+                self._files.popitem(last=False)[1].close()
+        else:
+            self._files.move_to_end(session_id)
+        return handler
+
+    def emit(self, record: logging.LogRecord):
+        session_id = getattr(record, 'session_id', None)
+        if not session_id:
+            return
+        try:
+            self._file(session_id).handle(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        for handler in self._files.values():
+            handler.close()
+        self._files.clear()
+        super().close()
+
+
+class LogPipeline:
+    """A queue feeding console, main log file and session log handlers"""
+
+    def __init__(self, config=None, log_file: Optional[Path] = None, console: bool = True):
+        get = config.get if config is not None else (lambda key, default=None: default)
+        max_bytes = int(float(get('max_log_size_mb', 100)) * 1024 * 1024)
+        backup_count = get('log_backup_count', 5)
+        compression = get('compression', 'gzip')
+        formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+
+        if log_file is None:
+            log_file = Path(f'builder_{datetime.now().strftime("%Y%m%d")}.log')
+        handlers = [CompressingRotatingFileHandler(log_file, max_bytes, backup_count,
+                                                   compression)]
+        if console:
+            handlers.append(logging.StreamHandler(sys.stdout))
+        if config is not None:
+            handlers.append(SessionLogHandler(config.sessions_dir, max_bytes, backup_count,
+                                              compression))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.handler = logging.handlers.QueueHandler(self.queue)
+        self.handler.addFilter(SessionTagFilter())
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers,
+                                                       respect_handler_level=True)
+        self.handlers = handlers
+        self.running = False
+
+    def start(self):
+        self.listener.start()
+        self.running = True
+
+    def stop(self):
+        """Write out queued records, then close the files"""
+        if self.running:
+            self.listener.stop()
+            self.running = False
+        for handler in self.handlers:
+            handler.close()
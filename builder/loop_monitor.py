@@ -0,0 +1,260 @@
+"""
+Event-loop lag and process metrics for a running build
+
+The orchestrator mixes async tmux I/O with synchronous database and file
+writes, any of which can block the event loop. A LoopMonitor task sleeps
+for a short interval and measures how late it wakes up. A watchdog thread
+notices while the loop is still stuck and logs the stack it is stuck in,
+which is the call to blame. Lag and process samples (RSS, CPU, open files)
+go to the build's trace as counters, blocks are recorded as session
+events, and a summary event is written when the build ends. Those events
+are written by the watchdog thread, so recording a block never blocks the
+loop again.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import resource
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from .analytics import DurationSketch
+from .trace import Tracer
+
+
+logger = logging.getLogger(__name__)
+
+# Stack frames kept from a blocked loop's stack, innermost last
+STACK_LIMIT = 25
+
+# Seconds between lag counters in the trace; each is the worst lag since the last
+TRACE_LAG_INTERVAL = 1.0
+
+# Process metrics recorded as trace counters, by counter name
+COUNTERS = {
+    'rss_mb': 'RSS (MB)',
+    'cpu_percent': 'CPU (%)',
+    'open_fds': 'Open file descriptors',
+    'threads': 'Threads',
+}
+
+
+def _rss_bytes() -> int:
+    """Resident set size now, or the peak where the current size is unavailable"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _open_fds() -> Optional[int]:
+    for fd_dir in ('/proc/self/fd', '/dev/fd'):
+        try:
+            return len(os.listdir(fd_dir)) - 1  # Less the one listdir opened
+        except OSError:
+            continue
+    return None
+
+
+def _loop_stack(frame) -> str:
+    """A stack from the event loop thread, from the running callback inwards"""
+    frames = traceback.extract_stack(frame)
+    for index in range(len(frames) - 1, -1, -1):
+        if frames[index].filename == asyncio.events.__file__:
+            frames = frames[index + 1:]
+            break
+    return ''.join(traceback.format_list(frames[-STACK_LIMIT:]))
+
+
+def process_metrics() -> Dict[str, Any]:
+    """RSS, CPU time, open file descriptors and threads of this process"""
+    cpu = os.times()
+    return {
+        'rss_mb': round(_rss_bytes() / 2 ** 20, 1),
+        'cpu_seconds': round(cpu.user + cpu.system, 2),
+        'open_fds': _open_fds(),
+        'threads': threading.active_count(),
+    }
+
+
+class LoopMonitor:
+    """Measures the lag of the running event loop and samples process metrics"""
+
+    def __init__(self, config, session_manager=None, session_id: Optional[str] = None,
+                 tracer: Optional[Tracer] = None):
+        self.session_manager = session_manager
+        self.session_id = session_id
+        self.tracer = tracer
+        self.interval = config.get('loop_check_interval', 0.1)
+        self.threshold = config.get('loop_lag_threshold', 0.25)
+        self.metrics_interval = config.get('process_metrics_interval', 10)
+
+        # Streaming lag statistics, so a long build's monitor stays a fixed size
+        self.checks = 0
+        self.lag_sum = 0.0
+        self.max_lag = 0.0
+        self.lag_sketch = DurationSketch()  # Milliseconds, for percentiles
+        self.blocked = 0
+        self.peak: Dict[str, float] = {}
+        self._started_cpu = 0.0
+        self._last_sample = (0.0, 0.0)  # Monotonic and CPU seconds
+
+        # Shared with the watchdog thread
+        self._due = 0.0
+        self._stack: Optional[str] = None
+        self._reported = False
+        self._loop_thread: Optional[int] = None
+        self._stopping = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        # Session events waiting for the watchdog to write them
+        self._events: queue.SimpleQueue = queue.SimpleQueue()
+
+    def start(self):
+        """Start measuring the running loop"""
+        self._loop_thread = threading.get_ident()
+        self._started_cpu = sum(os.times()[:2])
+        self._last_sample = (time.monotonic(), self._started_cpu)
+        self._due = time.monotonic() + self.interval
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name='builder-loop-watchdog',
+                                          daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> Dict[str, Any]:
+        """Stop measuring; records and returns the summary"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._sample_process()
+        summary = self.summary()
+        self._log_event('process_metrics', summary)
+
+        # The watchdog writes what is still queued before it exits
+        self._stopping.set()
+        if self._watchdog:
+            await asyncio.get_running_loop().run_in_executor(None, self._watchdog.join)
+        else:
+            self._write_events()
+        return summary
+
+    def _log_event(self, event_type: str, data: Dict[str, Any]):
+        if self.session_manager and self.session_id:
+            self._events.put((event_type, data))
+
+    def _write_events(self):
+        """Write the queued session events; runs off the loop"""
+        while True:
+            try:
+                event_type, data = self._events.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self.session_manager.log_event(self.session_id, event_type, data)
+            except Exception as e:
+                logger.warning(f"Could not record {event_type}: {e}")
+
+    async def _run(self):
+        last_sample = last_traced = time.monotonic()
+        window_lag = 0.0
+        while True:
+            self._due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - self._due, 0.0)
+            self._due = float('inf')  # Not due again until the next sleep
+            self.checks += 1
+            self.lag_sum += lag
+            self.max_lag = max(self.max_lag, lag)
+            self.lag_sketch.add(round(lag * 1000))
+
+            window_lag = max(window_lag, lag)
+            if self.tracer and now - last_traced >= TRACE_LAG_INTERVAL:
+                self.tracer.record('C', 'event loop lag', 'monitor', self.tracer.now(), 0,
+                                   {'lag_ms': round(window_lag * 1000, 1)})
+                last_traced = now
+                window_lag = 0.0
+            if lag > self.threshold:
+                self._record_block(lag)
+            self._reported = False
+
+            if now - last_sample >= self.metrics_interval:
+                last_sample = now
+                self._sample_process()
+
+    def _watch(self):
+        """Log the loop thread's stack while the loop is blocked past the threshold"""
+        while not self._stopping.wait(self.threshold / 4):
+            self._write_events()
+            stalled = time.monotonic() - self._due
+            if stalled <= self.threshold or self._reported:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._stack = _loop_stack(frame)
+            self._reported = True
+            logger.warning(f"Event loop blocked for over {stalled * 1000:.0f}ms "
+                           f"(threshold {self.threshold * 1000:.0f}ms), in:\n{self._stack}",
+                           extra={'session_id': self.session_id})
+        self._write_events()
+
+    def _record_block(self, lag: float):
+        self.blocked += 1
+        stack, self._stack = self._stack, None
+        if not self._reported:
+            # Blocked too briefly for the watchdog to catch it in the act
+            logger.warning(f"Event loop lagged {lag * 1000:.0f}ms "
+                           f"(threshold {self.threshold * 1000:.0f}ms)")
+        if self.tracer:
+            self.tracer.instant('event loop blocked', 'monitor', lag_ms=round(lag * 1000, 1))
+        self._log_event('event_loop_blocked', {'lag_ms': round(lag * 1000, 1), 'stack': stack})
+
+    def _sample_process(self):
+        metrics = process_metrics()
+        now = time.monotonic()
+        last_time, last_cpu = self._last_sample
+        if now > last_time:
+            metrics['cpu_percent'] = round(
+                (metrics['cpu_seconds'] - last_cpu) / (now - last_time) * 100, 1)
+        self._last_sample = (now, metrics['cpu_seconds'])
+
+        for key in COUNTERS:
+            value = metrics.get(key)
+            if value is None:
+                continue
+            self.peak[key] = max(self.peak.get(key, value), value)
+            if self.tracer:
+                self.tracer.record('C', COUNTERS[key], 'monitor', self.tracer.now(), 0,
+                                   {'value': value})
+
+    def summary(self) -> Dict[str, Any]:
+        """Lag statistics and peak process metrics so far"""
+        summary = {
+            'checks': self.checks,
+            'blocked': self.blocked,
+            'threshold_ms': round(self.threshold * 1000),
+            'peak_rss_mb': self.peak.get('rss_mb'),
+            'peak_open_fds': self.peak.get('open_fds'),
+            'peak_threads': self.peak.get('threads'),
+            'peak_cpu_percent': self.peak.get('cpu_percent'),
+            'cpu_seconds': round(sum(os.times()[:2]) - self._started_cpu, 2),
+        }
+        if self.checks:
+            summary.update({
+                'mean_lag_ms': round(self.lag_sum / self.checks * 1000, 1),
+                # The sketch estimates within a bucket; never report above the max
+                'p99_lag_ms': round(min(self.lag_sketch.quantile(0.99), self.max_lag * 1000), 1),
+                'max_lag_ms': round(self.max_lag * 1000, 1),
+            })
+        return summary
@@ -0,0 +1,445 @@
+"""
+Versioned schema migrations for the Builder database
+"""
+
+import sqlite3
+import logging
+from typing import Callable, List, Optional
+
+from .analytics import apply_rollup
+
+
+logger = logging.getLogger(__name__)
+
+
+def _initial_schema(conn: sqlite3.Connection):
+    """Version 1: original schema (text timestamps)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            prompt_file TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            started_at TIMESTAMP NOT NULL,
+            ended_at TIMESTAMP,
+            current_step INTEGER DEFAULT 0,
+            total_steps INTEGER NOT NULL,
+            error TEXT,
+            metadata TEXT
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS build_steps (
+            session_id TEXT NOT NULL,
+            step_number INTEGER NOT NULL,
+            description TEXT,
+            content TEXT,
+            status TEXT NOT NULL,
+            started_at TIMESTAMP,
+            completed_at TIMESTAMP,
+            error TEXT,
+            PRIMARY KEY (session_id, step_number),
+            FOREIGN KEY (session_id) REFERENCES sessions(id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            event_type TEXT NOT NULL,
+            data TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions(id)
+        )
+    ''')
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions(status)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_events_session ON session_events(session_id)')
+
+
+def _epoch_ms(column: str) -> str:
+    """SQL expression converting a local-time text timestamp to epoch milliseconds"""
+    return (
+        f"CASE WHEN typeof({column}) = 'text' "
+        f"THEN CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER) "
+        f"ELSE {column} END"
+    )
+
+
+def _integer_timestamps(conn: sqlite3.Connection):
+    """Version 2: integer epoch-millisecond timestamps and query-shaped indexes"""
+    conn.execute('''
+        CREATE TABLE sessions_new (
+            id TEXT PRIMARY KEY,
+            prompt_file TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            started_at INTEGER NOT NULL,
+            ended_at INTEGER,
+            current_step INTEGER DEFAULT 0,
+            total_steps INTEGER NOT NULL,
+            error TEXT,
+            metadata TEXT
+        )
+    ''')
+    conn.execute(f'''
+        INSERT INTO sessions_new
+        SELECT id, prompt_file, project_name, status,
+               {_epoch_ms('started_at')}, {_epoch_ms('ended_at')},
+               current_step, total_steps, error, metadata
+        FROM sessions
+    ''')
+
+    conn.execute('''
+        CREATE TABLE build_steps_new (
+            session_id TEXT NOT NULL,
+            step_number INTEGER NOT NULL,
+            description TEXT,
+            content TEXT,
+            status TEXT NOT NULL,
+            started_at INTEGER,
+            completed_at INTEGER,
+            error TEXT,
+            PRIMARY KEY (session_id, step_number),
+            FOREIGN KEY (session_id) REFERENCES sessions(id)
+        )
+    ''')
+    conn.execute(f'''
+        INSERT INTO build_steps_new
+        SELECT session_id, step_number, description, content, status,
+               {_epoch_ms('started_at')}, {_epoch_ms('completed_at')}, error
+        FROM build_steps
+    ''')
+
+    conn.execute('''
+        CREATE TABLE session_events_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            data TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions(id)
+        )
+    ''')
+    conn.execute(f'''
+        INSERT INTO session_events_new
+        SELECT id, session_id, {_epoch_ms('timestamp')}, event_type, data
+        FROM session_events
+    ''')
+
+    for table in ('sessions', 'build_steps', 'session_events'):
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+    # Listing and statistics filter/sort on started_at; keyset paging
+    # needs the (started_at, id) pair. Events are read per session in
+    # insertion order, which the rowid already gives us.
+    conn.execute('CREATE INDEX idx_sessions_started ON sessions(started_at, id)')
+    conn.execute('CREATE INDEX idx_sessions_status ON sessions(status, started_at)')
+    conn.execute('CREATE INDEX idx_events_session ON session_events(session_id, id)')
+
+
+def _session_rollups(conn: sqlite3.Connection):
+    """Version 3: incrementally maintained session statistics rollups"""
+    conn.execute('''
+        CREATE TABLE session_rollups (
+            day TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            prompt_file TEXT NOT NULL,
+            status TEXT NOT NULL,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            duration_count INTEGER NOT NULL DEFAULT 0,
+            duration_sum_ms INTEGER NOT NULL DEFAULT 0,
+            duration_sketch TEXT,
+            PRIMARY KEY (day, profile, prompt_file, status)
+        )
+    ''')
+
+    # Backfill from existing history
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    for row in cursor.execute(
+        'SELECT started_at, ended_at, status, prompt_file, metadata FROM sessions'
+    ):
+        apply_rollup(conn, row)
+
+
+def _incremental_vacuum(conn: sqlite3.Connection):
+    """Version 4: incremental auto-vacuum so pruned archives shrink the file"""
+    # Changing auto_vacuum on an existing database only takes effect after
+    # a full VACUUM, which cannot run inside a transaction
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+
+
+_incremental_vacuum.transactional = False
+
+
+def _full_text_search(conn: sqlite3.Connection):
+    """Version 5: FTS5 search over step content, event payloads and output"""
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE steps_fts USING fts5(
+                description, content, session_id UNINDEXED, step_number UNINDEXED,
+                tokenize = 'porter unicode61'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        if 'no such module' not in str(e):
+            raise
+        # SQLite built without FTS5; search stays unavailable
+        logger.warning(f"Full-text search disabled: {e}")
+        return
+
+    # Event rows are keyed by the event id so deletes stay cheap
+    conn.execute('''
+        CREATE VIRTUAL TABLE events_fts USING fts5(
+            body, session_id UNINDEXED,
+            tokenize = 'porter unicode61'
+        )
+    ''')
+    conn.execute('''
+        CREATE VIRTUAL TABLE output_fts USING fts5(
+            body, session_id UNINDEXED, chunk UNINDEXED,
+            tokenize = 'porter unicode61'
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER build_steps_fts_insert AFTER INSERT ON build_steps BEGIN
+            INSERT INTO steps_fts (description, content, session_id, step_number)
+            VALUES (new.description, new.content, new.session_id, new.step_number);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER build_steps_fts_delete AFTER DELETE ON build_steps BEGIN
+            DELETE FROM steps_fts
+            WHERE session_id = old.session_id AND step_number = old.step_number;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER session_events_fts_insert AFTER INSERT ON session_events BEGIN
+            INSERT INTO events_fts (rowid, body, session_id)
+            VALUES (new.id, new.event_type || ' ' || COALESCE(new.data, ''), new.session_id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER session_events_fts_delete AFTER DELETE ON session_events BEGIN
+            DELETE FROM events_fts WHERE rowid = old.id;
+        END
+    ''')
+
+    # Backfill existing history
+    conn.execute('''
+        INSERT INTO steps_fts (description, content, session_id, step_number)
+        SELECT description, content, session_id, step_number FROM build_steps
+    ''')
+    conn.execute('''
+        INSERT INTO events_fts (rowid, body, session_id)
+        SELECT id, event_type || ' ' || COALESCE(data, ''), session_id FROM session_events
+    ''')
+
+
+def _idle_nudge_index(conn: sqlite3.Connection):
+    """Version 6: partial index over idle nudges for per-step analytics"""
+    # Only idle_continue_sent rows are indexed, so ordinary event inserts
+    # pay nothing for it
+    conn.execute('''
+        CREATE INDEX idx_events_idle_nudges ON session_events(session_id, timestamp)
+        WHERE event_type = 'idle_continue_sent'
+    ''')
+
+
+def content_hash(body: Optional[str]) -> Optional[bytes]:
+    """Content address (SHA-256 digest) of a step body or initial prompt"""
+    if body is None:
+        return None
+    # Imported here: loading OpenSSL is a noticeable part of CLI startup
+    import hashlib
+    return hashlib.sha256(body.encode('utf-8')).digest()
+
+
+def _content_addressed_steps(conn: sqlite3.Connection):
+    """Version 7: store step bodies and initial prompts once, keyed by hash"""
+    conn.create_function('content_hash', 1, content_hash, deterministic=True)
+
+    before_rows, before_bytes = conn.execute(
+        'SELECT COUNT(content), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM build_steps'
+    ).fetchone()
+
+    # Content ids are an INTEGER PRIMARY KEY so the full-text index can
+    # key on them safely across VACUUM
+    conn.execute('''
+        CREATE TABLE contents (
+            id INTEGER PRIMARY KEY,
+            hash BLOB NOT NULL UNIQUE,
+            body TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT OR IGNORE INTO contents (hash, body)
+        SELECT content_hash(content), content FROM build_steps
+        WHERE content IS NOT NULL
+    ''')
+
+    conn.execute('''
+        CREATE TABLE build_steps_new (
+            session_id TEXT NOT NULL,
+            step_number INTEGER NOT NULL,
+            description TEXT,
+            content_id INTEGER REFERENCES contents(id),
+            status TEXT NOT NULL,
+            started_at INTEGER,
+            completed_at INTEGER,
+            error TEXT,
+            PRIMARY KEY (session_id, step_number),
+            FOREIGN KEY (session_id) REFERENCES sessions(id)
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO build_steps_new
+        SELECT b.session_id, b.step_number, b.description, c.id, b.status,
+               b.started_at, b.completed_at, b.error
+        FROM build_steps b
+        LEFT JOIN contents c ON c.hash = content_hash(b.content)
+    ''')
+    # Dropping the table also drops its full-text triggers
+    conn.execute('DROP TABLE build_steps')
+    conn.execute('ALTER TABLE build_steps_new RENAME TO build_steps')
+    conn.execute('CREATE INDEX idx_build_steps_content ON build_steps(content_id)')
+
+    conn.execute('ALTER TABLE sessions ADD COLUMN initial_prompt_id INTEGER REFERENCES contents(id)')
+    conn.execute('CREATE INDEX idx_sessions_initial_prompt ON sessions(initial_prompt_id)')
+
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'steps_fts'"
+    ).fetchone()
+    if has_fts:
+        # Index each body once instead of once per step that uses it
+        conn.execute('DROP TABLE steps_fts')
+        conn.execute('''
+            CREATE VIRTUAL TABLE steps_fts USING fts5(
+                description, session_id UNINDEXED, step_number UNINDEXED,
+                tokenize = 'porter unicode61'
+            )
+        ''')
+        conn.execute('''
+            CREATE VIRTUAL TABLE contents_fts USING fts5(
+                body, tokenize = 'porter unicode61'
+            )
+        ''')
+        conn.execute('''
+            CREATE TRIGGER build_steps_fts_insert AFTER INSERT ON build_steps BEGIN
+                INSERT INTO steps_fts (description, session_id, step_number)
+                VALUES (new.description, new.session_id, new.step_number);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER build_steps_fts_delete AFTER DELETE ON build_steps BEGIN
+                DELETE FROM steps_fts
+                WHERE session_id = old.session_id AND step_number = old.step_number;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER contents_fts_insert AFTER INSERT ON contents BEGIN
+                INSERT INTO contents_fts (rowid, body) VALUES (new.id, new.body);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER contents_fts_delete AFTER DELETE ON contents BEGIN
+                DELETE FROM contents_fts WHERE rowid = old.id;
+            END
+        ''')
+        conn.execute('''
+            INSERT INTO steps_fts (description, session_id, step_number)
+            SELECT description, session_id, step_number FROM build_steps
+        ''')
+        conn.execute('INSERT INTO contents_fts (rowid, body) SELECT id, body FROM contents')
+
+    after_rows, after_bytes = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(body AS BLOB))), 0) FROM contents'
+    ).fetchone()
+    logger.info(
+        f"Deduplicated step content: {before_rows} bodies ({before_bytes} bytes) "
+        f"stored as {after_rows} ({after_bytes} bytes), "
+        f"{before_bytes - after_bytes} bytes reclaimed"
+    )
+
+
+# Ordered list of migrations; the database's user_version is the number
+# of migrations already applied. Only ever append to this list.
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _initial_schema,
+    _integer_timestamps,
+    _session_rollups,
+    _incremental_vacuum,
+    _full_text_search,
+    _idle_nudge_index,
+    _content_addressed_steps,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version recorded in the database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply all pending migrations, returning the resulting schema version"""
+    version = get_schema_version(conn)
+
+    if version > SCHEMA_VERSION:
+        logger.warning(
+            f"Database schema version {version} is newer than supported "
+            f"version {SCHEMA_VERSION}"
+        )
+        return version
+
+    # Manage transactions explicitly so DDL and the version bump commit together
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+
+    try:
+        for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+            logger.info(f"Applying database migration {number}: {migration.__doc__}")
+
+            if not getattr(migration, 'transactional', True):
+                # Runs outside a transaction, so it cannot hold the lock; it must
+                # be idempotent, as another process may be running it too
+                if get_schema_version(conn) >= number:
+                    continue
+                migration(conn)
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    # Never move the version back past a concurrent migrator
+                    if get_schema_version(conn) < number:
+                        conn.execute(f'PRAGMA user_version = {number}')
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+                continue
+
+            # Each migration runs in its own transaction together with the
+            # version bump, so an interrupted upgrade is retried from scratch
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have migrated while we waited for the lock
+                if get_schema_version(conn) >= number:
+                    conn.execute('COMMIT')
+                    continue
+                migration(conn)
+                conn.execute(f'PRAGMA user_version = {number}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+    finally:
+        conn.isolation_level = isolation_level
+
+    return SCHEMA_VERSION
@@ -0,0 +1,226 @@
+"""
+Session data models shared by the session manager and storage backends
+
+Sessions, steps and events are slotted classes, since large result sets
+hold many of them, and their JSON fields are only decoded when read.
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SessionStatus(Enum):
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    INTERRUPTED = "interrupted"
+    PAUSED = "paused"
+
+
+class StepStatus(Enum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+class JSONField:
+    """A dict field that may be given as JSON text and is decoded on first access
+
+    The owning class needs ``_<name>`` and ``_<name>_json`` slots.
+    """
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+        self.value_slot = f'_{name}'
+        self.json_slot = f'_{name}_json'
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.value_slot)
+        if value is None:
+            raw = getattr(obj, self.json_slot)
+            value = json.loads(raw) if raw else {}
+            setattr(obj, self.value_slot, value)
+            setattr(obj, self.json_slot, None)
+        return value
+
+    def __set__(self, obj, value: Dict[str, Any]):
+        setattr(obj, self.value_slot, value)
+        setattr(obj, self.json_slot, None)
+
+    def is_decoded(self, obj) -> bool:
+        return getattr(obj, self.value_slot) is not None or not getattr(obj, self.json_slot)
+
+    def raw(self, obj) -> str:
+        """JSON text of the field, without decoding it if it has not been yet"""
+        if self.is_decoded(obj):
+            return json.dumps(self.__get__(obj))
+        return getattr(obj, self.json_slot)
+
+
+class Record:
+    """Base for slotted models: field-wise equality, repr and copying
+
+    Subclasses list their fields in constructor order in ``FIELDS``, and
+    their JSONField names in ``JSON_FIELDS``.
+    """
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+    JSON_FIELDS: Tuple[str, ...] = ()
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{self.__class__.__name__}({values})"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Field values by name"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def copy(self, **changes):
+        """Copy with ``changes`` applied, like dataclasses.replace
+
+        Decoded JSON fields are copied rather than shared; undecoded ones
+        are carried over as text.
+        """
+        values = {name: getattr(self, name) for name in self.FIELDS
+                  if name not in self.JSON_FIELDS}
+        for name in self.JSON_FIELDS:
+            json_field = getattr(self.__class__, name)
+            if json_field.is_decoded(self):
+                values[name] = dict(getattr(self, name))
+            else:
+                values[f'{name}_json'] = getattr(self, json_field.json_slot)
+        values.update(changes)
+        return self.__class__(**values)
+
+
+class Session(Record):
+    """Build session data model"""
+
+    __slots__ = ('id', 'prompt_file', 'project_name', 'status', 'started_at', 'ended_at',
+                 'current_step', 'total_steps', 'error', '_metadata', '_metadata_json')
+    FIELDS = ('id', 'prompt_file', 'project_name', 'status', 'started_at', 'ended_at',
+              'current_step', 'total_steps', 'error', 'metadata')
+    JSON_FIELDS = ('metadata',)
+
+    metadata = JSONField()
+
+    def __init__(self, id: str, prompt_file: str, project_name: str, status: SessionStatus,
+                 started_at: datetime, ended_at: Optional[datetime], current_step: int,
+                 total_steps: int, error: Optional[str],
+                 metadata: Optional[Dict[str, Any]] = None,
+                 metadata_json: Optional[str] = None):
+        self.id = id
+        self.prompt_file = prompt_file
+        self.project_name = project_name
+        self.status = status
+        self.started_at = started_at
+        self.ended_at = ended_at
+        self.current_step = current_step
+        self.total_steps = total_steps
+        self.error = error
+        self._metadata = metadata
+        self._metadata_json = metadata_json
+
+    @property
+    def metadata_json(self) -> str:
+        return Session.metadata.raw(self)
+
+    @property
+    def duration(self) -> Optional[timedelta]:
+        if self.ended_at:
+            return self.ended_at - self.started_at
+        elif self.status == SessionStatus.ACTIVE:
+            return datetime.now() - self.started_at
+        return None
+
+    @property
+    def progress_percentage(self) -> int:
+        if self.total_steps == 0:
+            return 0
+        return int((self.current_step / self.total_steps) * 100)
+
+
+class BuildStep(Record):
+    """Build step data model"""
+
+    __slots__ = FIELDS = ('session_id', 'step_number', 'description', 'content', 'status',
+                          'started_at', 'completed_at', 'error')
+
+    def __init__(self, session_id: str, step_number: int, description: str, content: str,
+                 status: StepStatus, started_at: Optional[datetime],
+                 completed_at: Optional[datetime], error: Optional[str]):
+        self.session_id = session_id
+        self.step_number = step_number
+        self.description = description
+        self.content = content
+        self.status = status
+        self.started_at = started_at
+        self.completed_at = completed_at
+        self.error = error
+
+    @property
+    def duration(self) -> Optional[timedelta]:
+        if self.started_at and self.completed_at:
+            return self.completed_at - self.started_at
+        return None
+
+
+@dataclass
+class SearchResult:
+    """Full-text search hit"""
+    session_id: str
+    source: str  # 'step', 'prompt', 'event' or 'output'
+    ref: int  # step number, event id or output chunk
+    snippet: str
+    rank: float
+
+
+class SessionEvent(Record):
+    """Session event for audit trail"""
+
+    __slots__ = ('session_id', 'timestamp', 'event_type', '_data', '_data_json', 'id')
+    FIELDS = ('session_id', 'timestamp', 'event_type', 'data', 'id')
+    JSON_FIELDS = ('data',)
+
+    data = JSONField()
+
+    def __init__(self, session_id: str, timestamp: datetime, event_type: str,
+                 data: Optional[Dict[str, Any]] = None, id: Optional[int] = None,
+                 data_json: Optional[str] = None):
+        self.session_id = session_id
+        self.timestamp = timestamp
+        self.event_type = event_type
+        self._data = data
+        self._data_json = data_json
+        self.id = id
+
+    @property
+    def data_json(self) -> str:
+        return SessionEvent.data.raw(self)
+
+
+@dataclass
+class SessionDetail:
+    """A session loaded together with its steps and per-type event counts"""
+    session: Session
+    steps: List[BuildStep] = field(default_factory=list)
+    event_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def event_count(self) -> int:
+        return sum(self.event_counts.values())
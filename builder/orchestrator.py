@@ -3,17 +3,24 @@ Build Orchestrator - Core orchestration logic using asyncio
 """
 
 import asyncio
+import dataclasses
 import logging
+import os
 import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
 
 from .config import Config
 from .session_manager import SessionManager, Session, SessionStatus
 from .prompt_manager import PromptManager, BuildPrompt
 from .claude_interface import ClaudeInterface
+from .detection import classify_idle, classify_ready, classify_todo
 from .exceptions import BuildError, BuildInterrupted
+from .log_pipeline import current_session
+from .loop_monitor import LoopMonitor
+from . import profiling, trace
+from .trace import Tracer, current_tracer
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +43,9 @@ class BuildOrchestrator:
         self.last_output_time = time.time()
         self.last_output_hash = ""
         self.idle_count = 0
+        self.prompt_stamp = None
+        self.tracer: Optional[Tracer] = None
+        self.traced_step: Optional[str] = None  # Name of the open step span
         
         # Control flags
         self.running = False
@@ -46,6 +56,27 @@ class BuildOrchestrator:
         self.current_session = session
         self.current_prompt = prompt
         self.running = True
+        self.prompt_stamp = self._prompt_file_stamp()
+        
+        # Records logged by this build (and tasks it starts) also go to its session log
+        session_token = current_session.set(session.id)
+        profiling.attach_session(session.id, self.config.session_dir(session.id))
+        
+        # Spans recorded by this build (and tasks it starts) go to its trace
+        self.tracer = Tracer.for_session(self.config, session)
+        tracer_token = current_tracer.set(self.tracer)
+        if self.tracer:
+            self.tracer.begin('build', 'build', session_id=session.id, steps=len(prompt.steps))
+        
+        # Event loop lag and process metrics, recorded to the trace and session events
+        monitor = None
+        if self.config.get('monitor_event_loop', True):
+            monitor = LoopMonitor(self.config, self.session_manager, session.id, self.tracer)
+            monitor.start()
+        
+        watcher = None
+        if self.config.get('prompt_hot_reload', True) and prompt.path:
+            watcher = asyncio.create_task(self._watch_prompt_file())
         
         try:
             logger.info(f"Starting build session: {session.id}")
@@ -58,7 +89,8 @@ class BuildOrchestrator:
             
             # Wait for TODO list creation if configured
             if self.config.get('wait_for_todo', True):
-                await self._wait_for_todo_list()
+                with trace.span('wait for TODO list', 'detect'):
+                    await self._wait_for_todo_list()
             
             # Main orchestration loop
             await self._orchestration_loop()
@@ -70,18 +102,124 @@ class BuildOrchestrator:
             
         except BuildInterrupted:
             logger.info("Build interrupted by user")
+            trace.instant('interrupted', 'build')
             self.session_manager.update_session_status(
                 session.id, SessionStatus.INTERRUPTED
             )
         except Exception as e:
             logger.error(f"Build failed: {e}")
+            trace.instant('failed', 'build', error=str(e))
             self.session_manager.update_session_status(
                 session.id, SessionStatus.FAILED, error=str(e)
             )
             raise
         finally:
             self.running = False
-            await self.claude.stop()
+            if watcher:
+                watcher.cancel()
+                try:
+                    await watcher
+                except asyncio.CancelledError:
+                    pass
+            try:
+                await self.claude.stop()
+                self.session_manager.index_session_output(session.id)
+            finally:
+                # Stop the monitor's thread and close the trace even if
+                # stopping Claude or indexing its output failed
+                self._end_step_span()
+                try:
+                    if monitor:
+                        await monitor.stop()
+                finally:
+                    if self.tracer:
+                        self.tracer.end('build', 'build')
+                        self.tracer.close()
+                    current_tracer.reset(tracer_token)
+                    current_session.reset(session_token)
+    
+    def _prompt_file_stamp(self) -> Optional[Tuple[int, int]]:
+        """Modification time and size of the prompt file, or None if unreadable"""
+        try:
+            stat = os.stat(self.current_prompt.path)
+        except (OSError, TypeError):
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    async def _watch_prompt_file(self):
+        """Poll the prompt file and reload pending steps whenever it changes"""
+        interval = self.config.get('prompt_reload_interval', 5)
+        while self.running:
+            await asyncio.sleep(interval)
+            try:
+                self._reload_prompt()
+            except Exception as e:
+                # Keep watching; the next poll retries the edit
+                logger.error(f"Reloading {self.current_prompt.path} failed: {e}")
+                self.prompt_stamp = None
+    
+    def _reload_prompt(self) -> bool:
+        """Swap in the prompt file's pending steps if the file changed
+        
+        Steps already sent, and the initial prompt, stay as they were. Edits
+        that fail to parse are logged and leave the running prompt alone.
+        Storage is updated before the in-memory prompt, and nothing here
+        awaits, so a step is never sent from a half-applied reload.
+        """
+        if not self.config.get('prompt_hot_reload', True) or not self.current_prompt.path:
+            return False
+        
+        stamp = self._prompt_file_stamp()
+        if stamp is None or stamp == self.prompt_stamp:
+            return False
+        self.prompt_stamp = stamp
+        
+        path = self.current_prompt.path
+        try:
+            edited = self.prompt_manager.load_prompt(path)
+        except Exception as e:
+            logger.warning(f"Ignoring edit to {path}: {e}")
+            self.session_manager.log_event(
+                self.current_session.id,
+                'prompt_reload_failed',
+                {'error': str(e)}
+            )
+            return False
+        
+        sent = self.current_step
+        pending = self.current_prompt.steps[sent:]
+        edited_pending = edited.steps[sent:]
+        if [(s.content, s.description) for s in pending] == \
+                [(s.content, s.description) for s in edited_pending]:
+            logger.debug(f"{path} changed but none of its pending steps did")
+            return False
+        
+        data = {
+            'from_step': sent + 1,
+            'changed_steps': [
+                number for number, (old, new) in enumerate(zip(pending, edited_pending), sent + 1)
+                if (old.content, old.description) != (new.content, new.description)
+            ],
+            'added_steps': max(len(edited_pending) - len(pending), 0),
+            'removed_steps': max(len(pending) - len(edited_pending), 0),
+            'total_steps': sent + len(edited_pending),
+            'ignored_sent_steps': [
+                number for number, (old, new)
+                in enumerate(zip(self.current_prompt.steps[:sent], edited.steps[:sent]), 1)
+                if (old.content, old.description) != (new.content, new.description)
+            ]
+        }
+        self.session_manager.replace_pending_steps(
+            self.current_session.id, sent + 1, edited_pending, data
+        )
+        self.current_prompt = dataclasses.replace(
+            self.current_prompt, steps=self.current_prompt.steps[:sent] + edited_pending
+        )
+        
+        logger.info(f"Reloaded {path}: steps {sent + 1}-{data['total_steps']} now pending")
+        if data['ignored_sent_steps']:
+            logger.warning(f"Edits to steps already sent were ignored: {data['ignored_sent_steps']}")
+        return True
     
     async def _send_initial_prompt(self):
         """Send the initial build prompt to Claude"""
@@ -125,36 +263,14 @@ class BuildOrchestrator:
             # Check Claude output - capture configured number of lines
             capture_lines = self.config.get('todo_capture_lines', 150)
             output = await self.claude.get_recent_output(lines=capture_lines)
-            output_lower = output.lower()
             
             # Debug logging
             if elapsed % 10 == 0:  # Log every 10 seconds
                 logger.debug(f"Checking for TODO list... (elapsed: {elapsed}s)")
                 logger.debug(f"Output length: {len(output)} chars")
             
-            # Look for TODO list indicators (case-insensitive)
-            has_todo = any(pattern in output_lower for pattern in todo_patterns)
-            
-            # Better idle detection - check if last non-empty line is the prompt
-            lines = output.strip().split('\n')
-            last_line = ''
-            for line in reversed(lines):
-                if line.strip():
-                    last_line = line.strip()
-                    break
-            
-            # Check if we're at a Claude prompt
-            is_at_prompt = (
-                last_line == '>' or 
-                last_line.endswith('>') or
-                (len(lines) > 1 and lines[-1].strip() == '' and lines[-2].strip() == '>')
-            )
-            
-            # Check if Claude is busy
-            is_busy = any(
-                indicator in output_lower 
-                for indicator in ['thinking', 'typing', 'processing', '...']
-            )
+            # TODO list indicators, Claude's prompt and busy indicators (case-insensitive)
+            is_at_prompt, is_busy, has_todo = classify_todo(output, todo_patterns)
             
             logger.debug(f"TODO found: {has_todo}, At prompt: {is_at_prompt}, Busy: {is_busy}")
             
@@ -169,6 +285,7 @@ class BuildOrchestrator:
                 
                 if still_at_prompt:
                     logger.info("TODO list detected and Claude is ready, sending --continue")
+                    trace.instant('initial continue', 'idle', wait_time=elapsed)
                     await self.claude.send_message("--continue")
                     
                     self.session_manager.log_event(
@@ -208,11 +325,14 @@ class BuildOrchestrator:
             
             # Check for idle state
             if self.config.auto_continue:
-                await self._check_and_handle_idle()
+                with trace.span('idle check', 'detect'):
+                    await self._check_and_handle_idle()
             
             # Check if it's time for next step
             if time_since_last_step > step_check_interval:
-                should_send = await self._should_send_next_step(time_since_last_step)
+                with trace.span('ready check', 'detect') as result:
+                    should_send = await self._should_send_next_step(time_since_last_step)
+                    result['ready'] = should_send
                 
                 if should_send:
                     success = await self._send_next_step()
@@ -239,6 +359,7 @@ class BuildOrchestrator:
         
         # Check if output has changed
         if output_hash != self.last_output_hash:
+            self._trace_idle_window(current_time)
             self.last_output_hash = output_hash
             self.last_output_time = current_time
             self.idle_count = 0
@@ -249,42 +370,8 @@ class BuildOrchestrator:
         
         # Check if we should intervene
         if idle_time > profile.idle_threshold:
-            # Better prompt detection
-            lines = output.strip().split('\n')
-            
-            # Find last non-empty line
-            last_line = ''
-            for line in reversed(lines):
-                if line.strip():
-                    last_line = line.strip()
-                    break
-            
-            # Check if we're at a Claude prompt
-            is_at_prompt = (
-                last_line == '>' or 
-                last_line == '> ' or
-                last_line.endswith('>') or
-                # Check if prompt is on its own line
-                (len(lines) > 1 and any(line.strip() in ['>', '> '] for line in lines[-3:]))
-            )
-            
-            # Check if Claude is busy (expanded indicators)
-            output_lower = output.lower()
-            is_busy = any(
-                indicator in output_lower 
-                for indicator in ['thinking', 'typing', 'processing', 'writing', 
-                                'creating', 'building', 'implementing', '...']
-            )
-            
-            # Don't intervene if waiting for next step (expanded phrases)
-            waiting_phrases = [
-                'ready.', 'done.', 'finished.', 'complete.', 'completed step',
-                'step complete', 'task complete', 'all set', 'waiting for',
-                'please provide', 'next step'
-            ]
-            is_waiting_for_step = any(
-                phrase in output_lower for phrase in waiting_phrases
-            )
+            # At the prompt and not busy, unless it is waiting for the next step
+            is_at_prompt, is_busy, is_waiting_for_step = classify_idle(output)
             
             # Debug logging
             if self.idle_count == 0:
@@ -296,6 +383,8 @@ class BuildOrchestrator:
                 # Only send continue after multiple idle detections
                 if self.idle_count >= 2:
                     logger.info(f"Claude idle for {idle_time:.1f}s (count: {self.idle_count}), sending --continue")
+                    self._trace_idle_window(current_time)
+                    trace.instant('nudge', 'idle', idle_time=round(idle_time, 1))
                     await self.claude.send_message("--continue")
                     
                     self.session_manager.log_event(
@@ -324,42 +413,9 @@ class BuildOrchestrator:
             logger.info("Maximum step interval reached")
             return True
         
-        # Check if Claude is ready
+        # Check if Claude is ready: at the prompt, reporting completion, not busy
         output = await self.claude.get_recent_output(lines=50)
-        output_lower = output.lower()
-        lines = output.strip().split('\n')
-        
-        # Check if at prompt (same logic as idle detection)
-        last_line = ''
-        for line in reversed(lines):
-            if line.strip():
-                last_line = line.strip()
-                break
-        
-        is_at_prompt = (
-            last_line == '>' or 
-            last_line == '> ' or
-            last_line.endswith('>') or
-            (len(lines) > 1 and any(line.strip() in ['>', '> '] for line in lines[-3:]))
-        )
-        
-        # Look for completion indicators (case-insensitive)
-        completion_phrases = [
-            'ready.', 'done.', 'finished.', 'complete.', 'completed',
-            'step complete', "i've completed", 'i have completed',
-            'successfully created', 'successfully implemented',
-            'task complete', 'all set', 'ready for the next'
-        ]
-        
-        has_completion = any(phrase in output_lower for phrase in completion_phrases)
-        
-        # Check if busy (expanded list)
-        is_busy = any(
-            word in output_lower for word in 
-            ['thinking', 'typing', 'processing', 'working', 'building',
-             'compiling', 'creating', 'implementing', 'writing', 'generating',
-             'analyzing', 'designing', 'developing']
-        )
+        is_at_prompt, is_busy, has_completion = classify_ready(output)
         
         if is_at_prompt and has_completion and not is_busy:
             logger.info("Claude appears ready for next step")
@@ -380,7 +436,18 @@ class BuildOrchestrator:
     
     async def _send_next_step(self) -> bool:
         """Send the next build step"""
+        # Pick up an edit the watcher has not seen yet, then wait only if
+        # there is another step to send
+        self._reload_prompt()
+        if self.current_step < len(self.current_prompt.steps):
+            # Optional delay before sending
+            await asyncio.sleep(5)
+            
+            # Nothing awaits between this reload and sending, so the step
+            # sent is the one in the file
+            self._reload_prompt()
         self.current_step += 1
+        self._end_step_span()
         
         if self.current_step > len(self.current_prompt.steps):
             return False  # All steps completed
@@ -388,8 +455,11 @@ class BuildOrchestrator:
         step = self.current_prompt.steps[self.current_step - 1]
         logger.info(f"Sending step {self.current_step}/{len(self.current_prompt.steps)}")
         
-        # Optional delay before sending
-        await asyncio.sleep(5)
+        # The step's span runs until the next step is sent or the build ends
+        if self.tracer:
+            self.traced_step = f"Step {self.current_step}"
+            self.tracer.begin(self.traced_step, 'step',
+                              description=(step.description or '')[:100])
         
         # Send step content
         await self.claude.send_message(step.content)
@@ -418,6 +488,20 @@ class BuildOrchestrator:
         
         return True
     
+    def _end_step_span(self):
+        """Close the open step span and write the trace buffer out"""
+        if self.tracer and self.traced_step:
+            self.tracer.end(self.traced_step, 'step')
+            self.traced_step = None
+            self.tracer.flush()
+    
+    def _trace_idle_window(self, now: float):
+        """Record the time since the last output as an idle window, if it was one"""
+        idle_time = now - self.last_output_time
+        if self.tracer and idle_time > self.config.profile.idle_threshold:
+            self.tracer.complete('idle', 'idle', self.last_output_time, now,
+                                 seconds=round(idle_time, 1))
+    
     def interrupt(self):
         """Interrupt the build session"""
         logger.info("Interrupting build session")
@@ -0,0 +1,164 @@
+"""
+Opt-in CPU and memory profiling of a Builder command
+
+``builder --profile-cpu`` runs the command under cProfile and
+``builder --profile-mem`` traces allocations with tracemalloc. Reports go
+to the directory of the build the command runs, or to
+``<sessions_dir>/profiles`` for commands without one. While the command
+runs, a background thread writes a memory snapshot every
+``profile_snapshot_interval`` seconds with the growth since the first
+one, so slow leaks in long builds show up before the build ends.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR_NAME = 'profiles'
+
+# Stack frames kept per allocation; more frames make tracing slower
+TRACEMALLOC_FRAMES = 5
+
+# Profiler of this process, if one was started
+_active: Optional['Profiler'] = None
+
+
+class Profiler:
+    """cProfile and tracemalloc around one command, writing reports on stop"""
+
+    def __init__(self, config, cpu: bool = False, memory: bool = False):
+        self.cpu = cpu
+        self.memory = memory
+        self.output_dir = config.sessions_dir / PROFILES_DIR_NAME
+        self.session_id: Optional[str] = None
+        self.snapshot_interval = config.get('profile_snapshot_interval', 300)
+        self.top = config.get('profile_top', 25)
+        self.stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+
+        self._profile = None
+        self._first_snapshot = None
+        self._snapshots = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        global _active
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            if self.snapshot_interval:
+                self._thread = threading.Thread(target=self._snapshot_loop,
+                                                name='builder-memory-snapshots', daemon=True)
+                self._thread.start()
+        if self.cpu:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        _active = self
+
+    def attach_session(self, session_id: str, session_dir: Path):
+        """Write reports to this build's session directory
+
+        Only the first build claims the reports, as a daemon may run several.
+        """
+        if self.session_id is None:
+            self.session_id = session_id
+            self.output_dir = Path(session_dir)
+            logger.info(f"Profiling reports will be written to {self.output_dir}")
+
+    def _path(self, name: str) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        return self.output_dir / f"profile-{self.stamp}-{name}"
+
+    def _snapshot_loop(self):
+        while not self._stopping.wait(self.snapshot_interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                logger.warning(f"Memory snapshot failed: {e}")
+
+    def snapshot(self) -> Path:
+        """Write the top allocations, and their growth since the first snapshot"""
+        import tracemalloc
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*'),
+            tracemalloc.Filter(False, '<unknown>'),
+            # Source lines read to format earlier reports
+            tracemalloc.Filter(False, '*/linecache.py'),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        with self._lock:
+            self._snapshots += 1
+            number = self._snapshots
+            first = self._first_snapshot
+            if first is None:
+                self._first_snapshot = snapshot
+
+        lines = [f"Memory snapshot {number} at {datetime.now().isoformat(timespec='seconds')}",
+                 f"Traced: {current / 2 ** 20:.1f} MB now, {peak / 2 ** 20:.1f} MB peak", '',
+                 f"Top {self.top} allocation sites:"]
+        lines += [f"  {stat}" for stat in snapshot.statistics('lineno')[:self.top]]
+        if first is not None:
+            growth = [stat for stat in snapshot.compare_to(first, 'lineno')
+                      if stat.size_diff > 0][:self.top]
+            lines += ['', "Largest growth since snapshot 1:"]
+            lines += [f"  {stat}" for stat in growth]
+            grown = [stat for stat in snapshot.compare_to(first, 'traceback')
+                     if stat.size_diff > 0]
+            if grown:
+                lines += ['', "Where the largest growth was allocated:"]
+                lines += [f"  {line}" for line in grown[0].traceback.format()]
+
+        path = self._path(f"memory-{number:03d}.txt")
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return path
+
+    def stop(self) -> List[Path]:
+        """Stop profiling and write the final reports; returns their paths"""
+        global _active
+        if _active is self:
+            _active = None
+        written = []
+        if self._profile is not None:
+            self._profile.disable()
+
+        # Before the CPU report, whose own allocations would show up in the snapshot
+        if self.memory:
+            import tracemalloc
+            self._stopping.set()
+            if self._thread:
+                self._thread.join()
+            written.append(self.snapshot())
+            tracemalloc.stop()
+            self.memory = False
+
+        if self._profile is not None:
+            import io
+            import pstats
+            prof_path = self._path('cpu.prof')
+            self._profile.dump_stats(prof_path)
+            report = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=report)
+            stats.sort_stats('cumulative').print_stats(self.top)
+            stats.sort_stats('tottime').print_stats(self.top)
+            text_path = self._path('cpu.txt')
+            text_path.write_text(report.getvalue(), encoding='utf-8')
+            written += [prof_path, text_path]
+            self._profile = None
+
+        return written
+
+
+def attach_session(session_id: str, session_dir: Path):
+    """Point the running profiler, if any, at a build's session directory"""
+    if _active is not None:
+        _active.attach_session(session_id, session_dir)
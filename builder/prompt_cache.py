@@ -0,0 +1,128 @@
+"""
+On-disk cache of parsed build prompts
+
+Entries are keyed by absolute path and remember the file's mtime and size
+and the parser version that produced them; a prompt is re-parsed when any
+of those change.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from .exceptions import PromptError
+
+
+logger = logging.getLogger(__name__)
+
+# Layout of the cache file itself
+CACHE_FORMAT = 1
+
+# Files modified this recently are not cached: a same-size rewrite within
+# the filesystem's timestamp granularity would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+
+# Failures that come from a file's contents, so recur until it changes;
+# anything else (a file briefly unreadable, say) is tried again next time
+PARSE_ERRORS = (PromptError, yaml.YAMLError)
+
+
+class PromptCache:
+    """Parsed prompts cached in a JSON file, validated against file stats"""
+
+    def __init__(self, path: Path, parser_version: int,
+                 encode: Callable[[Any], Dict[str, Any]],
+                 decode: Callable[[Dict[str, Any]], Any]):
+        self.path = Path(path)
+        self.parser_version = parser_version
+        self.encode = encode
+        self.decode = decode
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('format') == CACHE_FORMAT:
+                    self._entries = data.get('entries', {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                logger.debug(f"Ignoring unreadable prompt cache {self.path}: {e}")
+        return self._entries
+
+    def lookup(self, path: Path) -> Tuple[List[int], Optional[Dict[str, Any]]]:
+        """Return the file's current stamp and its entry, if still valid for it"""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        stamp = [stat.st_mtime_ns, stat.st_size, self.parser_version]
+        entry = self._load().get(key)
+        return stamp, (entry if entry and entry['stamp'] == stamp else None)
+
+    def store(self, path: Path, stamp: List[int], value: Any = None,
+              error: Optional[str] = None):
+        """Remember ``value``, or a parse ``error``, for the file as of ``stamp``"""
+        key = os.path.abspath(path)
+        if error is not None:
+            self._load()[key] = {'stamp': stamp, 'error': error}
+        elif time.time_ns() - stamp[0] > RACY_WINDOW_NS:
+            self._load()[key] = {'stamp': stamp, 'prompt': self.encode(value)}
+        else:
+            return
+        self._dirty = True
+
+    def get(self, path: Path, parse: Callable[[Path], Any]) -> Any:
+        """Return the parsed prompt at ``path``, parsing it only if it changed
+
+        Parse failures (PARSE_ERRORS) are cached as well and raised again as
+        PromptError until the file changes.
+        """
+        stamp, entry = self.lookup(path)
+        if entry:
+            if 'error' in entry:
+                raise PromptError(entry['error'])
+            return self.decode(entry['prompt'])
+
+        try:
+            prompt = parse(Path(path))
+        except PARSE_ERRORS as e:
+            self.store(path, stamp, error=str(e))
+            raise
+        self.store(path, stamp, prompt)
+        return prompt
+
+    def retain(self, directory: Path, paths: Iterable[Path]):
+        """Forget cached files in ``directory`` other than ``paths``"""
+        directory = os.path.abspath(directory)
+        keep = {os.path.abspath(path) for path in paths}
+        entries = self._load()
+        for key in [key for key in entries
+                    if os.path.dirname(key) == directory and key not in keep]:
+            del entries[key]
+            self._dirty = True
+
+    def save(self):
+        """Write the cache back if it changed, atomically"""
+        if not self._dirty:
+            return
+        tmp = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix='.prompt-cache-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'format': CACHE_FORMAT, 'entries': self._entries}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Could not write prompt cache {self.path}: {e}")
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
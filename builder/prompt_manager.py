@@ -2,19 +2,41 @@
 Prompt management with support for both text and YAML formats
 """
 
+import os
 import re
 import yaml
 import logging
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, asdict
 
 from .config import Config
 from .exceptions import PromptError
+from .prompt_cache import PromptCache
+from . import text_prompt
 
 
 logger = logging.getLogger(__name__)
 
+# Bump when parsing or validation changes so cached prompts are parsed again
+PARSER_VERSION = 3
+
+PROMPT_PATTERNS = ('*.txt', '*.yaml', '*.yml')
+
+# Target formats for bulk conversion and the extension each is written with
+CONVERT_FORMATS = {'yaml': '.yaml', 'text': '.txt'}
+
+# Most files handed to a worker process at once by bulk commands
+BULK_BATCH_SIZE = 32
+
+# libyaml's C loader is several times faster where it is installed
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Top-level YAML keys the listing index needs
+INDEX_KEYS = {'name', 'description', 'initial_prompt', 'steps'}
+
+YAML_NULLS = {'', '~', 'null', 'Null', 'NULL'}
+
 
 @dataclass
 class BuildStep:
@@ -25,6 +47,7 @@ class BuildStep:
     estimated_time: Optional[int] = None  # minutes
     dependencies: Optional[List[int]] = None
     tags: Optional[List[str]] = None
+    line: Optional[int] = None  # Where a text prompt defines the step
 
 
 @dataclass 
@@ -37,6 +60,7 @@ class BuildPrompt:
     steps: List[BuildStep]
     description: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    path: Optional[str] = None  # Absolute path of the file it was loaded from
     
     def estimated_time(self, config: Config) -> str:
         """Estimate total build time"""
@@ -52,41 +76,233 @@ class BuildPrompt:
             return f"{minutes}m"
 
 
+@dataclass
+class PromptSummary:
+    """The fields needed to list a prompt, read without parsing it fully"""
+    name: str
+    filename: str
+    format: str  # 'text' or 'yaml'
+    step_count: int
+    description: Optional[str] = None
+
+
+def _prompt_from_dict(data: Dict[str, Any]) -> BuildPrompt:
+    """Rebuild a prompt from its cached form"""
+    return BuildPrompt(**{
+        **data, 'steps': [BuildStep(**step) for step in data['steps']]
+    })
+
+
+def _validate_batch(config_data: Dict[str, Any], paths: List[str]) -> List[Dict[str, Any]]:
+    """Worker: validate prompt files, uncached since workers run in parallel"""
+    prompt_manager = PromptManager(Config({**config_data, 'prompt_cache': False}))
+    return [prompt_manager.validate_file(Path(path)) for path in paths]
+
+
+def _convert_batch(config_data: Dict[str, Any],
+                   pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Worker: convert (source, target) prompt files"""
+    prompt_manager = PromptManager(Config({**config_data, 'prompt_cache': False}))
+    results = []
+    for source, target in pairs:
+        try:
+            prompt_manager.convert_prompt(source, target)
+            results.append({'file': source, 'output': target, 'status': 'converted'})
+        except Exception as e:
+            results.append({'file': source, 'output': target, 'status': 'failed',
+                            'error': str(e)})
+    return results
+
+
+def _run_batches(worker: Callable[[Dict[str, Any], list], List[Dict[str, Any]]],
+                 config_data: Dict[str, Any], items: Sequence[Any],
+                 jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Run ``worker`` over ``items`` across ``jobs`` processes, yielding results as batches finish"""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(items) <= 1:
+        for item in items:
+            yield from worker(config_data, [item])
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    # Several batches per worker keep the pool busy while results stream back
+    size = max(1, min(BULK_BATCH_SIZE, len(items) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(worker, config_data, list(items[i:i + size]))
+                   for i in range(0, len(items), size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
 class PromptManager:
     """Manages build prompts in multiple formats"""
     
     def __init__(self, config: Config):
         self.config = config
         self.prompts_dir = config.prompts_dir
+        self.cache = None
+        self.index = None
+        if config.get('prompt_cache', True):
+            self.cache = PromptCache(config.sessions_dir / 'prompt-cache.json',
+                                     PARSER_VERSION, asdict, _prompt_from_dict)
+            self.index = PromptCache(config.sessions_dir / 'prompt-index.json',
+                                     PARSER_VERSION, asdict,
+                                     lambda data: PromptSummary(**data))
+    
+    def _prompt_paths(self, directory: Optional[Path] = None) -> List[Path]:
+        """Prompt files in ``directory``, by default the prompts directory"""
+        directory = Path(directory) if directory else self.prompts_dir
+        return [path for pattern in PROMPT_PATTERNS for path in directory.glob(pattern)]
     
     def list_prompts(self) -> List[BuildPrompt]:
-        """List all available prompts"""
+        """List all available prompts
+        
+        Parsed prompts are cached, so only files that changed since the
+        last listing are parsed again.
+        """
         prompts = []
+        paths = self._prompt_paths()
         
-        # Find text prompts
-        for txt_file in self.prompts_dir.glob("*.txt"):
+        for path in paths:
             try:
-                prompt = self._load_text_prompt(txt_file)
-                prompts.append(prompt)
+                prompts.append(self._parse(path))
             except Exception as e:
-                logger.warning(f"Failed to load {txt_file}: {e}")
+                logger.warning(f"Failed to load {path}: {e}")
         
-        # Find YAML prompts
-        for yaml_file in self.prompts_dir.glob("*.yaml"):
-            try:
-                prompt = self._load_yaml_prompt(yaml_file)
-                prompts.append(prompt)
-            except Exception as e:
-                logger.warning(f"Failed to load {yaml_file}: {e}")
+        if self.cache:
+            self.cache.retain(self.prompts_dir, paths)
+            self.cache.save()
         
-        for yml_file in self.prompts_dir.glob("*.yml"):
+        return sorted(prompts, key=lambda p: p.name)
+    
+    def list_prompt_summaries(self) -> List[PromptSummary]:
+        """List prompts from a persisted index of their listing fields
+        
+        Files are only scanned, not parsed, and only when they changed
+        since the index was written; full parsing waits until a prompt is
+        loaded.
+        """
+        summaries = []
+        paths = self._prompt_paths()
+        
+        for path in paths:
             try:
-                prompt = self._load_yaml_prompt(yml_file)
-                prompts.append(prompt)
+                if self.index is None:
+                    summaries.append(self._scan_summary(path))
+                else:
+                    summaries.append(self.index.get(path, self._scan_summary))
             except Exception as e:
-                logger.warning(f"Failed to load {yml_file}: {e}")
+                logger.warning(f"Failed to index {path}: {e}")
         
-        return sorted(prompts, key=lambda p: p.name)
+        if self.index:
+            self.index.retain(self.prompts_dir, paths)
+            self.index.save()
+        
+        return sorted(summaries, key=lambda s: s.name)
+    
+    def _scan_summary(self, path: Path) -> PromptSummary:
+        """Read a prompt's listing fields by extension"""
+        ext = path.suffix.lower()
+        if ext == '.txt':
+            return self._scan_text_summary(path)
+        elif ext in ['.yaml', '.yml']:
+            return self._scan_yaml_summary(path)
+        raise PromptError(f"Unsupported prompt format: {ext}")
+    
+    def _scan_yaml_summary(self, path: Path) -> PromptSummary:
+        """Read listing fields from the YAML event stream without building objects
+        
+        Scanning stops once every key the listing needs has been seen.
+        """
+        values: Dict[str, Optional[str]] = {}
+        seen = set()
+        step_count = None
+        is_mapping = False
+        depth = 0
+        key = None
+        expect_key = True
+        
+        with open(path, 'rb') as f:
+            for event in yaml.parse(f, Loader=YAML_LOADER):
+                if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                    if depth == 0:
+                        is_mapping = isinstance(event, yaml.MappingStartEvent)
+                        if not is_mapping:
+                            break
+                    elif depth == 1 and key == 'steps':
+                        if isinstance(event, yaml.SequenceStartEvent):
+                            step_count = 0
+                    elif depth == 2 and key == 'steps' and step_count is not None:
+                        step_count += 1
+                    depth += 1
+                elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                    depth -= 1
+                    if depth == 1:
+                        seen.add(key)
+                        expect_key = True
+                elif isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)):
+                    if depth == 1 and expect_key:
+                        key = getattr(event, 'value', None)
+                        expect_key = False
+                    elif depth == 1:
+                        value = getattr(event, 'value', None)
+                        if isinstance(event, yaml.ScalarEvent) and event.implicit[0] \
+                                and value in YAML_NULLS:
+                            value = None
+                        values[key] = value
+                        seen.add(key)
+                        expect_key = True
+                    elif depth == 2 and key == 'steps' and step_count is not None:
+                        step_count += 1
+                    elif depth == 0:
+                        break
+                if INDEX_KEYS <= seen:
+                    break
+        
+        if not is_mapping:
+            raise PromptError(f"Invalid YAML structure in {path}")
+        if 'name' not in seen:
+            raise PromptError(f"Missing 'name' field in {path}")
+        if 'initial_prompt' not in seen:
+            raise PromptError(f"Missing 'initial_prompt' field in {path}")
+        if step_count is None:
+            raise PromptError(f"Missing or invalid 'steps' field in {path}")
+        
+        return PromptSummary(
+            name=values.get('name'),
+            filename=path.name,
+            format='yaml',
+            step_count=step_count,
+            description=values.get('description')
+        )
+    
+    def _scan_text_summary(self, path: Path) -> PromptSummary:
+        """Read listing fields from a text prompt one line at a time"""
+        with open(path, 'r', encoding='utf-8') as f:
+            initial_prompt, steps = text_prompt.parse(f, str(path))
+        
+        return PromptSummary(
+            name=self._extract_project_name(initial_prompt, path.stem),
+            filename=path.name,
+            format='text',
+            step_count=len(steps),
+            description=None
+        )
+    
+    def _parse(self, path: Path) -> BuildPrompt:
+        """Parse a prompt file by extension, through the cache if enabled"""
+        ext = path.suffix.lower()
+        if ext == '.txt':
+            loader = self._load_text_prompt
+        elif ext in ['.yaml', '.yml']:
+            loader = self._load_yaml_prompt
+        else:
+            raise PromptError(f"Unsupported prompt format: {ext}")
+        
+        if self.cache is None:
+            return loader(path)
+        return self.cache.get(path, loader)
     
     def load_prompt(self, filename: str) -> BuildPrompt:
         """Load a specific prompt file"""
@@ -102,50 +318,30 @@ class PromptManager:
             if not prompt_path.exists():
                 raise PromptError(f"Prompt file not found: {filename}")
         
-        # Determine format by extension
-        ext = prompt_path.suffix.lower()
-        if ext == '.txt':
-            return self._load_text_prompt(prompt_path)
-        elif ext in ['.yaml', '.yml']:
-            return self._load_yaml_prompt(prompt_path)
-        else:
-            raise PromptError(f"Unsupported prompt format: {ext}")
+        try:
+            return self._parse(prompt_path)
+        finally:
+            if self.cache:
+                self.cache.save()
     
     def _load_text_prompt(self, path: Path) -> BuildPrompt:
         """Load a text format prompt (original format)"""
-        content = path.read_text(encoding='utf-8')
-        
-        # Extract Raivyn [build] section
-        build_match = re.search(r'# Raivyn \[build\](.*?)(?=\n#|$)', content, re.DOTALL)
-        if not build_match:
-            raise PromptError(f"No '# Raivyn [build]' section found in {path}")
-        
-        initial_prompt = build_match.group(1).strip()
+        with open(path, 'r', encoding='utf-8') as f:
+            initial_prompt, tokens = text_prompt.parse(f, str(path))
         
-        # Extract numbered steps
         steps = []
-        step_pattern = r'^(\d+)\.\s+(.+?)(?=^\d+\.|$)'
-        matches = re.findall(step_pattern, content, re.MULTILINE | re.DOTALL)
-        
-        for step_num, step_content in matches:
-            # Clean up step content
-            step_content = step_content.strip()
-            
-            # Extract first line as description
-            lines = step_content.split('\n')
-            description = lines[0] if lines else ""
+        for token in tokens:
+            description = token.value
             if len(description) > 100:
                 description = description[:97] + "..."
             
             steps.append(BuildStep(
-                number=int(step_num),
-                content=step_content,
-                description=description
+                number=token.number,
+                content=token.value,
+                description=description,
+                line=token.line
             ))
         
-        if not steps:
-            raise PromptError(f"No numbered steps found in {path}")
-        
         # Extract project name from prompt
         name = self._extract_project_name(initial_prompt, path.stem)
         
@@ -156,13 +352,14 @@ class PromptManager:
             initial_prompt=initial_prompt,
             steps=steps,
             description=None,
-            metadata={}
+            metadata={},
+            path=os.path.abspath(path)
         )
     
     def _load_yaml_prompt(self, path: Path) -> BuildPrompt:
         """Load a YAML format prompt"""
         with open(path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YAML_LOADER)
         
         if not isinstance(data, dict):
             raise PromptError(f"Invalid YAML structure in {path}")
@@ -208,7 +405,8 @@ class PromptManager:
             initial_prompt=data['initial_prompt'],
             steps=steps,
             description=data.get('description'),
-            metadata=data.get('metadata', {})
+            metadata=data.get('metadata', {}),
+            path=os.path.abspath(path)
         )
     
     def _extract_project_name(self, initial_prompt: str, filename: str) -> str:
@@ -232,21 +430,21 @@ class PromptManager:
         return name.title()
     
     def select_prompt(self) -> BuildPrompt:
-        """Interactive prompt selection"""
-        prompts = self.list_prompts()
+        """Interactive prompt selection; only the chosen prompt is fully parsed"""
+        prompts = self.list_prompt_summaries()
         
         if not prompts:
             raise PromptError("No prompt files found")
         
         if len(prompts) == 1:
             logger.info(f"Using single available prompt: {prompts[0].name}")
-            return prompts[0]
+            return self.load_prompt(prompts[0].filename)
         
         # Display options
         print("\nAvailable prompts:")
         for i, prompt in enumerate(prompts, 1):
             desc = f" - {prompt.description}" if prompt.description else ""
-            print(f"{i}. {prompt.name} ({len(prompt.steps)} steps){desc}")
+            print(f"{i}. {prompt.name} ({prompt.step_count} steps){desc}")
         
         # Get selection
         while True:
@@ -254,7 +452,7 @@ class PromptManager:
                 choice = input("\nSelect prompt (number): ")
                 idx = int(choice) - 1
                 if 0 <= idx < len(prompts):
-                    return prompts[idx]
+                    return self.load_prompt(prompts[idx].filename)
                 else:
                     print("Invalid selection. Please try again.")
             except (ValueError, KeyboardInterrupt):
@@ -276,16 +474,23 @@ class PromptManager:
         expected = 1
         for step in prompt.steps:
             if step.number != expected:
-                warnings.append(f"Step numbering gap: expected {expected}, got {step.number}")
+                warnings.append(f"Step numbering gap: expected {expected}, "
+                                f"got {step.number}{self._step_position(prompt, step)}")
             expected = step.number + 1
         
         # Check for very long steps
         for step in prompt.steps:
             if len(step.content) > 5000:
-                warnings.append(f"Step {step.number} is very long ({len(step.content)} chars)")
+                warnings.append(f"Step {step.number} is very long "
+                                f"({len(step.content)} chars){self._step_position(prompt, step)}")
         
         return warnings
     
+    @staticmethod
+    def _step_position(prompt: BuildPrompt, step: BuildStep) -> str:
+        """Where a step is defined, for warnings about it"""
+        return f" at {prompt.filename}:{step.line}" if step.line else ""
+    
     def convert_prompt(self, input_file: str, output_file: str):
         """Convert prompt between formats"""
         input_path = Path(input_file)
@@ -304,6 +509,92 @@ class PromptManager:
         else:
             raise PromptError(f"Unsupported output format: {output_ext}")
     
+    def validate_file(self, path: Path) -> Dict[str, Any]:
+        """Load and validate one prompt file, as an entry for a bulk report"""
+        try:
+            prompt = self._parse(path)
+        except Exception as e:
+            return {'file': str(path), 'status': 'invalid', 'error': str(e)}
+        
+        return {
+            'file': str(path),
+            'status': 'valid',
+            'name': prompt.name,
+            'format': prompt.format,
+            'steps': len(prompt.steps),
+            'warnings': self.validate_prompt(prompt)
+        }
+    
+    def validate_all(self, directory: Optional[Path] = None,
+                     jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Validate every prompt in ``directory`` across a process pool
+        
+        Results are yielded as files finish. Files unchanged since their last
+        validation are reported from a cache, with ``cached`` set, instead of
+        being parsed again.
+        """
+        directory = Path(directory) if directory else self.prompts_dir
+        paths = sorted(self._prompt_paths(directory))
+        
+        known = None
+        if self.cache:
+            known = PromptCache(self.config.sessions_dir / 'prompt-validation.json',
+                                PARSER_VERSION, dict, dict)
+        
+        stamps = {}
+        pending = []
+        for path in paths:
+            if known:
+                stamp, entry = known.lookup(path)
+                if entry:
+                    yield {**entry['prompt'], 'file': str(path), 'cached': True}
+                    continue
+                stamps[str(path)] = stamp
+            pending.append(str(path))
+        
+        try:
+            for result in _run_batches(_validate_batch, self.config.to_dict(), pending, jobs):
+                if known:
+                    known.store(result['file'], stamps[result['file']], result)
+                yield {**result, 'cached': False}
+        finally:
+            if known:
+                known.retain(directory, paths)
+                known.save()
+    
+    def convert_all(self, source_dir: Path, target_dir: Path, to: str,
+                    jobs: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Convert every prompt in ``source_dir`` into ``target_dir`` across a process pool
+        
+        Results are yielded as files finish. Files whose output is newer than
+        the source are skipped, and a file whose output name another file
+        already claimed fails rather than overwriting it.
+        """
+        if to not in CONVERT_FORMATS:
+            raise PromptError(f"Unsupported output format: {to}")
+        
+        target_dir = Path(target_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        
+        claimed: Dict[Path, Path] = {}
+        pending = []
+        for path in sorted(self._prompt_paths(source_dir)):
+            target = target_dir / (path.stem + CONVERT_FORMATS[to])
+            result = {'file': str(path), 'output': str(target)}
+            
+            if target in claimed:
+                yield {**result, 'status': 'failed',
+                       'error': f"{claimed[target].name} is also converted to {target.name}"}
+                continue
+            claimed[target] = path
+            
+            if target.exists() and target.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+                yield {**result, 'status': 'skipped'}
+                continue
+            pending.append((str(path), str(target)))
+        
+        yield from _run_batches(_convert_batch, self.config.to_dict(), pending, jobs)
+    
     def _save_text_prompt(self, prompt: BuildPrompt, path: Path):
         """Save prompt in text format"""
         content = f"# Raivyn [build]\n{prompt.initial_prompt}\n\n# Build Steps\n"
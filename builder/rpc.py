@@ -0,0 +1,109 @@
+"""
+JSON-RPC protocol between the Builder daemon and its clients
+
+Requests and responses are JSON-RPC 2.0 objects, one per line, over the
+daemon's Unix-domain socket. The client is synchronous and only needs the
+standard library, so CLI commands that talk to the daemon stay cheap to
+start.
+"""
+
+import json
+import socket
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from . import exceptions
+from .exceptions import DaemonError
+
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# Builder errors raised by a method; data.type names the exception class
+APPLICATION_ERROR = -32000
+
+
+def response(request_id: Any, result: Any) -> Dict[str, Any]:
+    return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+
+def error_response(request_id: Any, code: int, message: str,
+                   data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    error = {'code': code, 'message': message}
+    if data is not None:
+        error['data'] = data
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': error}
+
+
+def _raise_error(error: Dict[str, Any]):
+    """Raise a daemon error as the Builder exception it started as, if any"""
+    message = error.get('message', 'Unknown daemon error')
+    name = (error.get('data') or {}).get('type')
+    cls = getattr(exceptions, name, None) if name else None
+    if isinstance(cls, type) and issubclass(cls, exceptions.BuilderError):
+        raise cls(message)
+    raise DaemonError(f"{message} (code {error.get('code')})")
+
+
+class DaemonClient:
+    """Synchronous connection to a running daemon"""
+
+    def __init__(self, path: Path, timeout: Optional[float] = 30.0):
+        self.path = Path(path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(str(self.path))
+        except OSError as e:
+            self._sock.close()
+            raise DaemonError(f"Cannot connect to daemon at {self.path}: {e}") from e
+        self._reader = self._sock.makefile('rb')
+        self._next_id = 1
+
+    @classmethod
+    def connect(cls, config) -> Optional['DaemonClient']:
+        """Connect to the configured daemon, or return None if it is not running"""
+        if not config.get('use_daemon', True):
+            return None
+        path = config.daemon_socket
+        if not path.exists():
+            return None
+        try:
+            return cls(path)
+        except DaemonError:
+            return None  # Stale socket left by a daemon that died
+
+    def call(self, method: str, **params) -> Any:
+        """Call a daemon method and return its result
+
+        Builder errors raised by the method are raised again here with
+        their original type; anything else is a DaemonError.
+        """
+        request_id = self._next_id
+        self._next_id += 1
+        request = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+        try:
+            self._sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            line = self._reader.readline()
+        except OSError as e:
+            raise DaemonError(f"Lost connection to daemon: {e}") from e
+        if not line:
+            raise DaemonError("Daemon closed the connection")
+
+        reply = json.loads(line)
+        if 'error' in reply:
+            _raise_error(reply['error'])
+        return reply.get('result')
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,156 +1,76 @@
 """
-Session management with SQLite backend
+Session management on top of a pluggable storage backend
 """
 
 import sqlite3
 import json
+import io
 import logging
+import re
+import sys
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass, asdict
-from enum import Enum
+from itertools import islice
+from typing import List, Optional, Dict, Any, Iterable, Iterator, TextIO, Tuple
 import uuid
 
 from .config import Config
 from .exceptions import SessionError
+from .models import (SessionStatus, StepStatus, Session, BuildStep, SearchResult,
+                     SessionEvent, SessionDetail)
+from .storage import create_backend
+from .storage.base import to_ms
+from .trace import traced
+from .utils import format_size
 
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_FORMATS = ('markdown', 'json', 'jsonl', 'html')
 
-class SessionStatus(Enum):
-    ACTIVE = "active"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    INTERRUPTED = "interrupted"
-    PAUSED = "paused"
+# Sessions read per storage call when iterating over many sessions
+SESSION_PAGE_SIZE = 500
 
+# Lines of captured output per full-text search chunk
+OUTPUT_CHUNK_LINES = 50
 
-class StepStatus(Enum):
-    PENDING = "pending"
-    IN_PROGRESS = "in_progress"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    SKIPPED = "skipped"
+# Sessions that have not ended yet, and those of them a build can resume
+UNFINISHED_STATUSES = (SessionStatus.ACTIVE, SessionStatus.PAUSED)
+RESUMABLE_STATUSES = (SessionStatus.PAUSED, SessionStatus.INTERRUPTED)
 
+# Event retention modes that remove archived events from live storage
+PRUNING = ('delete', 'downsample')
 
-@dataclass
-class Session:
-    """Build session data model"""
-    id: str
-    prompt_file: str
-    project_name: str
-    status: SessionStatus
-    started_at: datetime
-    ended_at: Optional[datetime]
-    current_step: int
-    total_steps: int
-    error: Optional[str]
-    metadata: Dict[str, Any]
-    
-    @property
-    def duration(self) -> Optional[timedelta]:
-        if self.ended_at:
-            return self.ended_at - self.started_at
-        elif self.status == SessionStatus.ACTIVE:
-            return datetime.now() - self.started_at
-        return None
-    
-    @property
-    def progress_percentage(self) -> int:
-        if self.total_steps == 0:
-            return 0
-        return int((self.current_step / self.total_steps) * 100)
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x07]*\x07')
 
 
-@dataclass
-class BuildStep:
-    """Build step data model"""
-    session_id: str
-    step_number: int
-    description: str
-    content: str
-    status: StepStatus
-    started_at: Optional[datetime]
-    completed_at: Optional[datetime]
-    error: Optional[str]
-    
-    @property
-    def duration(self) -> Optional[timedelta]:
-        if self.started_at and self.completed_at:
-            return self.completed_at - self.started_at
-        return None
-
-
-@dataclass
-class SessionEvent:
-    """Session event for audit trail"""
-    session_id: str
-    timestamp: datetime
-    event_type: str
-    data: Dict[str, Any]
+def _minutes(ms: Optional[float]) -> str:
+    """Format a millisecond duration in minutes for statistics tables"""
+    if ms is None:
+        return '-'
+    return f"{ms / 60000:.1f} min"
 
 
 class SessionManager:
-    """Manages build sessions with SQLite backend"""
+    """Manages build sessions in the configured storage backend"""
     
     def __init__(self, config: Config):
         self.config = config
-        self.db_path = config.database_path
-        self._init_database()
+        self._storage = None
     
-    def _init_database(self):
-        """Initialize SQLite database"""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id TEXT PRIMARY KEY,
-                    prompt_file TEXT NOT NULL,
-                    project_name TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    started_at TIMESTAMP NOT NULL,
-                    ended_at TIMESTAMP,
-                    current_step INTEGER DEFAULT 0,
-                    total_steps INTEGER NOT NULL,
-                    error TEXT,
-                    metadata TEXT
-                )
-            ''')
-            
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS build_steps (
-                    session_id TEXT NOT NULL,
-                    step_number INTEGER NOT NULL,
-                    description TEXT,
-                    content TEXT,
-                    status TEXT NOT NULL,
-                    started_at TIMESTAMP,
-                    completed_at TIMESTAMP,
-                    error TEXT,
-                    PRIMARY KEY (session_id, step_number),
-                    FOREIGN KEY (session_id) REFERENCES sessions(id)
-                )
-            ''')
-            
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS session_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT NOT NULL,
-                    timestamp TIMESTAMP NOT NULL,
-                    event_type TEXT NOT NULL,
-                    data TEXT,
-                    FOREIGN KEY (session_id) REFERENCES sessions(id)
-                )
-            ''')
-            
-            # Create indices
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions(status)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_events_session ON session_events(session_id)')
-            
-            conn.commit()
+    @property
+    def storage(self):
+        """The storage backend, opened on first use so display-only callers skip it"""
+        if self._storage is None:
+            self._storage = create_backend(self.config)
+        return self._storage
+    
+    def close(self):
+        """Release the storage backend"""
+        if self._storage is not None:
+            self._storage.close()
     
     def create_session(self, prompt) -> Session:
         """Create a new build session"""
@@ -170,227 +90,279 @@ class SessionManager:
                 'profile': self.config.profile.name
             }
         )
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                INSERT INTO sessions 
-                (id, prompt_file, project_name, status, started_at, ended_at, 
-                 current_step, total_steps, error, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                session.id, session.prompt_file, session.project_name,
-                session.status.value, session.started_at, session.ended_at,
-                session.current_step, session.total_steps, session.error,
-                json.dumps(session.metadata)
-            ))
-            
-            # Insert build steps
-            for i, step in enumerate(prompt.steps, 1):
-                conn.execute('''
-                    INSERT INTO build_steps
-                    (session_id, step_number, description, content, status)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    session_id, i, step.description, step.content,
-                    StepStatus.PENDING.value
-                ))
-            
-            conn.commit()
-        
-        # Log session creation
-        self.log_event(session_id, 'session_created', {
-            'project': prompt.name,
-            'total_steps': len(prompt.steps)
-        })
-        
+    
+        steps = self._pending_steps(session_id, prompt.steps)
+    
+        # Log session creation together with the session
+        self.storage.create_session(session, steps, SessionEvent(
+            session_id=session_id,
+            timestamp=session.started_at,
+            event_type='session_created',
+            data={
+                'project': prompt.name,
+                'total_steps': len(prompt.steps)
+            }
+        ), initial_prompt=prompt.initial_prompt)
+    
         logger.info(f"Created session {session_id} for {prompt.name}")
         return session
     
-    def get_session(self, session_id: str) -> Optional[Session]:
-        """Get session by ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                'SELECT * FROM sessions WHERE id = ?', (session_id,)
+    @staticmethod
+    def _pending_steps(session_id: str, prompt_steps, first: int = 1) -> List[BuildStep]:
+        """Stored steps for prompt steps, numbered from ``first``"""
+        return [
+            BuildStep(
+                session_id=session_id,
+                step_number=i,
+                description=step.description,
+                content=step.content,
+                status=StepStatus.PENDING,
+                started_at=None,
+                completed_at=None,
+                error=None
+            )
+            for i, step in enumerate(prompt_steps, first)
+        ]
+    
+    @traced('db')
+    def replace_pending_steps(self, session_id: str, from_step: int, prompt_steps,
+                              data: Dict[str, Any]):
+        """Swap in edited prompt steps from ``from_step`` on, with a prompt_reloaded event"""
+        self.storage.replace_steps(
+            session_id, from_step, self._pending_steps(session_id, prompt_steps, from_step),
+            SessionEvent(
+                session_id=session_id,
+                timestamp=datetime.now(),
+                event_type='prompt_reloaded',
+                data=data
             )
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-            
-            return self._session_from_row(row)
-    
-    def _session_from_row(self, row: sqlite3.Row) -> Session:
-        """Convert database row to Session object"""
-        return Session(
-            id=row['id'],
-            prompt_file=row['prompt_file'],
-            project_name=row['project_name'],
-            status=SessionStatus(row['status']),
-            started_at=datetime.fromisoformat(row['started_at']),
-            ended_at=datetime.fromisoformat(row['ended_at']) if row['ended_at'] else None,
-            current_step=row['current_step'],
-            total_steps=row['total_steps'],
-            error=row['error'],
-            metadata=json.loads(row['metadata']) if row['metadata'] else {}
         )
     
+    def get_session(self, session_id: str) -> Optional[Session]:
+        """Get session by ID"""
+        return self.storage.get_session(session_id)
+    
+    def get_session_detail(self, session_id: str) -> Optional[SessionDetail]:
+        """Get a session with its steps and event counts in one read"""
+        return self.storage.load_sessions([session_id]).get(session_id)
+    
+    def get_session_details(self, session_ids: List[str]) -> List[SessionDetail]:
+        """Get sessions with their steps and event counts, in the given order
+    
+        Storage is read with set-based queries, so the number of round
+        trips does not grow with the number of sessions.
+        """
+        details = self.storage.load_sessions(session_ids)
+        return [details[session_id] for session_id in session_ids if session_id in details]
+    
+    def iter_session_details(self, session_ids: Iterable[str],
+                             chunk_size: int = SESSION_PAGE_SIZE) -> Iterator[SessionDetail]:
+        """Iterate over session details, loading ``chunk_size`` sessions at a time"""
+        session_ids = iter(session_ids)
+        while True:
+            chunk = list(islice(session_ids, chunk_size))
+            if not chunk:
+                return
+            yield from self.get_session_details(chunk)
+    
+    def get_initial_prompt(self, session_id: str) -> Optional[str]:
+        """Get the initial prompt a session was started with"""
+        return self.storage.get_initial_prompt(session_id)
+    
     def get_active_sessions(self) -> List[Session]:
         """Get all active sessions"""
-        return self._get_sessions_by_status(SessionStatus.ACTIVE)
+        return list(self.iter_sessions(SessionStatus.ACTIVE))
+    
+    def iter_sessions(self, status: Optional[SessionStatus] = None,
+                      page_size: int = SESSION_PAGE_SIZE) -> Iterator[Session]:
+        """Iterate over sessions newest first, reading them in keyset pages"""
+        before = None
+        while True:
+            page = self.storage.list_sessions(status=status, before=before, limit=page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            before = (to_ms(page[-1].started_at), page[-1].id)
     
     def get_all_sessions(self, limit: int = 100) -> List[Session]:
         """Get all sessions with limit"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                'SELECT * FROM sessions ORDER BY started_at DESC LIMIT ?',
-                (limit,)
-            )
-            return [self._session_from_row(row) for row in cursor]
-    
-    def _get_sessions_by_status(self, status: SessionStatus) -> List[Session]:
-        """Get sessions by status"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                'SELECT * FROM sessions WHERE status = ? ORDER BY started_at DESC',
-                (status.value,)
-            )
-            return [self._session_from_row(row) for row in cursor]
+        return self.get_sessions_page(limit=limit)[0]
+    
+    def get_sessions_page(self, after: Optional[str] = None,
+                          limit: int = 100) -> Tuple[List[Session], Optional[str]]:
+        """Get one page of sessions, newest first
+    
+        ``after`` is the cursor returned with the previous page. Paging is
+        keyset-based on (started_at, id), so deep pages cost the same as
+        the first. Returns the sessions and the cursor for the next page,
+        or None when there are no more sessions.
+        """
+        before = None
+        if after:
+            try:
+                started_at, session_id = after.split(':', 1)
+                before = (int(started_at), session_id)
+            except ValueError:
+                raise SessionError(f"Invalid session cursor: {after}")
+    
+        sessions = self.storage.list_sessions(before=before, limit=limit + 1)
+    
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            next_cursor = f"{to_ms(sessions[-1].started_at)}:{sessions[-1].id}"
+    
+        return sessions, next_cursor
     
+    @traced('db')
     def update_session_status(self, session_id: str, status: SessionStatus, 
                             error: Optional[str] = None):
         """Update session status"""
-        ended_at = datetime.now() if status != SessionStatus.ACTIVE else None
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                UPDATE sessions 
-                SET status = ?, ended_at = ?, error = ?
-                WHERE id = ?
-            ''', (status.value, ended_at, error, session_id))
-            conn.commit()
-        
-        self.log_event(session_id, 'status_changed', {
-            'new_status': status.value,
+        now = datetime.now()
+        self.storage.update_session(session_id, {
+            'status': status,
+            'ended_at': now if status != SessionStatus.ACTIVE else None,
             'error': error
-        })
+        }, SessionEvent(
+            session_id=session_id,
+            timestamp=now,
+            event_type='status_changed',
+            data={
+                'new_status': status.value,
+                'error': error
+            }
+        ))
     
+    @traced('db')
     def update_step_progress(self, session_id: str, step_number: int, status: str):
         """Update build step progress"""
         step_status = StepStatus(status)
         now = datetime.now()
-        
-        with sqlite3.connect(self.db_path) as conn:
-            if step_status == StepStatus.IN_PROGRESS:
-                conn.execute('''
-                    UPDATE build_steps 
-                    SET status = ?, started_at = ?
-                    WHERE session_id = ? AND step_number = ?
-                ''', (step_status.value, now, session_id, step_number))
-            elif step_status in [StepStatus.COMPLETED, StepStatus.FAILED]:
-                conn.execute('''
-                    UPDATE build_steps 
-                    SET status = ?, completed_at = ?
-                    WHERE session_id = ? AND step_number = ?
-                ''', (step_status.value, now, session_id, step_number))
-            
-            # Update session current step
-            if step_status == StepStatus.IN_PROGRESS:
-                conn.execute('''
-                    UPDATE sessions 
-                    SET current_step = ?
-                    WHERE id = ?
-                ''', (step_number, session_id))
-            
-            conn.commit()
-        
-        self.log_event(session_id, 'step_progress', {
-            'step_number': step_number,
-            'status': status
-        })
     
+        changes: Dict[str, Any] = {}
+        session_changes: Dict[str, Any] = {}
+        if step_status == StepStatus.IN_PROGRESS:
+            changes = {'status': step_status, 'started_at': now}
+            session_changes = {'current_step': step_number}
+        elif step_status in [StepStatus.COMPLETED, StepStatus.FAILED]:
+            changes = {'status': step_status, 'completed_at': now}
+    
+        self.storage.update_step(session_id, step_number, changes, session_changes, SessionEvent(
+            session_id=session_id,
+            timestamp=now,
+            event_type='step_progress',
+            data={
+                'step_number': step_number,
+                'status': status
+            }
+        ))
+    
+    @traced('db')
     def log_event(self, session_id: str, event_type: str, data: Dict[str, Any]):
         """Log a session event"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                INSERT INTO session_events (session_id, timestamp, event_type, data)
-                VALUES (?, ?, ?, ?)
-            ''', (session_id, datetime.now(), event_type, json.dumps(data)))
-            conn.commit()
+        self.storage.append_event(SessionEvent(
+            session_id=session_id,
+            timestamp=datetime.now(),
+            event_type=event_type,
+            data=data
+        ))
+    
+    def iter_session_events(self, session_id: str) -> Iterator[SessionEvent]:
+        """Iterate over a session's events as they are read from storage"""
+        return self.storage.iter_events(session_id)
     
     def get_session_events(self, session_id: str) -> List[SessionEvent]:
         """Get all events for a session"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT * FROM session_events 
-                WHERE session_id = ? 
-                ORDER BY timestamp
-            ''', (session_id,))
-            
-            events = []
-            for row in cursor:
-                events.append(SessionEvent(
-                    session_id=row['session_id'],
-                    timestamp=datetime.fromisoformat(row['timestamp']),
-                    event_type=row['event_type'],
-                    data=json.loads(row['data']) if row['data'] else {}
-                ))
-            
-            return events
+        return list(self.iter_session_events(session_id))
+    
+    def get_events_page(self, session_id: str, after: Optional[int] = None,
+                        limit: int = 100) -> Tuple[List[SessionEvent], Optional[int]]:
+        """Get one page of a session's events in the order they were logged
+    
+        ``after`` is the event id cursor returned with the previous page.
+        Returns the events and the next cursor, or None on the last page.
+        """
+        events = list(self.storage.iter_events(session_id, after or 0, limit + 1))
+    
+        if len(events) > limit:
+            events = events[:limit]
+            return events, events[-1].id
+        return events, None
+    
+    def iter_session_steps(self, session_id: str) -> Iterator[BuildStep]:
+        """Iterate over a session's steps as they are read from storage"""
+        return self.storage.iter_steps(session_id)
     
     def get_session_steps(self, session_id: str) -> List[BuildStep]:
         """Get all steps for a session"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT * FROM build_steps 
-                WHERE session_id = ? 
-                ORDER BY step_number
-            ''', (session_id,))
-            
-            steps = []
-            for row in cursor:
-                steps.append(BuildStep(
-                    session_id=row['session_id'],
-                    step_number=row['step_number'],
-                    description=row['description'],
-                    content=row['content'],
-                    status=StepStatus(row['status']),
-                    started_at=datetime.fromisoformat(row['started_at']) if row['started_at'] else None,
-                    completed_at=datetime.fromisoformat(row['completed_at']) if row['completed_at'] else None,
-                    error=row['error']
-                ))
-            
-            return steps
+        return list(self.iter_session_steps(session_id))
     
     def archive_session(self, session_id: str, status: str = 'completed'):
         """Archive a session"""
-        session_status = SessionStatus(status.upper())
-        self.update_session_status(session_id, session_status)
+        session_status = SessionStatus(status.lower())
+        session = self.get_session(session_id)
         
+        # A session that has already ended keeps its status, and the error
+        # and end time the orchestrator recorded with it
+        if not session or session.status in UNFINISHED_STATUSES:
+            self.update_session_status(session_id, session_status)
+    
         # Create archive directory if needed
         if self.config.get('archive_completed', True):
             archive_dir = self.config.sessions_dir / 'archive' / session_id
             archive_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Export session data
+    
+            # Export session data as compressed JSON Lines
             session = self.get_session(session_id)
             if session:
-                export_data = {
-                    'session': asdict(session),
-                    'steps': [asdict(step) for step in self.get_session_steps(session_id)],
-                    'events': [asdict(event) for event in self.get_session_events(session_id)]
-                }
+                from . import exporters
+                from .archive import archive_path, open_archive
                 
-                export_file = archive_dir / 'session_data.json'
-                with open(export_file, 'w') as f:
-                    json.dump(export_data, f, indent=2, default=str)
-        
+                export_file = archive_path(archive_dir, self.config.get('compression', 'gzip'))
+                pruned = session.metadata.get('archive', {}).get('event_retention') in PRUNING
+                if pruned and export_file.exists():
+                    # Live storage no longer has the full history; keep the archive that does
+                    logger.info(f"Session {session_id} was already archived to {export_file}")
+                else:
+                    with open_archive(export_file, 'w') as f:
+                        exporters.write_jsonl_export(
+                            f, session,
+                            self.iter_session_steps(session_id),
+                            self.iter_session_events(session_id)
+                        )
+    
+                # A session that can be resumed keeps its events until it ends
+                if session.status not in RESUMABLE_STATUSES:
+                    self._apply_event_retention(session, export_file)
+    
         logger.info(f"Archived session {session_id} with status {status}")
     
+    def _apply_event_retention(self, session: Session, archive_file: Path):
+        """Prune an archived session's events from live storage"""
+        retention = self.config.get('archive_event_retention', 'downsample')
+        if retention == 'keep':
+            return
+    
+        if retention not in PRUNING:
+            logger.warning(f"Unknown archive_event_retention '{retention}', keeping events")
+            return
+    
+        every = max(int(self.config.get('archive_downsample_every', 10)), 1)
+    
+        # Remember where the full event history lives before pruning it, so
+        # an interrupted prune never leaves summaries without their events
+        metadata = dict(session.metadata)
+        metadata['archive'] = {
+            'path': str(archive_file.resolve()),
+            'event_retention': retention
+        }
+        self.storage.update_session(session.id, {'metadata': metadata})
+    
+        pruned = self.storage.prune_events(session.id, retention, every)
+        self.storage.reclaim_space()
+    
+        logger.info(f"Pruned {pruned} archived events for session {session.id}")
+    
     def kill_session(self, session_id: str) -> bool:
         """Kill an active session"""
         session = self.get_session(session_id)
@@ -431,165 +403,146 @@ class SessionManager:
         
         return self.get_session(session_id)
     
+    @traced('db')
+    def index_session_output(self, session_id: str):
+        """Add a session's captured output to the full-text search index"""
+        output_path = self.config.session_dir(session_id) / 'output.log'
+        if not output_path.exists():
+            return
+    
+        def chunks():
+            lines = []
+            chunk = 0
+            with open(output_path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    lines.append(ANSI_ESCAPE.sub('', line))
+                    if len(lines) >= OUTPUT_CHUNK_LINES:
+                        yield (''.join(lines), chunk)
+                        lines = []
+                        chunk += 1
+            if lines:
+                yield (''.join(lines), chunk)
+    
+        try:
+            self.storage.index_output(session_id, chunks())
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Could not index output for session {session_id}: {e}")
+    
+    def search(self, query: str, limit: int = 20, session_id: Optional[str] = None,
+               raw: bool = False) -> List[SearchResult]:
+        """Full-text search over step content, event payloads and captured output
+    
+        Unless ``raw`` is set, every word of ``query`` is matched literally;
+        with ``raw`` the query is passed through as FTS5 query syntax.
+        """
+        return self.storage.search(query, limit=limit, session_id=session_id, raw=raw)
+    
+    def compact_storage(self) -> int:
+        """Fold buffered writes into long-term storage; returns records compacted"""
+        return self.storage.compact()
+    
     def count_sessions(self) -> int:
         """Get total number of sessions"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('SELECT COUNT(*) FROM sessions')
-            return cursor.fetchone()[0]
+        return self.storage.count_sessions()
     
     def get_statistics(self, days: int = 30) -> Dict[str, Any]:
-        """Get session statistics"""
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            # Total sessions
-            cursor = conn.execute(
-                'SELECT COUNT(*) FROM sessions WHERE started_at > ?',
-                (cutoff_date,)
-            )
-            total_sessions = cursor.fetchone()[0]
-            
-            # Status breakdown
-            cursor = conn.execute('''
-                SELECT status, COUNT(*) 
-                FROM sessions 
-                WHERE started_at > ?
-                GROUP BY status
-            ''', (cutoff_date,))
-            status_counts = dict(cursor.fetchall())
-            
-            # Average duration
-            cursor = conn.execute('''
-                SELECT AVG(julianday(ended_at) - julianday(started_at)) * 24 * 60
-                FROM sessions 
-                WHERE status = ? AND started_at > ? AND ended_at IS NOT NULL
-            ''', (SessionStatus.COMPLETED.value, cutoff_date))
-            avg_duration_minutes = cursor.fetchone()[0] or 0
-            
-            # Success rate
-            completed = status_counts.get(SessionStatus.COMPLETED.value, 0)
-            failed = status_counts.get(SessionStatus.FAILED.value, 0)
-            success_rate = (completed / (completed + failed) * 100) if (completed + failed) > 0 else 0
-            
-            return {
-                'total_sessions': total_sessions,
-                'status_breakdown': status_counts,
-                'average_duration_minutes': round(avg_duration_minutes, 1),
-                'success_rate': round(success_rate, 1),
-                'period_days': days
-            }
+        """Get session statistics for the last ``days`` days"""
+        cutoff_day = (datetime.now() - timedelta(days=days)).date().isoformat()
+        summary = self.storage.summarize_sessions(cutoff_day)
     
-    def generate_summary(self, session_id: str, format: str = 'markdown') -> Optional[str]:
-        """Generate session summary in specified format"""
-        session = self.get_session(session_id)
-        if not session:
-            return None
-        
-        steps = self.get_session_steps(session_id)
-        events = self.get_session_events(session_id)
-        
-        if format == 'markdown':
-            return self._generate_markdown_summary(session, steps, events)
-        elif format == 'json':
-            data = {
-                'session': asdict(session),
-                'steps': [asdict(step) for step in steps],
-                'events': [asdict(event) for event in events]
-            }
-            return json.dumps(data, indent=2, default=str)
-        elif format == 'html':
-            return self._generate_html_summary(session, steps, events)
-        else:
-            raise ValueError(f"Unknown format: {format}")
+        # Success rate
+        status_counts = summary['status_breakdown']
+        completed = status_counts.get(SessionStatus.COMPLETED.value, 0)
+        failed = status_counts.get(SessionStatus.FAILED.value, 0)
+        success_rate = (completed / (completed + failed) * 100) if (completed + failed) > 0 else 0
     
-    def _generate_markdown_summary(self, session: Session, steps: List[BuildStep], 
-                                 events: List[SessionEvent]) -> str:
-        """Generate markdown summary"""
-        summary = f"""# Build Session Summary
-
-## Session: {session.id}
-
-### Overview
-- **Project**: {session.project_name}
-- **Status**: {session.status.value}
-- **Started**: {session.started_at.strftime('%Y-%m-%d %H:%M:%S')}
-- **Ended**: {session.ended_at.strftime('%Y-%m-%d %H:%M:%S') if session.ended_at else 'N/A'}
-- **Duration**: {session.duration or 'N/A'}
-- **Progress**: {session.current_step}/{session.total_steps} steps ({session.progress_percentage}%)
-
-### Build Steps
-"""
-        
-        for step in steps:
-            icon = {
-                StepStatus.COMPLETED: "✅",
-                StepStatus.IN_PROGRESS: "🔄",
-                StepStatus.FAILED: "❌",
-                StepStatus.PENDING: "⏳",
-                StepStatus.SKIPPED: "⏭️"
-            }.get(step.status, "❓")
-            
-            summary += f"\n{icon} **Step {step.step_number}**: {step.description or 'N/A'}\n"
-            if step.duration:
-                summary += f"   - Duration: {step.duration}\n"
-            if step.error:
-                summary += f"   - Error: {step.error}\n"
+        return {
+            'total_sessions': summary['total_sessions'],
+            'status_breakdown': status_counts,
+            'average_duration_minutes': round(summary['average_duration_minutes'], 1),
+            'duration_percentiles_minutes': summary['duration_percentiles_minutes'],
+            'success_rate': round(success_rate, 1),
+            'period_days': days
+        }
+    
+    def get_step_statistics(self, days: int = 30) -> Dict[str, Any]:
+        """Get per-step duration distributions, idle nudges and hourly throughput"""
+        cutoff_ms = to_ms(datetime.now() - timedelta(days=days))
+        stats = self.storage.step_statistics(cutoff_ms)
+        stats['period_days'] = days
+        return stats
+    
+    def get_prompt_statistics(self, days: int = 30, top: int = 3) -> Dict[str, Any]:
+        """Get the steps that are consistently slowest for each prompt file"""
+        cutoff_ms = to_ms(datetime.now() - timedelta(days=days))
+        return {
+            'prompts': self.storage.prompt_statistics(cutoff_ms, top),
+            'period_days': days
+        }
+    
+    def get_content_statistics(self) -> Dict[str, Any]:
+        """Get how much space content-addressed step and prompt storage saves"""
+        return self.storage.content_statistics()
+    
+    def write_summary(self, session_id: str, out: TextIO, format: str = 'markdown') -> bool:
+        """Stream a session summary or export to a text stream
         
-        if session.error:
-            summary += f"\n### Error\n{session.error}\n"
+        Returns False if the session does not exist.
+        """
+        if format not in SUMMARY_FORMATS:
+            raise ValueError(f"Unknown format: {format}")
         
-        summary += f"\n---\n*Generated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*"
+        detail = self.get_session_detail(session_id)
+        if not detail:
+            return False
         
-        return summary
-    
-    def _generate_html_summary(self, session: Session, steps: List[BuildStep], 
-                             events: List[SessionEvent]) -> str:
-        """Generate HTML summary"""
-        # Simple HTML template
-        html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>Session {session.id}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-        .status-{SessionStatus.COMPLETED.value} {{ color: green; }}
-        .status-{SessionStatus.FAILED.value} {{ color: red; }}
-        .status-{SessionStatus.ACTIVE.value} {{ color: blue; }}
-        .step {{ margin: 10px 0; padding: 10px; border-left: 3px solid #ccc; }}
-        .step-completed {{ border-color: green; }}
-        .step-failed {{ border-color: red; }}
-        .step-in_progress {{ border-color: orange; }}
-    </style>
-</head>
-<body>
-    <h1>Build Session Summary</h1>
-    <h2>Session: {session.id}</h2>
-    
-    <h3>Overview</h3>
-    <ul>
-        <li><strong>Project</strong>: {session.project_name}</li>
-        <li><strong>Status</strong>: <span class="status-{session.status.value}">{session.status.value}</span></li>
-        <li><strong>Progress</strong>: {session.current_step}/{session.total_steps} ({session.progress_percentage}%)</li>
-        <li><strong>Duration</strong>: {session.duration or 'N/A'}</li>
-    </ul>
-    
-    <h3>Build Steps</h3>
-"""
+        session, steps = detail.session, detail.steps
+        from . import exporters
         
-        for step in steps:
-            html += f"""
-    <div class="step step-{step.status.value}">
-        <strong>Step {step.step_number}</strong>: {step.description or 'N/A'}
-        <br>Status: {step.status.value}
-        {f'<br>Duration: {step.duration}' if step.duration else ''}
-    </div>
-"""
+        if format in ('markdown', 'html'):
+            event_counts = detail.event_counts
+            if self._archive_file(session):
+                # Live storage holds what pruning left; count the full history the exports list
+                event_counts = dict(Counter(event.event_type
+                                            for event in self._iter_full_events(session)))
+            if format == 'markdown':
+                exporters.write_markdown_summary(out, session, steps, event_counts)
+            else:
+                exporters.write_html_summary(out, session, steps, event_counts)
+        else:
+            events = self._iter_full_events(session)
+            if format == 'json':
+                exporters.write_json_export(out, session, steps, events)
+            else:
+                exporters.write_jsonl_export(out, session, steps, events)
         
-        html += """
-</body>
-</html>"""
+        return True
+    
+    def _iter_full_events(self, session: Session) -> Iterator[SessionEvent]:
+        """Iterate over a session's complete event history
         
-        return html
+        Events of archived sessions whose live events were pruned are read
+        back from the archive file.
+        """
+        archive_file = self._archive_file(session)
+        if archive_file:
+            from .archive import iter_archived_events
+            return iter_archived_events(archive_file)
+        return self.iter_session_events(session.id)
+    
+    def _archive_file(self, session: Session) -> Optional[Path]:
+        """The archive holding a pruned session's full event history, if it still exists"""
+        archive = session.metadata.get('archive')
+        if archive and Path(archive['path']).exists():
+            return Path(archive['path'])
+        return None
+    
+    def generate_summary(self, session_id: str, format: str = 'markdown') -> Optional[str]:
+        """Generate session summary in specified format"""
+        buffer = io.StringIO()
+        if not self.write_summary(session_id, buffer, format):
+            return None
+        return buffer.getvalue()
     
     def display_session_summary(self, session: Session):
         """Display session summary to console"""
@@ -609,14 +562,14 @@ class SessionManager:
         if session.duration:
             print(f"  Duration: {session.duration}")
     
-    def display_session_status(self, session: Session, detailed: bool = False):
-        """Display detailed session status"""
-        self.display_session_summary(session)
+    def display_session_status(self, detail: SessionDetail, detailed: bool = False):
+        """Display a session, with its steps and event count if detailed"""
+        self.display_session_summary(detail.session)
         
         if detailed:
+            print(f"  Events: {detail.event_count}")
             print("\nSteps:")
-            steps = self.get_session_steps(session.id)
-            for step in steps:
+            for step in detail.steps:
                 icon = {
                     StepStatus.COMPLETED: "✅",
                     StepStatus.IN_PROGRESS: "🔄",
@@ -629,6 +582,12 @@ class SessionManager:
                 if step.duration:
                     print(f"     Duration: {step.duration}")
     
+    def format_event(self, event: SessionEvent) -> str:
+        """Format an event as a single console line"""
+        data = json.dumps(event.data) if event.data else ''
+        return (f"{event.id or '':>8}  {event.timestamp.strftime('%Y-%m-%d %H:%M:%S')}  "
+                f"{event.event_type:<24} {data}")
+    
     def display_statistics(self, stats: Dict[str, Any]):
         """Display statistics to console"""
         print(f"\n📊 Build Statistics (last {stats['period_days']} days)")
@@ -636,12 +595,121 @@ class SessionManager:
         print(f"Total Sessions: {stats['total_sessions']}")
         print(f"Success Rate: {stats['success_rate']}%")
         print(f"Average Duration: {stats['average_duration_minutes']} minutes")
+        percentiles = stats.get('duration_percentiles_minutes', {})
+        if percentiles:
+            print("Duration Percentiles: " + " | ".join(
+                f"{name}: {value} min" for name, value in percentiles.items()
+            ))
         print("\nStatus Breakdown:")
         for status, count in stats['status_breakdown'].items():
             print(f"  {status}: {count}")
     
-    def stream_logs(self, session_id: str):
-        """Stream session logs (placeholder for log streaming)"""
-        # This would be implemented to stream actual log files
-        print(f"Streaming logs for session {session_id}...")
-        print("(Log streaming not yet implemented)")
\ No newline at end of file
+    def display_step_statistics(self, stats: Dict[str, Any]):
+        """Display per-step statistics to console"""
+        print(f"\n📈 Step Statistics (last {stats['period_days']} days)")
+        print("=" * 50)
+        if not stats['steps']:
+            print("No steps recorded")
+            return
+        
+        prompt_file = None
+        for step in stats['steps']:
+            if step['prompt_file'] != prompt_file:
+                prompt_file = step['prompt_file']
+                print(f"\n{prompt_file}")
+                print(f"  {'Step':<5} {'Runs':>5} {'p50':>9} {'p90':>9} {'Max':>9} "
+                      f"{'Nudges/run':>11}  Description")
+            print(f"  {step['step_number']:<5} {step['runs']:>5} "
+                  f"{_minutes(step['p50_ms']):>9} {_minutes(step['p90_ms']):>9} "
+                  f"{_minutes(step['max_ms']):>9} {step['nudges_per_run'] or 0:>11.1f}  "
+                  f"{step['description'] or 'N/A'}")
+        
+        if stats['throughput']:
+            print("\nThroughput (steps finished per hour):")
+            for hour in stats['throughput']:
+                started = datetime.fromtimestamp(hour['hour_ms'] / 1000)
+                print(f"  {started.strftime('%Y-%m-%d %H:00')}  {hour['steps']:>4} steps  "
+                      f"(24h avg {hour['per_hour_24h']:.1f}/h)")
+    
+    def display_prompt_statistics(self, stats: Dict[str, Any]):
+        """Display the slowest steps of each prompt file to console"""
+        print(f"\n🐢 Slowest Steps by Prompt (last {stats['period_days']} days)")
+        print("=" * 50)
+        if not stats['prompts']:
+            print("No steps recorded")
+            return
+        
+        prompt_file = None
+        for step in stats['prompts']:
+            if step['prompt_file'] != prompt_file:
+                prompt_file = step['prompt_file']
+                print(f"\n{prompt_file} ({step['prompt_runs']} runs)")
+            print(f"  {step['position']}. Step {step['step_number']}: "
+                  f"{step['description'] or 'N/A'} - slowest in "
+                  f"{step['slowest_runs']}/{step['runs']} runs, "
+                  f"avg {_minutes(step['avg_ms'])}, avg rank {step['avg_rank']:.1f}")
+    
+    def display_content_statistics(self, stats: Dict[str, Any]):
+        """Display content deduplication and database size to console"""
+        print("\n💾 Storage")
+        print("=" * 50)
+        print(f"Step and prompt bodies: {stats['reference_count']} referenced, "
+              f"{stats['unique_bodies']} stored")
+        print(f"Content size: {format_size(stats['logical_bytes'])} referenced, "
+              f"{format_size(stats['stored_bytes'])} stored "
+              f"({format_size(stats['saved_bytes'])} saved by deduplication)")
+        print(f"Database size: {format_size(stats['database_bytes'])} "
+              f"({format_size(stats['free_bytes'])} free)")
+    
+    def stream_logs(self, session_id: str, follow: bool = True, poll_interval: float = 0.5):
+        """Print a session's events and captured output, optionally following
+    
+        New events are found with an id high-water mark, and storage is
+        only re-queried when its change token moves (PRAGMA data_version
+        for SQLite), so idle followers cost almost nothing.
+        """
+        output_path = self.config.session_dir(session_id) / 'output.log'
+        last_event_id = 0
+        last_token = None
+        output_pos = 0
+        active = True
+    
+        try:
+            while True:
+                token = self.storage.change_token()
+                if token is None or token != last_token:
+                    last_token = token
+                    for event in self.storage.iter_events(session_id, last_event_id):
+                        print(self.format_event(event), flush=True)
+                        last_event_id = event.id
+    
+                    session = self.storage.get_session(session_id)
+                    active = bool(session) and session.status == SessionStatus.ACTIVE
+    
+                output_pos = self._tail_output(output_path, output_pos)
+    
+                if not follow or not active:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+    
+    def _tail_output(self, path: Path, position: int) -> int:
+        """Print output appended to a file since ``position``; returns the new position"""
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return position
+        
+        if size < position:
+            position = 0  # File was truncated or replaced
+        if size == position:
+            return position
+        
+        with open(path, 'rb') as f:
+            f.seek(position)
+            data = f.read(size - position)
+        
+        sys.stdout.write(data.decode('utf-8', errors='replace'))
+        sys.stdout.flush()
+        return size
@@ -0,0 +1,39 @@
+"""
+Pluggable storage backends for build sessions
+
+The ``storage_backend`` setting picks one of BACKENDS; every backend
+implements StorageBackend and passes tests/test_storage_conformance.py.
+"""
+
+from ..exceptions import ConfigError
+from .base import StorageBackend
+from .memory import MemoryBackend
+from .segment_log import SegmentLogBackend
+from .sqlite import SQLiteBackend
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'memory': MemoryBackend,
+    'segment_log': SegmentLogBackend,
+}
+
+
+def create_backend(config) -> StorageBackend:
+    """Create the storage backend selected in the configuration"""
+    name = config.get('storage_backend', 'sqlite')
+    if name not in BACKENDS:
+        raise ConfigError(
+            f"Unknown storage_backend '{name}' (expected one of: {', '.join(BACKENDS)})"
+        )
+    return BACKENDS[name](config)
+
+
+__all__ = [
+    'BACKENDS',
+    'StorageBackend',
+    'SQLiteBackend',
+    'MemoryBackend',
+    'SegmentLogBackend',
+    'create_backend',
+]
@@ -0,0 +1,221 @@
+"""
+Storage backend interface for build sessions
+"""
+
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..analytics import DurationSketch, rollup_day, summarize_rollups
+from ..codec import to_ms
+from ..exceptions import SessionError
+from ..models import (BuildStep, SearchResult, Session, SessionDetail, SessionEvent,
+                      SessionStatus)
+
+
+# Session columns that update_session may change
+SESSION_FIELDS = ('status', 'ended_at', 'error', 'current_step', 'metadata')
+
+# Step columns that update_step may change
+STEP_FIELDS = ('status', 'started_at', 'completed_at', 'error')
+
+EVENT_RETENTIONS = ('delete', 'downsample')
+
+
+def session_key(session: Session) -> Tuple[int, str]:
+    """Sort key for listing sessions; newest first is descending order"""
+    return (to_ms(session.started_at), session.id)
+
+
+def check_fields(changes: Dict[str, Any], allowed: Tuple[str, ...]):
+    """Reject updates to columns a backend does not allow changing"""
+    unknown = set(changes) - set(allowed)
+    if unknown:
+        raise ValueError(f"Cannot update fields: {', '.join(sorted(unknown))}")
+
+
+def downsample_keep(events: List[SessionEvent], every: int) -> List[SessionEvent]:
+    """Events kept by downsampling: first, last and every Nth of each type"""
+    by_type: Dict[str, List[SessionEvent]] = {}
+    for event in events:
+        by_type.setdefault(event.event_type, []).append(event)
+
+    keep = set()
+    for typed in by_type.values():
+        for n, event in enumerate(typed):
+            if n % every == 0 or n == len(typed) - 1:
+                keep.add(id(event))
+    return [event for event in events if id(event) in keep]
+
+
+class StorageBackend(ABC):
+    """Persistence for sessions, their steps and their event log
+
+    Every write method is atomic: a session or step change and the event
+    recording it are stored together or not at all. Backends return copies,
+    so callers may modify what they get back.
+    """
+
+    name = 'abstract'
+    persistent = True
+
+    @abstractmethod
+    def create_session(self, session: Session, steps: List[BuildStep],
+                       event: Optional[SessionEvent] = None,
+                       initial_prompt: Optional[str] = None) -> bool:
+        """Store a new session with its steps, initial prompt and creation event
+
+        Creating a session id that already exists changes nothing and
+        returns False.
+        """
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> Optional[Session]:
+        """Get session by ID"""
+
+    @abstractmethod
+    def get_initial_prompt(self, session_id: str) -> Optional[str]:
+        """Get the initial prompt a session was started with"""
+
+    @abstractmethod
+    def list_sessions(self, status: Optional[SessionStatus] = None,
+                      before: Optional[Tuple[int, str]] = None,
+                      limit: Optional[int] = None) -> List[Session]:
+        """List sessions newest first
+
+        ``before`` is a (started_at ms, id) key; only sessions sorting
+        strictly before it in that order are returned.
+        """
+
+    @abstractmethod
+    def count_sessions(self) -> int:
+        """Get total number of sessions"""
+
+    @abstractmethod
+    def update_session(self, session_id: str, changes: Dict[str, Any],
+                       event: Optional[SessionEvent] = None):
+        """Change session fields (see SESSION_FIELDS) and record an event"""
+
+    @abstractmethod
+    def update_step(self, session_id: str, step_number: int, changes: Dict[str, Any],
+                    session_changes: Optional[Dict[str, Any]] = None,
+                    event: Optional[SessionEvent] = None):
+        """Change step fields (see STEP_FIELDS), optionally session fields, and record an event"""
+
+    @abstractmethod
+    def replace_steps(self, session_id: str, from_step: int, steps: List[BuildStep],
+                      event: Optional[SessionEvent] = None):
+        """Replace a session's steps numbered ``from_step`` and up with ``steps``
+
+        The session's total_steps becomes its new step count, and the event
+        is recorded with the change.
+        """
+
+    @abstractmethod
+    def append_event(self, event: SessionEvent) -> int:
+        """Append an event, returning its id
+
+        Events that already carry an id are stored under it, and appending
+        an id that exists is a no-op.
+        """
+
+    @abstractmethod
+    def last_event_id(self) -> int:
+        """Highest event id allocated so far; events appended later get higher ids"""
+
+    @abstractmethod
+    def iter_steps(self, session_id: str) -> Iterator[BuildStep]:
+        """Iterate over a session's steps in step order"""
+
+    @abstractmethod
+    def iter_events(self, session_id: str, after: int = 0,
+                    limit: Optional[int] = None) -> Iterator[SessionEvent]:
+        """Iterate over a session's events with ids above ``after``, oldest first"""
+
+    @abstractmethod
+    def prune_events(self, session_id: str, retention: str, every: int = 10) -> int:
+        """Delete or downsample a session's events, returning how many were removed"""
+
+    def load_sessions(self, session_ids: Sequence[str]) -> Dict[str, SessionDetail]:
+        """Load sessions with their steps and per-type event counts, keyed by id
+
+        Ids that do not exist are left out. This default reads one session
+        at a time; backends with set-based queries override it.
+        """
+        details = {}
+        for session_id in session_ids:
+            session = self.get_session(session_id)
+            if session:
+                counts = Counter(event.event_type for event in self.iter_events(session_id))
+                details[session_id] = SessionDetail(session, list(self.iter_steps(session_id)),
+                                                    dict(counts))
+        return details
+
+    def summarize_sessions(self, cutoff_day: str) -> Dict[str, Any]:
+        """Totals and duration statistics for sessions started on or after a day
+
+        Returns the same shape as analytics.summarize_rollups. This default
+        folds every session in Python; backends with rollups override it.
+        """
+        buckets: Dict[str, Dict[str, Any]] = {}
+        for session in self.list_sessions():
+            started_at = to_ms(session.started_at)
+            if rollup_day(started_at) < cutoff_day:
+                continue
+
+            bucket = buckets.setdefault(session.status.value, {
+                'status': session.status.value, 'session_count': 0,
+                'duration_count': 0, 'duration_sum_ms': 0, 'sketch': DurationSketch()
+            })
+            bucket['session_count'] += 1
+            if session.ended_at:
+                duration_ms = max(to_ms(session.ended_at) - started_at, 0)
+                bucket['duration_count'] += 1
+                bucket['duration_sum_ms'] += duration_ms
+                bucket['sketch'].add(duration_ms)
+
+        for bucket in buckets.values():
+            bucket['duration_sketch'] = bucket.pop('sketch').to_json()
+        return summarize_rollups(buckets.values(), SessionStatus.COMPLETED.value)
+
+    def step_statistics(self, cutoff_ms: int) -> Dict[str, Any]:
+        """Per-step durations, idle nudges and hourly throughput since ``cutoff_ms``"""
+        raise SessionError(f"Step analytics are not supported by the {self.name} storage backend")
+
+    def prompt_statistics(self, cutoff_ms: int, top: int = 3) -> List[Dict[str, Any]]:
+        """The consistently slowest steps of each prompt file since ``cutoff_ms``"""
+        raise SessionError(f"Prompt analytics are not supported by the {self.name} storage backend")
+
+    def content_statistics(self) -> Dict[str, Any]:
+        """How much step content and prompt text is stored versus referenced"""
+        raise SessionError(f"Content statistics are not supported by the {self.name} storage backend")
+
+    def search(self, query: str, limit: int = 20, session_id: Optional[str] = None,
+               raw: bool = False) -> List[SearchResult]:
+        """Full-text search over step content, event payloads and captured output"""
+        raise SessionError(f"Search is not supported by the {self.name} storage backend")
+
+    def index_output(self, session_id: str, chunks: Iterable[Tuple[str, int]]):
+        """Replace the searchable copy of a session's output with ``chunks``"""
+
+    def change_token(self) -> Optional[Any]:
+        """Value that changes whenever stored data changes, or None if unknown
+
+        Followers compare tokens to skip re-reading unchanged storage.
+        """
+        return None
+
+    def reclaim_space(self):
+        """Return space freed by pruning to the filesystem"""
+
+    def compact(self) -> int:
+        """Fold buffered writes into long-term storage, returning records compacted"""
+        return 0
+
+    def close(self):
+        """Release resources held by the backend"""
+
+    @staticmethod
+    def copy_session(session: Session) -> Session:
+        """Copy a session so callers cannot mutate stored state"""
+        return session.copy()
@@ -0,0 +1,180 @@
+"""
+In-memory storage backend for tests and simulations
+"""
+
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..exceptions import SessionError
+from ..models import BuildStep, Session, SessionEvent, SessionStatus
+from .base import (EVENT_RETENTIONS, SESSION_FIELDS, STEP_FIELDS, StorageBackend,
+                   check_fields, downsample_keep, session_key)
+
+
+class MemoryBackend(StorageBackend):
+    """Keeps everything in process memory; nothing survives the process"""
+
+    name = 'memory'
+    persistent = False
+
+    def __init__(self, config=None):
+        self._lock = threading.RLock()
+        self._sessions: Dict[str, Session] = {}
+        self._steps: Dict[str, Dict[int, BuildStep]] = {}
+        self._events: Dict[str, List[SessionEvent]] = {}
+        self._prompts: Dict[str, str] = {}
+        # Interned bodies, so sessions sharing content share one string
+        self._contents: Dict[str, str] = {}
+        self._event_ids = set()
+        self._last_event_id = 0
+        self._version = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def create_session(self, session: Session, steps: List[BuildStep],
+                       event: Optional[SessionEvent] = None,
+                       initial_prompt: Optional[str] = None) -> bool:
+        with self._lock:
+            if session.id in self._sessions:
+                return False
+            self._sessions[session.id] = self.copy_session(session)
+            self._steps[session.id] = {
+                step.step_number: step.copy(content=self._intern(step.content))
+                for step in steps
+            }
+            if initial_prompt is not None:
+                self._prompts[session.id] = self._intern(initial_prompt)
+            self._events.setdefault(session.id, [])
+            if event:
+                self._append(event)
+            self._version += 1
+            return True
+
+    def _intern(self, body: Optional[str]) -> Optional[str]:
+        if body is None:
+            return None
+        return self._contents.setdefault(body, body)
+
+    def get_session(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return self.copy_session(session) if session else None
+
+    def get_initial_prompt(self, session_id: str) -> Optional[str]:
+        return self._prompts.get(session_id)
+
+    def list_sessions(self, status: Optional[SessionStatus] = None,
+                      before: Optional[Tuple[int, str]] = None,
+                      limit: Optional[int] = None) -> List[Session]:
+        with self._lock:
+            sessions = [
+                session for session in self._sessions.values()
+                if (status is None or session.status == status)
+                and (before is None or session_key(session) < tuple(before))
+            ]
+        sessions.sort(key=session_key, reverse=True)
+        return [self.copy_session(session) for session in sessions[:limit]]
+
+    def count_sessions(self) -> int:
+        return len(self._sessions)
+
+    def update_session(self, session_id: str, changes: Dict[str, Any],
+                       event: Optional[SessionEvent] = None):
+        check_fields(changes, SESSION_FIELDS)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session:
+                self._sessions[session_id] = session.copy(**changes)
+            if event:
+                self._append(event)
+            self._version += 1
+
+    def update_step(self, session_id: str, step_number: int, changes: Dict[str, Any],
+                    session_changes: Optional[Dict[str, Any]] = None,
+                    event: Optional[SessionEvent] = None):
+        check_fields(changes, STEP_FIELDS)
+        check_fields(session_changes or {}, SESSION_FIELDS)
+        with self._lock:
+            steps = self._steps.get(session_id, {})
+            if step_number in steps:
+                steps[step_number] = steps[step_number].copy(**changes)
+            session = self._sessions.get(session_id)
+            if session and session_changes:
+                self._sessions[session_id] = session.copy(**session_changes)
+            if event:
+                self._append(event)
+            self._version += 1
+
+    def replace_steps(self, session_id: str, from_step: int, steps: List[BuildStep],
+                      event: Optional[SessionEvent] = None):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session:
+                stored = self._steps.setdefault(session_id, {})
+                for number in [number for number in stored if number >= from_step]:
+                    del stored[number]
+                for step in steps:
+                    stored[step.step_number] = step.copy(content=self._intern(step.content))
+                self._sessions[session_id] = session.copy(total_steps=len(stored))
+            if event:
+                self._append(event)
+            self._version += 1
+
+    def append_event(self, event: SessionEvent) -> int:
+        with self._lock:
+            event_id = self._append(event)
+            self._version += 1
+            return event_id
+
+    def _append(self, event: SessionEvent) -> int:
+        """Store an event copy under its own id or the next free one"""
+        if event.id is not None and event.id in self._event_ids:
+            return event.id
+
+        event_id = event.id if event.id is not None else self._last_event_id + 1
+        self._last_event_id = max(self._last_event_id, event_id)
+        self._event_ids.add(event_id)
+
+        events = self._events.setdefault(event.session_id, [])
+        stored = event.copy(id=event_id)
+        if events and events[-1].id > event_id:
+            # Explicit ids may arrive out of order; keep the log sorted
+            events.append(stored)
+            events.sort(key=lambda e: e.id)
+        else:
+            events.append(stored)
+        return event_id
+
+    def last_event_id(self) -> int:
+        return self._last_event_id
+
+    def iter_steps(self, session_id: str) -> Iterator[BuildStep]:
+        with self._lock:
+            steps = sorted(self._steps.get(session_id, {}).values(),
+                           key=lambda step: step.step_number)
+        for step in steps:
+            yield step.copy()
+
+    def iter_events(self, session_id: str, after: int = 0,
+                    limit: Optional[int] = None) -> Iterator[SessionEvent]:
+        with self._lock:
+            events = [event for event in self._events.get(session_id, [])
+                      if event.id > (after or 0)][:limit]
+        for event in events:
+            yield event.copy()
+
+    def prune_events(self, session_id: str, retention: str, every: int = 10) -> int:
+        if retention not in EVENT_RETENTIONS:
+            raise SessionError(f"Unknown event retention: {retention}")
+
+        with self._lock:
+            events = self._events.get(session_id, [])
+            kept = downsample_keep(events, every) if retention == 'downsample' else []
+            removed = len(events) - len(kept)
+            self._events[session_id] = kept
+            self._version += 1
+            return removed
+
+    def change_token(self) -> int:
+        return self._version
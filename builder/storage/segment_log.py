@@ -0,0 +1,465 @@
+"""
+Append-only segment log storage backend
+
+Every write is one JSON line appended to the newest segment file: no
+database transaction and no index maintenance, which makes high-frequency
+event capture cheap. Compaction replays the segments into the SQLite
+backend and deletes them. Reads see SQLite overlaid with the writes still
+waiting in the log, which each process replays into memory.
+"""
+
+import fcntl
+import heapq
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..codec import (decode_changes, decode_event, decode_session, decode_step,
+                     encode_changes, encode_record)
+from ..models import (BuildStep, SearchResult, Session, SessionDetail, SessionEvent,
+                      SessionStatus, StepStatus)
+from .base import SESSION_FIELDS, STEP_FIELDS, StorageBackend, check_fields, session_key
+from .memory import MemoryBackend
+from .sqlite import SQLiteBackend
+
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.jsonl'
+
+def _segment_number(path: Path) -> int:
+    return int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+class SegmentLogBackend(StorageBackend):
+    """Append-only JSONL segments compacted into the SQLite backend
+
+    Appends from several processes are serialized with an advisory lock on
+    the log directory. Search, statistics and event pruning compact the
+    log first so they run against complete data in SQLite.
+    """
+
+    name = 'segment_log'
+
+    def __init__(self, config):
+        self.log_dir = Path(config.get('segment_log_dir', 'builder-segments'))
+        self.segment_max_bytes = int(float(config.get('segment_max_mb', 16)) * 1024 * 1024)
+        self.compact_segments = max(int(config.get('segment_compact_segments', 8)), 1)
+
+        self.cold = SQLiteBackend(config)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        self._thread_lock = threading.RLock()
+        self._lock_fd = os.open(self.log_dir / 'log.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        self._active_fd: Optional[int] = None
+        self._active: Optional[Path] = None
+
+        with self._locked(fcntl.LOCK_SH):
+            self._reset()
+            self._sync()
+
+    @contextmanager
+    def _locked(self, mode: int):
+        """Hold the log directory lock (shared for reads, exclusive for writes)"""
+        with self._thread_lock:
+            fcntl.flock(self._lock_fd, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _segments(self) -> List[Path]:
+        """Existing segment files, oldest first"""
+        return sorted(self.log_dir.glob(f'{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}'),
+                      key=_segment_number)
+
+    def _segment_path(self, number: int) -> Path:
+        return self.log_dir / f'{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}'
+
+    def _reset(self):
+        """Forget replayed state; the next sync rebuilds it from the segments"""
+        self._hot = MemoryBackend()
+        self._offsets: Dict[str, int] = {}
+        self._loaded = set()
+        self._cold_last_event_id = self.cold.last_event_id()
+
+    def _sync(self):
+        """Replay records appended since the last sync (caller holds the lock)"""
+        segments = self._segments()
+        names = {path.name for path in segments}
+        if any(name not in names for name in self._offsets):
+            # Another process compacted the segments we had replayed
+            self._reset()
+
+        for path in segments:
+            position = self._offsets.setdefault(path.name, 0)
+            if path.stat().st_size == position:
+                continue
+            records, self._offsets[path.name] = self._read_records(path, position)
+            for record in records:
+                self._apply(record)
+
+        active = segments[-1] if segments else self._segment_path(1)
+        if active != self._active:
+            self._open_active(active)
+
+    def _read_records(self, path: Path, position: int = 0) -> Tuple[List[Dict], int]:
+        """Parse complete lines after ``position``; returns records and the new position"""
+        with open(path, 'rb') as f:
+            f.seek(position)
+            data = f.read()
+
+        # A line without its newline is a write still in progress or torn by a crash
+        end = data.rfind(b'\n') + 1
+        records = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping corrupt record in {path.name}")
+        return records, position + end
+
+    def _open_active(self, path: Path):
+        if self._active_fd is not None:
+            os.close(self._active_fd)
+        self._active_fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._active = path
+        self._offsets.setdefault(path.name, 0)
+
+    def _append(self, record: Dict[str, Any]):
+        """Append a record to the log and apply it (caller holds the exclusive lock)"""
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+        if os.fstat(self._active_fd).st_size != self._offsets[self._active.name]:
+            # Terminate a partial line left by a writer that crashed mid-append
+            os.write(self._active_fd, b'\n')
+        os.write(self._active_fd, line)
+        self._offsets[self._active.name] = os.fstat(self._active_fd).st_size
+        self._apply(record)
+
+        if self._offsets[self._active.name] >= self.segment_max_bytes:
+            self._open_active(self._segment_path(_segment_number(self._active) + 1))
+            if len(self._segments()) > self.compact_segments:
+                self._compact()
+
+    def _next_event(self, event: Optional[SessionEvent]) -> Optional[Dict[str, Any]]:
+        """Log record for an event, allocating its id"""
+        if event is None:
+            return None
+        record = encode_record(event)
+        if record['id'] is None:
+            record['id'] = self._last_event_id() + 1
+        return record
+
+    def _load(self, session_id: str):
+        """Copy a compacted session into memory so logged updates can apply to it"""
+        if session_id in self._hot or session_id in self._loaded:
+            return
+        session = self.cold.get_session(session_id)
+        if session:
+            self._hot.create_session(session, list(self.cold.iter_steps(session_id)))
+            self._loaded.add(session_id)
+
+    def _apply(self, record: Dict[str, Any]):
+        """Apply a log record to the in-memory state"""
+        op = record['op']
+        event = decode_event(record.get('event'))
+
+        if op == 'create':
+            self._hot.create_session(
+                decode_session(record['session']),
+                [decode_step(step) for step in record['steps']],
+                event, record.get('initial_prompt')
+            )
+        elif op == 'session':
+            self._load(record['id'])
+            self._hot.update_session(
+                record['id'], decode_changes(record['changes'], SessionStatus), event
+            )
+        elif op == 'step':
+            self._load(record['id'])
+            self._hot.update_step(
+                record['id'], record['step'],
+                decode_changes(record['changes'], StepStatus),
+                decode_changes(record['session_changes'], SessionStatus),
+                event
+            )
+        elif op == 'steps':
+            self._load(record['id'])
+            self._hot.replace_steps(
+                record['id'], record['from'],
+                [decode_step(step) for step in record['steps']], event
+            )
+        elif op == 'event':
+            self._hot.append_event(event)
+        else:
+            logger.warning(f"Skipping unknown log record '{op}'")
+
+    def _replay_into_cold(self, record: Dict[str, Any]):
+        """Apply a log record to SQLite; replaying a record twice is harmless"""
+        op = record['op']
+        event = decode_event(record.get('event'))
+
+        if op == 'create':
+            self.cold.create_session(
+                decode_session(record['session']),
+                [decode_step(step) for step in record['steps']],
+                event, record.get('initial_prompt')
+            )
+        elif op == 'session':
+            self.cold.update_session(
+                record['id'], decode_changes(record['changes'], SessionStatus), event
+            )
+        elif op == 'step':
+            self.cold.update_step(
+                record['id'], record['step'],
+                decode_changes(record['changes'], StepStatus),
+                decode_changes(record['session_changes'], SessionStatus),
+                event
+            )
+        elif op == 'steps':
+            self.cold.replace_steps(
+                record['id'], record['from'],
+                [decode_step(step) for step in record['steps']], event
+            )
+        elif op == 'event':
+            self.cold.append_event(event)
+
+    def compact(self) -> int:
+        with self._locked(fcntl.LOCK_EX):
+            self._sync()
+            return self._compact()
+
+    def _compact(self) -> int:
+        """Replay every segment into SQLite and delete them (caller holds the exclusive lock)"""
+        segments = self._segments()
+        if not segments or all(path.stat().st_size == 0 for path in segments):
+            return 0
+
+        compacted = 0
+        with self.cold.batch():
+            for path in segments:
+                records, _ = self._read_records(path)
+                for record in records:
+                    self._replay_into_cold(record)
+                compacted += len(records)
+
+        # Keep numbering monotonic so other processes notice their
+        # replayed segments are gone
+        self._open_active(self._segment_path(_segment_number(segments[-1]) + 1))
+        for path in segments:
+            path.unlink()
+
+        self._reset()
+        self._offsets[self._active.name] = 0
+        logger.info(f"Compacted {compacted} log records from {len(segments)} segments")
+        return compacted
+
+    def create_session(self, session: Session, steps: List[BuildStep],
+                       event: Optional[SessionEvent] = None,
+                       initial_prompt: Optional[str] = None) -> bool:
+        with self._locked(fcntl.LOCK_EX):
+            self._sync()
+            if session.id in self._hot or self.cold.get_session(session.id):
+                return False
+            self._append({
+                'op': 'create',
+                'session': encode_record(session),
+                'steps': [encode_record(step) for step in steps],
+                'initial_prompt': initial_prompt,
+                'event': self._next_event(event)
+            })
+            return True
+
+    def update_session(self, session_id: str, changes: Dict[str, Any],
+                       event: Optional[SessionEvent] = None):
+        check_fields(changes, SESSION_FIELDS)
+        with self._locked(fcntl.LOCK_EX):
+            self._sync()
+            self._append({
+                'op': 'session',
+                'id': session_id,
+                'changes': encode_changes(changes),
+                'event': self._next_event(event)
+            })
+
+    def update_step(self, session_id: str, step_number: int, changes: Dict[str, Any],
+                    session_changes: Optional[Dict[str, Any]] = None,
+                    event: Optional[SessionEvent] = None):
+        check_fields(changes, STEP_FIELDS)
+        check_fields(session_changes or {}, SESSION_FIELDS)
+        with self._locked(fcntl.LOCK_EX):
+            self._sync()
+            self._append({
+                'op': 'step',
+                'id': session_id,
+                'step': step_number,
+                'changes': encode_changes(changes),
+                'session_changes': encode_changes(session_changes),
+                'event': self._next_event(event)
+            })
+
+    def replace_steps(self, session_id: str, from_step: int, steps: List[BuildStep],
+                      event: Optional[SessionEvent] = None):
+        with self._locked(fcntl.LOCK_EX):
+            self._sync()
+            self._append({
+                'op': 'steps',
+                'id': session_id,
+                'from': from_step,
+                'steps': [encode_record(step) for step in steps],
+                'event': self._next_event(event)
+            })
+
+    def append_event(self, event: SessionEvent) -> int:
+        with self._locked(fcntl.LOCK_EX):
+            self._sync()
+            record = self._next_event(event)
+            self._append({'op': 'event', 'event': record})
+            return record['id']
+
+    def _last_event_id(self) -> int:
+        return max(self._hot.last_event_id(), self._cold_last_event_id)
+
+    def last_event_id(self) -> int:
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            return self._last_event_id()
+
+    def get_session(self, session_id: str) -> Optional[Session]:
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            return self._hot.get_session(session_id) or self.cold.get_session(session_id)
+
+    def get_initial_prompt(self, session_id: str) -> Optional[str]:
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            prompt = self._hot.get_initial_prompt(session_id)
+        return prompt if prompt is not None else self.cold.get_initial_prompt(session_id)
+
+    def list_sessions(self, status: Optional[SessionStatus] = None,
+                      before: Optional[Tuple[int, str]] = None,
+                      limit: Optional[int] = None) -> List[Session]:
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            hot = self._hot.list_sessions(status, before, limit)
+            # Over-fetch to make up for compacted rows shadowed by newer copies
+            cold_limit = None if limit is None else limit + self._hot.count_sessions()
+            cold = [session for session in self.cold.list_sessions(status, before, cold_limit)
+                    if session.id not in self._hot]
+
+        sessions = sorted(hot + cold, key=session_key, reverse=True)
+        return sessions[:limit]
+
+    def count_sessions(self) -> int:
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            return (self.cold.count_sessions()
+                    + self._hot.count_sessions() - len(self._loaded))
+
+    def iter_steps(self, session_id: str) -> Iterator[BuildStep]:
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            if session_id in self._hot:
+                steps = list(self._hot.iter_steps(session_id))
+            else:
+                steps = None
+        return iter(steps) if steps is not None else self.cold.iter_steps(session_id)
+
+    def iter_events(self, session_id: str, after: int = 0,
+                    limit: Optional[int] = None) -> Iterator[SessionEvent]:
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            hot = list(self._hot.iter_events(session_id, after, limit))
+
+        # Events replayed from a segment compacted just before a crash can
+        # exist in both places; merge by id and drop the duplicates
+        merged = heapq.merge(self.cold.iter_events(session_id, after, limit), hot,
+                             key=lambda event: event.id)
+        last_id = None
+        count = 0
+        for event in merged:
+            if event.id == last_id:
+                continue
+            last_id = event.id
+            yield event
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+    def load_sessions(self, session_ids: Sequence[str]) -> Dict[str, SessionDetail]:
+        # Holding the lock keeps another process from compacting between
+        # the bulk read of SQLite and the overlay of logged changes
+        with self._locked(fcntl.LOCK_SH):
+            self._sync()
+            details = self.cold.load_sessions(session_ids)
+
+            for session_id in dict.fromkeys(session_ids):
+                # Events at or below the compacted high-water mark were
+                # replayed from segments SQLite already holds
+                counts = Counter(event.event_type for event in
+                                 self._hot.iter_events(session_id, after=self._cold_last_event_id))
+                session = self._hot.get_session(session_id)
+                if session is not None:
+                    detail = details.setdefault(session_id, SessionDetail(session))
+                    detail.session = session
+                    detail.steps = list(self._hot.iter_steps(session_id))
+                elif session_id not in details:
+                    continue
+                if counts:
+                    details[session_id].event_counts = dict(
+                        Counter(details[session_id].event_counts) + counts
+                    )
+        return details
+
+    def prune_events(self, session_id: str, retention: str, every: int = 10) -> int:
+        self.compact()
+        return self.cold.prune_events(session_id, retention, every)
+
+    def summarize_sessions(self, cutoff_day: str) -> Dict[str, Any]:
+        self.compact()
+        return self.cold.summarize_sessions(cutoff_day)
+
+    def step_statistics(self, cutoff_ms: int) -> Dict[str, Any]:
+        self.compact()
+        return self.cold.step_statistics(cutoff_ms)
+
+    def prompt_statistics(self, cutoff_ms: int, top: int = 3) -> List[Dict[str, Any]]:
+        self.compact()
+        return self.cold.prompt_statistics(cutoff_ms, top)
+
+    def content_statistics(self) -> Dict[str, Any]:
+        self.compact()
+        return self.cold.content_statistics()
+
+    def search(self, query: str, limit: int = 20, session_id: Optional[str] = None,
+               raw: bool = False) -> List[SearchResult]:
+        self.compact()
+        return self.cold.search(query, limit, session_id, raw)
+
+    def index_output(self, session_id: str, chunks: Iterable[Tuple[str, int]]):
+        self.cold.index_output(session_id, chunks)
+
+    def reclaim_space(self):
+        self.cold.reclaim_space()
+
+    def change_token(self) -> Any:
+        segments = tuple((path.name, path.stat().st_size) for path in self._segments())
+        return segments, self.cold.change_token()
+
+    def close(self):
+        if self._active_fd is not None:
+            os.close(self._active_fd)
+            self._active_fd = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self.cold.close()
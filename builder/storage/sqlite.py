@@ -0,0 +1,609 @@
+"""
+SQLite storage backend
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple,
+                    TypeVar)
+
+from ..analytics import (apply_rollup, slowest_steps, step_statistics, step_throughput,
+                         summarize_rollups)
+from ..codec import from_ms, to_ms
+from ..exceptions import SessionError
+from ..migrations import content_hash, migrate
+from ..models import (BuildStep, SearchResult, Session, SessionDetail, SessionEvent,
+                      SessionStatus, StepStatus)
+from .base import (EVENT_RETENTIONS, SESSION_FIELDS, STEP_FIELDS, StorageBackend,
+                   check_fields)
+
+
+logger = logging.getLogger(__name__)
+
+# Backoff between retries of a write transaction that hit SQLITE_BUSY
+BUSY_RETRY_DELAY = 0.05
+BUSY_RETRY_MAX_DELAY = 2.0
+
+# Ids bound per bulk query, below SQLite's default host parameter limit
+BULK_CHUNK_SIZE = 500
+
+# Session columns feeding the statistics rollups
+ROLLUP_FIELDS = {'status', 'ended_at', 'metadata'}
+
+T = TypeVar('T')
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    """Whether an error means another connection holds the lock"""
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def _to_column(value: Any) -> Any:
+    """Convert a model value to its column representation"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return to_ms(value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+class SQLiteBackend(StorageBackend):
+    """Sessions in a SQLite database shared safely between processes"""
+
+    name = 'sqlite'
+
+    def __init__(self, config):
+        self.db_path = config.database_path
+        self.busy_timeout = float(config.get('database_busy_timeout', 30))
+        # Always at least one attempt, or writes would be silently skipped
+        self.busy_retries = max(int(config.get('database_busy_retries', 5)), 1)
+        self._batch_conn: Optional[sqlite3.Connection] = None
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize SQLite database and apply pending schema migrations"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            # WAL lets readers run alongside a writer; the mode is persistent
+            conn.execute('PRAGMA journal_mode = WAL')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if migrate(conn) != version:
+                # Migrations that rewrite tables leave their old pages free
+                conn.executescript('PRAGMA incremental_vacuum;')
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for multi-process access"""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def _write(self, body: Callable[[sqlite3.Connection], T]) -> T:
+        """Run ``body`` in a write transaction, retrying while the database is busy
+
+        The transaction takes the write lock up front (BEGIN IMMEDIATE) and
+        is rolled back before each retry, so ``body`` must compute the same
+        writes every time it runs. Inside batch() the batch's transaction
+        is used instead.
+        """
+        if self._batch_conn is not None:
+            return body(self._batch_conn)
+
+        delay = BUSY_RETRY_DELAY
+        for attempt in range(1, self.busy_retries + 1):
+            conn = self._connect()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                result = body(conn)
+                conn.commit()
+                return result
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                if not _is_busy(e) or attempt == self.busy_retries:
+                    raise
+                logger.debug(f"Database busy (attempt {attempt}), retrying in {delay:.2f}s")
+                time.sleep(delay + random.uniform(0, delay))
+                delay = min(delay * 2, BUSY_RETRY_MAX_DELAY)
+            finally:
+                conn.close()
+
+    @contextmanager
+    def batch(self):
+        """Group the writes made inside the block into one transaction"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self._batch_conn = conn
+            yield
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._batch_conn = None
+            conn.close()
+
+    def create_session(self, session: Session, steps: List[BuildStep],
+                       event: Optional[SessionEvent] = None,
+                       initial_prompt: Optional[str] = None) -> bool:
+        def insert(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute('''
+                INSERT OR IGNORE INTO sessions
+                (id, prompt_file, project_name, status, started_at, ended_at,
+                 current_step, total_steps, error, metadata, initial_prompt_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                session.id, session.prompt_file, session.project_name,
+                session.status.value, to_ms(session.started_at), to_ms(session.ended_at),
+                session.current_step, session.total_steps, session.error,
+                session.metadata_json, self._store_content(conn, initial_prompt)
+            ))
+            if cursor.rowcount == 0:
+                return False  # Already created by an earlier attempt
+
+            self._insert_steps(conn, session.id, steps)
+            self._apply_session_rollup(conn, session.id, 1)
+
+            if event:
+                self._insert_event(conn, event)
+            return True
+
+        return self._write(insert)
+
+    def _insert_steps(self, conn: sqlite3.Connection, session_id: str,
+                      steps: List[BuildStep]):
+        """Insert steps with their content inside an open write transaction"""
+        conn.executemany('''
+            INSERT INTO build_steps
+            (session_id, step_number, description, content_id, status,
+             started_at, completed_at, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(
+            session_id, step.step_number, step.description,
+            self._store_content(conn, step.content),
+            step.status.value, to_ms(step.started_at), to_ms(step.completed_at),
+            step.error
+        ) for step in steps])
+
+    def _store_content(self, conn: sqlite3.Connection, body: Optional[str]) -> Optional[int]:
+        """Id of the stored copy of ``body``, storing it if it is new"""
+        if body is None:
+            return None
+        digest = content_hash(body)
+        conn.execute('INSERT OR IGNORE INTO contents (hash, body) VALUES (?, ?)', (digest, body))
+        return conn.execute('SELECT id FROM contents WHERE hash = ?', (digest,)).fetchone()[0]
+
+    def get_session(self, session_id: str) -> Optional[Session]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(
+                'SELECT * FROM sessions WHERE id = ?', (session_id,)
+            )
+            row = cursor.fetchone()
+
+            if not row:
+                return None
+
+            return self._session_from_row(row)
+
+    def get_initial_prompt(self, session_id: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute('''
+                SELECT c.body FROM sessions s
+                JOIN contents c ON c.id = s.initial_prompt_id
+                WHERE s.id = ?
+            ''', (session_id,)).fetchone()
+            return row[0] if row else None
+
+    def _session_from_row(self, row: sqlite3.Row) -> Session:
+        """Convert database row to Session object"""
+        return Session(
+            id=row['id'],
+            prompt_file=row['prompt_file'],
+            project_name=row['project_name'],
+            status=SessionStatus(row['status']),
+            started_at=from_ms(row['started_at']),
+            ended_at=from_ms(row['ended_at']),
+            current_step=row['current_step'],
+            total_steps=row['total_steps'],
+            error=row['error'],
+            metadata_json=row['metadata']
+        )
+
+    def list_sessions(self, status: Optional[SessionStatus] = None,
+                      before: Optional[Tuple[int, str]] = None,
+                      limit: Optional[int] = None) -> List[Session]:
+        # Keyset paging on (started_at, id) is served by idx_sessions_started,
+        # and status filters by idx_sessions_status
+        where = []
+        params: List[Any] = []
+        if status is not None:
+            where.append('status = ?')
+            params.append(status.value)
+        if before is not None:
+            where.append('(started_at, id) < (?, ?)')
+            params.extend(before)
+
+        sql = 'SELECT * FROM sessions'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY started_at DESC, id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [self._session_from_row(row) for row in conn.execute(sql, params)]
+
+    def count_sessions(self) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute('SELECT COUNT(*) FROM sessions')
+            return cursor.fetchone()[0]
+
+    def update_session(self, session_id: str, changes: Dict[str, Any],
+                       event: Optional[SessionEvent] = None):
+        check_fields(changes, SESSION_FIELDS)
+
+        def update(conn: sqlite3.Connection):
+            self._update_session(conn, session_id, changes)
+            if event:
+                self._insert_event(conn, event)
+
+        self._write(update)
+
+    def _update_session(self, conn: sqlite3.Connection, session_id: str,
+                        changes: Dict[str, Any]):
+        """Apply session changes inside an open write transaction"""
+        if not changes:
+            return
+
+        # Move the session's contribution between rollup buckets in the
+        # same transaction as the change
+        rollup = bool(ROLLUP_FIELDS & set(changes))
+        if rollup:
+            self._apply_session_rollup(conn, session_id, -1)
+
+        assignments = ', '.join(f'{column} = ?' for column in changes)
+        conn.execute(
+            f'UPDATE sessions SET {assignments} WHERE id = ?',
+            [_to_column(value) for value in changes.values()] + [session_id]
+        )
+
+        if rollup:
+            self._apply_session_rollup(conn, session_id, 1)
+
+    def _apply_session_rollup(self, conn: sqlite3.Connection, session_id: str, sign: int):
+        """Add or remove a session's current state from the statistics rollups"""
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        row = cursor.execute('''
+            SELECT started_at, ended_at, status, prompt_file, metadata
+            FROM sessions WHERE id = ?
+        ''', (session_id,)).fetchone()
+
+        if row:
+            apply_rollup(conn, row, sign)
+
+    def update_step(self, session_id: str, step_number: int, changes: Dict[str, Any],
+                    session_changes: Optional[Dict[str, Any]] = None,
+                    event: Optional[SessionEvent] = None):
+        check_fields(changes, STEP_FIELDS)
+        check_fields(session_changes or {}, SESSION_FIELDS)
+
+        def update(conn: sqlite3.Connection):
+            if changes:
+                assignments = ', '.join(f'{column} = ?' for column in changes)
+                conn.execute(
+                    f'UPDATE build_steps SET {assignments} '
+                    f'WHERE session_id = ? AND step_number = ?',
+                    [_to_column(value) for value in changes.values()]
+                    + [session_id, step_number]
+                )
+            self._update_session(conn, session_id, session_changes or {})
+            if event:
+                self._insert_event(conn, event)
+
+        self._write(update)
+
+    def replace_steps(self, session_id: str, from_step: int, steps: List[BuildStep],
+                      event: Optional[SessionEvent] = None):
+        def replace(conn: sqlite3.Connection):
+            conn.execute('DELETE FROM build_steps WHERE session_id = ? AND step_number >= ?',
+                         (session_id, from_step))
+            self._insert_steps(conn, session_id, steps)
+            conn.execute('''
+                UPDATE sessions SET total_steps =
+                    (SELECT COUNT(*) FROM build_steps WHERE session_id = ?)
+                WHERE id = ?
+            ''', (session_id, session_id))
+            if event:
+                self._insert_event(conn, event)
+
+        self._write(replace)
+
+    def append_event(self, event: SessionEvent) -> int:
+        return self._write(lambda conn: self._insert_event(conn, event))
+
+    def _insert_event(self, conn: sqlite3.Connection, event: SessionEvent) -> int:
+        """Insert an event inside an open write transaction"""
+        cursor = conn.execute('''
+            INSERT OR IGNORE INTO session_events (id, session_id, timestamp, event_type, data)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (event.id, event.session_id, to_ms(event.timestamp), event.event_type,
+              event.data_json))
+        return event.id if event.id is not None else cursor.lastrowid
+
+    def last_event_id(self) -> int:
+        """Highest event id ever allocated, including deleted events"""
+        with self._connect() as conn:
+            row = conn.execute('''
+                SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence
+                                     WHERE name = 'session_events'), 0),
+                           COALESCE((SELECT MAX(id) FROM session_events), 0))
+            ''').fetchone()
+            return row[0]
+
+    def iter_events(self, session_id: str, after: int = 0,
+                    limit: Optional[int] = None) -> Iterator[SessionEvent]:
+        conn = self._connect()
+        try:
+            # Plain tuples and undecoded data keep streaming large logs cheap
+            cursor = conn.execute('''
+                SELECT session_id, timestamp, event_type, data, id FROM session_events
+                WHERE session_id = ? AND id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (session_id, after or 0, -1 if limit is None else limit))
+
+            for session_id, timestamp, event_type, data, event_id in cursor:
+                yield SessionEvent(session_id, from_ms(timestamp), event_type,
+                                   id=event_id, data_json=data)
+        finally:
+            conn.close()
+
+    def iter_steps(self, session_id: str) -> Iterator[BuildStep]:
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute('''
+                SELECT b.*, c.body AS content FROM build_steps b
+                LEFT JOIN contents c ON c.id = b.content_id
+                WHERE b.session_id = ?
+                ORDER BY b.step_number
+            ''', (session_id,))
+
+            for row in cursor:
+                yield self._step_from_row(row)
+        finally:
+            conn.close()
+
+    def _step_from_row(self, row: sqlite3.Row) -> BuildStep:
+        """Convert database row to BuildStep object"""
+        return BuildStep(
+            session_id=row['session_id'],
+            step_number=row['step_number'],
+            description=row['description'],
+            content=row['content'],
+            status=StepStatus(row['status']),
+            started_at=from_ms(row['started_at']),
+            completed_at=from_ms(row['completed_at']),
+            error=row['error']
+        )
+
+    def load_sessions(self, session_ids: Sequence[str]) -> Dict[str, SessionDetail]:
+        """Load sessions with their steps and per-type event counts, keyed by id
+
+        Each chunk of ids costs two queries: sessions with their event
+        counts, then all of their steps.
+        """
+        ids = list(dict.fromkeys(session_ids))
+        details: Dict[str, SessionDetail] = {}
+
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            for start in range(0, len(ids), BULK_CHUNK_SIZE):
+                chunk = ids[start:start + BULK_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+
+                cursor = conn.execute(f'''
+                    SELECT s.*, (
+                        SELECT json_group_object(event_type, n) FROM (
+                            SELECT event_type, COUNT(*) AS n FROM session_events e
+                            WHERE e.session_id = s.id
+                            GROUP BY event_type
+                        )
+                    ) AS event_counts
+                    FROM sessions s
+                    WHERE s.id IN ({placeholders})
+                ''', chunk)
+                for row in cursor:
+                    details[row['id']] = SessionDetail(
+                        self._session_from_row(row),
+                        event_counts=json.loads(row['event_counts'])
+                    )
+
+                cursor = conn.execute(f'''
+                    SELECT b.*, c.body AS content FROM build_steps b
+                    LEFT JOIN contents c ON c.id = b.content_id
+                    WHERE b.session_id IN ({placeholders})
+                    ORDER BY b.session_id, b.step_number
+                ''', chunk)
+                for row in cursor:
+                    details[row['session_id']].steps.append(self._step_from_row(row))
+
+        return details
+
+    def prune_events(self, session_id: str, retention: str, every: int = 10) -> int:
+        if retention not in EVENT_RETENTIONS:
+            raise SessionError(f"Unknown event retention: {retention}")
+
+        def prune(conn: sqlite3.Connection) -> int:
+            if retention == 'delete':
+                cursor = conn.execute(
+                    'DELETE FROM session_events WHERE session_id = ?',
+                    (session_id,)
+                )
+            else:
+                # Keep the first, last and every Nth event of each type
+                cursor = conn.execute('''
+                    DELETE FROM session_events WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id,
+                                   ROW_NUMBER() OVER (PARTITION BY event_type ORDER BY id) AS n,
+                                   COUNT(*) OVER (PARTITION BY event_type) AS total
+                            FROM session_events
+                            WHERE session_id = ?
+                        )
+                        WHERE (n - 1) % ? != 0 AND n != total
+                    )
+                ''', (session_id, every))
+            return cursor.rowcount
+
+        return self._write(prune)
+
+    def reclaim_space(self):
+        # executescript steps the pragma to completion; a plain execute
+        # frees a single page
+        with self._connect() as conn:
+            conn.executescript('PRAGMA incremental_vacuum;')
+
+    def summarize_sessions(self, cutoff_day: str) -> Dict[str, Any]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(
+                'SELECT * FROM session_rollups WHERE day >= ?',
+                (cutoff_day,)
+            )
+            return summarize_rollups(cursor, SessionStatus.COMPLETED.value)
+
+    def step_statistics(self, cutoff_ms: int) -> Dict[str, Any]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return {
+                'steps': step_statistics(conn, cutoff_ms),
+                'throughput': step_throughput(conn, cutoff_ms)
+            }
+
+    def prompt_statistics(self, cutoff_ms: int, top: int = 3) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return slowest_steps(conn, cutoff_ms, top)
+
+    def content_statistics(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('''
+                WITH refs AS (
+                    SELECT content_id AS id FROM build_steps WHERE content_id IS NOT NULL
+                    UNION ALL
+                    SELECT initial_prompt_id FROM sessions WHERE initial_prompt_id IS NOT NULL
+                )
+                SELECT
+                    (SELECT COUNT(*) FROM refs) AS reference_count,
+                    (SELECT COUNT(*) FROM contents) AS unique_bodies,
+                    (SELECT COALESCE(SUM(LENGTH(CAST(c.body AS BLOB))), 0)
+                     FROM refs JOIN contents c ON c.id = refs.id) AS logical_bytes,
+                    (SELECT COALESCE(SUM(LENGTH(CAST(body AS BLOB))), 0)
+                     FROM contents) AS stored_bytes
+            ''').fetchone()
+            stats = dict(row)
+            stats['saved_bytes'] = stats['logical_bytes'] - stats['stored_bytes']
+
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            stats['database_bytes'] = conn.execute('PRAGMA page_count').fetchone()[0] * page_size
+            stats['free_bytes'] = conn.execute('PRAGMA freelist_count').fetchone()[0] * page_size
+            return stats
+
+    def index_output(self, session_id: str, chunks: Iterable[Tuple[str, int]]):
+        def index(conn: sqlite3.Connection):
+            # Re-indexing replaces any earlier snapshot of the output
+            conn.execute('DELETE FROM output_fts WHERE session_id = ?', (session_id,))
+            conn.executemany(
+                'INSERT INTO output_fts (body, session_id, chunk) VALUES (?, ?, ?)',
+                ((body, session_id, chunk) for body, chunk in chunks)
+            )
+
+        self._write(index)
+
+    def search(self, query: str, limit: int = 20, session_id: Optional[str] = None,
+               raw: bool = False) -> List[SearchResult]:
+        """Full-text search over steps, initial prompts, event payloads and captured output
+
+        Unless ``raw`` is set, every word of ``query`` is matched literally;
+        with ``raw`` the query is passed through as FTS5 query syntax.
+        """
+        if not raw:
+            query = ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+        if not query:
+            return []
+
+        def session_filter(column: str) -> str:
+            return f'AND {column} = :session_id' if session_id else ''
+
+        # Step bodies and prompts are indexed once per distinct content and
+        # joined back to every step or session using it. A step matching
+        # on both description and body is reported once, at its best rank.
+        sql = f'''
+            SELECT * FROM (
+                SELECT session_id, source, ref, snippet, MIN(rank) AS rank FROM (
+                    SELECT session_id, 'step' AS source, step_number AS ref,
+                           snippet(steps_fts, 0, '[', ']', '…', 12) AS snippet,
+                           bm25(steps_fts) AS rank
+                    FROM steps_fts WHERE steps_fts MATCH :query {session_filter('session_id')}
+                    UNION ALL
+                    SELECT b.session_id, 'step', b.step_number,
+                           snippet(contents_fts, 0, '[', ']', '…', 12), bm25(contents_fts)
+                    FROM contents_fts JOIN build_steps b ON b.content_id = contents_fts.rowid
+                    WHERE contents_fts MATCH :query {session_filter('b.session_id')}
+                )
+                GROUP BY session_id, ref
+                UNION ALL
+                SELECT s.id, 'prompt', 0,
+                       snippet(contents_fts, 0, '[', ']', '…', 12), bm25(contents_fts)
+                FROM contents_fts JOIN sessions s ON s.initial_prompt_id = contents_fts.rowid
+                WHERE contents_fts MATCH :query {session_filter('s.id')}
+                UNION ALL
+                SELECT session_id, 'event', rowid,
+                       snippet(events_fts, 0, '[', ']', '…', 12), bm25(events_fts)
+                FROM events_fts WHERE events_fts MATCH :query {session_filter('session_id')}
+                UNION ALL
+                SELECT session_id, 'output', chunk,
+                       snippet(output_fts, 0, '[', ']', '…', 12), bm25(output_fts)
+                FROM output_fts WHERE output_fts MATCH :query {session_filter('session_id')}
+            )
+            ORDER BY rank
+            LIMIT :limit
+        '''
+
+        with self._connect() as conn:
+            try:
+                cursor = conn.execute(sql, {
+                    'query': query, 'session_id': session_id, 'limit': limit
+                })
+            except sqlite3.OperationalError as e:
+                raise SessionError(f"Search failed: {e}")
+
+            return [SearchResult(*row) for row in cursor]
+
+    def change_token(self) -> Optional[int]:
+        # data_version only changes for commits made by other connections,
+        # so it needs one long-lived connection to compare against
+        if self._version_conn is None:
+            self._version_conn = self._connect()
+        return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        if self._version_conn is not None:
+            self._version_conn.close()
+            self._version_conn = None
@@ -0,0 +1,98 @@
+"""
+Tokenizer and parser for text-format build prompts
+
+A text prompt has a ``# Raivyn [build]`` section, whose text up to the next
+``#`` heading is the initial prompt, and numbered ``N. step`` lines. Each
+line is classified once, so parsing is linear in the size of the file and
+can read it as a stream.
+"""
+
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .exceptions import PromptError
+
+
+BUILD_MARKER = '# Raivyn [build]'
+STEP_LINE = re.compile(r'(\d+)\.(?:\s|$)')
+
+# Token kinds
+MARKER = 'marker'
+HEADING = 'heading'
+STEP = 'step'
+TEXT = 'text'
+
+
+class Token(NamedTuple):
+    """One classified line of a text prompt"""
+    kind: str
+    line: int  # 1-based
+    column: int  # 1-based column where ``value`` starts
+    value: str  # Step text, text after the build marker, or the whole line
+    raw: str  # The line without its newline
+    number: Optional[int] = None  # Step number
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[Token]:
+    """Classify each line as the build marker, a heading, a numbered step or text
+
+    Only the first line containing the build marker is a marker; later ones
+    are headings or text like any other line.
+    """
+    marker_seen = False
+    for line_number, line in enumerate(lines, 1):
+        raw = line.rstrip('\n')
+
+        if not marker_seen and BUILD_MARKER in raw:
+            marker_seen = True
+            start = raw.index(BUILD_MARKER) + len(BUILD_MARKER)
+            yield Token(MARKER, line_number, start + 1, raw[start:], raw)
+            continue
+
+        if raw.startswith('#'):
+            yield Token(HEADING, line_number, 1, raw, raw)
+            continue
+
+        match = STEP_LINE.match(raw)
+        if match:
+            rest = raw[match.end(1) + 1:]
+            text = rest.lstrip()
+            column = match.end(1) + 2 + len(rest) - len(text)
+            yield Token(STEP, line_number, column, text.rstrip(), raw, int(match.group(1)))
+            continue
+
+        yield Token(TEXT, line_number, 1, raw, raw)
+
+
+def parse(lines: Iterable[str], source: str) -> Tuple[str, List[Token]]:
+    """Parse a text prompt into its initial prompt and step tokens
+
+    ``source`` names the file in error messages, which carry the line and
+    column of the offending text where there is one.
+    """
+    build_lines = None
+    in_build = False
+    steps = []
+
+    for token in tokenize(lines):
+        if token.kind == MARKER:
+            build_lines = [token.value]
+            in_build = True
+            continue
+        if token.kind == HEADING:
+            in_build = False
+        elif in_build:
+            build_lines.append(token.raw)
+
+        if token.kind == STEP:
+            if not token.value:
+                raise PromptError(f"{source}:{token.line}:{token.column}: "
+                                  f"Step {token.number} has no text")
+            steps.append(token)
+
+    if build_lines is None:
+        raise PromptError(f"No '{BUILD_MARKER}' section found in {source}")
+    if not steps:
+        raise PromptError(f"No numbered steps found in {source}")
+
+    return '\n'.join(build_lines).strip(), steps
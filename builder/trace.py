@@ -0,0 +1,281 @@
+"""
+Timeline traces of build sessions in Chrome Trace Event format
+
+A Tracer keeps spans and instant events in memory as tuples and appends
+them to the session's trace.json in batches. The file is in the JSON array
+form, whose closing bracket is optional, so a trace can be opened while the
+build runs or after a crash, and a resumed session appends to it. Open it
+in https://ui.perfetto.dev or chrome://tracing.
+"""
+
+import functools
+import inspect
+import json
+import os
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .exceptions import SessionError
+
+
+TRACE_FILE_NAME = 'trace.json'
+
+# Buffered events written out at once
+DEFAULT_FLUSH_EVENTS = 10_000
+
+# Rows in the trace viewer, by event category
+TRACKS = {
+    'build': (1, 'Build'),
+    'step': (2, 'Steps'),
+    'idle': (3, 'Idle windows and nudges'),
+    'detect': (4, 'Detection checks'),
+    'claude': (5, 'Claude and tmux'),
+    'db': (6, 'Database writes'),
+    'monitor': (7, 'Event loop and process'),
+}
+OTHER_TRACK = (8, 'Other')
+
+# Tracer of the build running in the current task
+current_tracer: ContextVar[Optional['Tracer']] = ContextVar('builder_tracer', default=None)
+
+
+class _Span:
+    """Context manager recording one complete ("X") event
+
+    Entering returns the event's args, so the traced code can add results.
+    """
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> Dict[str, Any]:
+        self.start = self.tracer.now()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        now = self.tracer.now()
+        self.tracer.record('X', self.name, self.category, self.start, now - self.start,
+                           self.args)
+        return False
+
+
+class _NoSpan:
+    """Stand-in for _Span when no build is being traced"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> Dict[str, Any]:
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """In-memory buffer of one session's trace events, appended to its trace file"""
+
+    def __init__(self, path: Path, title: str, flush_events: int = DEFAULT_FLUSH_EVENTS):
+        self.path = Path(path)
+        self.title = title
+        self.flush_events = flush_events
+        self._events: List[Tuple] = []
+        self._started = False
+        # Timestamps are wall-clock microseconds, so a resumed session's
+        # events line up with the earlier ones, but measured on the
+        # monotonic clock
+        self._offset_us = time.time_ns() // 1000 - time.perf_counter_ns() // 1000
+
+    @classmethod
+    def for_session(cls, config, session) -> Optional['Tracer']:
+        """Tracer writing to the session's trace file, or None if tracing is off"""
+        if not config.get('trace_sessions', True):
+            return None
+        return cls(config.session_dir(session.id) / TRACE_FILE_NAME,
+                   f"{session.project_name} ({session.id[:8]})",
+                   config.get('trace_buffer_events', DEFAULT_FLUSH_EVENTS))
+
+    def now(self) -> int:
+        """Current time in trace microseconds"""
+        return time.perf_counter_ns() // 1000 + self._offset_us
+
+    def record(self, phase: str, name: str, category: str, ts: int, dur: int = 0,
+               args: Optional[Dict[str, Any]] = None):
+        self._events.append((phase, name, category, ts, dur, args))
+        if len(self._events) >= self.flush_events:
+            self.flush()
+
+    def span(self, name: str, category: str, **args) -> _Span:
+        return _Span(self, name, category, args)
+
+    def instant(self, name: str, category: str, **args):
+        self.record('i', name, category, self.now(), 0, args)
+
+    def begin(self, name: str, category: str, **args):
+        """Open a span closed by end(); for spans that do not fit a with block"""
+        self.record('B', name, category, self.now(), 0, args)
+
+    def end(self, name: str, category: str, **args):
+        self.record('E', name, category, self.now(), 0, args)
+
+    def complete(self, name: str, category: str, start: float, end: float, **args):
+        """Record a span that has already ended, from wall-clock seconds"""
+        ts = int(start * 1_000_000)
+        self.record('X', name, category, ts, max(int(end * 1_000_000) - ts, 0), args)
+
+    def _header(self) -> List[Dict[str, Any]]:
+        """Metadata naming the process and the tracks"""
+        pid = os.getpid()
+        events = [{'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0,
+                   'args': {'name': self.title}}]
+        for tid, label in list(TRACKS.values()) + [OTHER_TRACK]:
+            events.append({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid,
+                           'args': {'name': label}})
+            events.append({'ph': 'M', 'name': 'thread_sort_index', 'pid': pid, 'tid': tid,
+                           'args': {'sort_index': tid}})
+        return events
+
+    def _encode(self, event: Tuple, pid: int) -> Dict[str, Any]:
+        phase, name, category, ts, dur, args = event
+        record = {'ph': phase, 'name': name, 'cat': category, 'ts': ts, 'pid': pid,
+                  'tid': TRACKS.get(category, OTHER_TRACK)[0]}
+        if phase == 'X':
+            record['dur'] = dur
+        elif phase == 'i':
+            record['s'] = 't'
+        if args:
+            record['args'] = args
+        return record
+
+    def flush(self):
+        """Append buffered events to the trace file"""
+        if not self._events and self._started:
+            return
+        events, self._events = self._events, []
+        pid = os.getpid()
+        records = [self._encode(event, pid) for event in events]
+        if not self._started:
+            records = self._header() + records
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a+b') as f:
+            # Reopen a closed trace (a resumed session) by dropping its bracket
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size:
+                f.seek(max(size - 8, 0))
+                tail = f.read()
+                if tail.rstrip().endswith(b']'):
+                    f.truncate(size - len(tail) + tail.rstrip().rindex(b']'))
+                    f.seek(0, os.SEEK_END)
+            f.write(b',\n' if size else b'[\n')
+            f.write(',\n'.join(json.dumps(record, default=str)
+                               for record in records).encode('utf-8'))
+        self._started = True
+
+    def close(self):
+        """Write out the buffer and the closing bracket"""
+        self.flush()
+        with open(self.path, 'ab') as f:
+            f.write(b'\n]\n')
+
+
+def span(name: str, category: str, **args):
+    """Span in the current build's trace, if one is being traced"""
+    tracer = current_tracer.get()
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, category, **args)
+
+
+def instant(name: str, category: str, **args):
+    """Instant event in the current build's trace, if one is being traced"""
+    tracer = current_tracer.get()
+    if tracer is not None:
+        tracer.instant(name, category, **args)
+
+
+def traced(category: str, name: Optional[str] = None) -> Callable:
+    """Decorator recording each call of a function or coroutine function as a span"""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with span(span_name, category):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with span(span_name, category):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def load_trace(path: Path) -> List[Dict[str, Any]]:
+    """Read a trace file, whether or not it has been closed"""
+    try:
+        text = Path(path).read_text(encoding='utf-8').rstrip()
+    except FileNotFoundError:
+        raise SessionError(f"No trace recorded at {path}")
+    if not text:
+        return []
+    if not text.endswith(']'):
+        text = text.rstrip(',') + ']'
+    return json.loads(text)
+
+
+def summarize_trace(events: List[Dict[str, Any]], top: int = 10) -> Dict[str, Any]:
+    """Total time per category and the longest spans
+
+    Spans nested in another span of the same category (a tmux command
+    inside a send) are not added to its total a second time.
+    """
+    spans = []
+    open_spans = defaultdict(list)
+    for event in events:
+        phase = event.get('ph')
+        if phase == 'X':
+            spans.append((event['ts'], event['ts'] + event.get('dur', 0),
+                          event.get('cat', ''), event['name']))
+        elif phase == 'B':
+            open_spans[(event.get('tid'), event['name'])].append(event)
+        elif phase == 'E':
+            stack = open_spans.get((event.get('tid'), event['name']))
+            if stack:
+                began = stack.pop()
+                spans.append((began['ts'], event['ts'], began.get('cat', ''), began['name']))
+
+    timed = [event['ts'] for event in events if 'ts' in event]
+    by_category: Dict[str, Dict[str, int]] = defaultdict(lambda: {'us': 0, 'spans': 0})
+    covered_until: Dict[str, int] = {}
+    for start, end, category, _ in sorted(spans):
+        totals = by_category[category]
+        totals['spans'] += 1
+        start = max(start, covered_until.get(category, start))
+        if end > start:
+            totals['us'] += end - start
+            covered_until[category] = end
+
+    longest = sorted(spans, key=lambda s: s[0] - s[1])[:top]
+    return {
+        'events': len(events),
+        'wall_us': (max(timed) - min(timed)) if timed else 0,
+        'categories': dict(sorted(by_category.items(), key=lambda item: -item[1]['us'])),
+        'longest': [{'name': name, 'category': category, 'us': end - start}
+                    for start, end, category, name in longest],
+    }
@@ -3,30 +3,57 @@ Utility functions for Builder
 """
 
 import logging
-import sys
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 
-def setup_logging(level: str = 'INFO'):
-    """Setup logging configuration"""
-    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    date_format = '%Y-%m-%d %H:%M:%S'
+class DeferredLogPipeline(logging.Handler):
+    """Root handler that builds the queued log pipeline on the first record
+
+    Commands that log nothing skip importing logging.handlers, starting the
+    listener thread and creating log files. A forked child builds its own
+    pipeline, since the parent's listener thread does not exist there.
+    """
+    
+    def __init__(self, config=None):
+        super().__init__()
+        self.config = config
+        self.pipeline = None
+        self._pid = None
+    
+    def emit(self, record: logging.LogRecord):
+        if self.pipeline is None or self._pid != os.getpid():
+            import atexit
+            from .log_pipeline import LogPipeline
+            
+            self.pipeline = LogPipeline(self.config)
+            self.pipeline.start()
+            self._pid = os.getpid()
+            atexit.register(self.pipeline.stop)
+        self.pipeline.handler.handle(record)
+    
+    def close(self):
+        if self.pipeline is not None and self._pid == os.getpid():
+            self.pipeline.stop()
+        super().close()
+
+
+def setup_logging(level: str = 'INFO', config=None):
+    """Setup logging configuration
     
+    Records are handed to a background thread that writes the console, the
+    size-rotated main log and, with ``config``, per-session log files.
+    """
     # Convert string level to logging constant
     numeric_level = getattr(logging, level.upper(), logging.INFO)
     
-    # Configure root logger
-    logging.basicConfig(
-        level=numeric_level,
-        format=log_format,
-        datefmt=date_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler(f'builder_{datetime.now().strftime("%Y%m%d")}.log')
-        ]
-    )
+    # Configure root logger, once
+    root = logging.getLogger()
+    root.setLevel(numeric_level)
+    if not root.handlers:
+        root.addHandler(DeferredLogPipeline(config))
     
     # Set specific loggers
     logging.getLogger('asyncio').setLevel(logging.WARNING)
@@ -37,6 +37,7 @@ setup(
         'dev': [
             'pytest>=6.0',
             'pytest-asyncio>=0.18',
+            'pytest-benchmark>=3.4',
             'black>=22.0',
             'flake8>=4.0',
             'mypy>=0.910',
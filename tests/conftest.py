@@ -0,0 +1,53 @@
+"""
+Shared fixtures: configurations pointing at scratch storage
+"""
+
+from pathlib import Path
+
+import pytest
+
+from builder.config import Config
+from builder.prompt_manager import BuildPrompt, BuildStep
+
+
+def _make_config(root: Path, backend: str = 'sqlite') -> Config:
+    """Configuration keeping the database, segments and sessions under ``root``"""
+    config = Config()
+    config.set('storage_backend', backend)
+    config.set('database_path', str(root / 'builder.db'))
+    config.set('segment_log_dir', str(root / 'segments'))
+    config.set('sessions_dir', str(root / 'sessions'))
+    config.set('use_daemon', False)
+    return config
+
+
+def _make_prompt(steps: int = 3) -> BuildPrompt:
+    return BuildPrompt(
+        name='Test',
+        filename='test.yaml',
+        format='yaml',
+        initial_prompt='Test prompt',
+        steps=[BuildStep(number=i, content=f'Step {i} content', description=f'Step {i}')
+               for i in range(1, steps + 1)]
+    )
+
+
+@pytest.fixture
+def make_config():
+    """Factory for configurations under a given root, for tests needing several"""
+    return _make_config
+
+
+@pytest.fixture
+def make_prompt():
+    return _make_prompt
+
+
+@pytest.fixture
+def config(tmp_path) -> Config:
+    return _make_config(tmp_path)
+
+
+@pytest.fixture
+def prompt() -> BuildPrompt:
+    return _make_prompt()
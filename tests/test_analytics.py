@@ -0,0 +1,171 @@
+"""
+Session duration percentiles and per-step and per-prompt analytics
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from builder.analytics import DurationSketch
+from builder.exceptions import SessionError
+from builder.models import BuildStep, Session, SessionEvent, SessionStatus, StepStatus
+from builder.session_manager import SessionManager
+
+
+def _finished_session(storage, session_id: str, minutes: float,
+                      status: SessionStatus = SessionStatus.COMPLETED):
+    started = datetime.now() - timedelta(hours=3)
+    storage.create_session(Session(
+        id=session_id, prompt_file='app.yaml', project_name='App', status=SessionStatus.ACTIVE,
+        started_at=started, ended_at=None, current_step=0, total_steps=1, error=None,
+        metadata={'profile': 'normal'}
+    ), [BuildStep(session_id=session_id, step_number=1, description='Step 1', content='Build it',
+                  status=StepStatus.PENDING, started_at=None, completed_at=None, error=None)])
+    for n in range(30):
+        storage.append_event(SessionEvent(session_id=session_id, timestamp=started,
+                                          event_type='output_received', data={'n': n}))
+    storage.update_session(session_id, {'status': status,
+                                        'ended_at': started + timedelta(minutes=minutes)})
+
+
+@pytest.mark.parametrize('values, q, expected', [
+    ([1000] * 10, 0.5, 1000),
+    (list(range(1, 101)), 0.5, 50),
+    (list(range(1, 101)), 0.95, 95),
+    ([10, 20, 30, 40, 1_000_000], 0.5, 30),
+])
+def test_sketch_quantiles_within_relative_error(values, q, expected):
+    sketch = DurationSketch()
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.quantile(q) == pytest.approx(expected, rel=0.05)
+
+
+def test_sketch_removal_merge_and_round_trip():
+    sketch = DurationSketch()
+    assert sketch.quantile(0.5) is None
+    for value in (100, 200, 300):
+        sketch.add(value)
+    sketch.add(300, -1)
+    assert sketch.count == 2
+
+    other = DurationSketch.from_json(sketch.to_json())
+    assert other.buckets == sketch.buckets
+    other.merge(sketch)
+    assert other.count == 4
+    assert other.quantile(0.99) == pytest.approx(200, rel=0.05)
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def session_manager(request, tmp_path, make_config):
+    session_manager = SessionManager(make_config(tmp_path, request.param))
+    yield session_manager
+    session_manager.close()
+
+
+def _percentiles(session_manager: SessionManager):
+    return session_manager.get_statistics()['duration_percentiles_minutes']
+
+
+def test_duration_percentiles(session_manager):
+    for n in range(1, 11):
+        _finished_session(session_manager.storage, f's{n}', minutes=10 * n)
+    _finished_session(session_manager.storage, 'failed', minutes=500, status=SessionStatus.FAILED)
+
+    stats = session_manager.get_statistics()
+    assert stats['total_sessions'] == 11
+    assert stats['average_duration_minutes'] == 55
+    # Only completed sessions count towards durations
+    percentiles = stats['duration_percentiles_minutes']
+    assert percentiles['p50'] == pytest.approx(50, rel=0.05)
+    assert percentiles['p90'] == pytest.approx(90, rel=0.05)
+    assert percentiles['p99'] == pytest.approx(90, rel=0.05)
+
+
+def test_percentiles_survive_archiving_and_pruning(session_manager):
+    session_manager.config.set('archive_event_retention', 'downsample')
+    for n in range(1, 11):
+        _finished_session(session_manager.storage, f's{n}', minutes=10 * n)
+    before = session_manager.get_statistics()
+
+    for n in range(1, 6):
+        session_manager.archive_session(f's{n}')
+    session_manager.storage.prune_events('s10', 'delete')
+
+    assert len(list(session_manager.iter_session_events('s1'))) < 30
+    after = session_manager.get_statistics()
+    assert after['duration_percentiles_minutes'] == before['duration_percentiles_minutes']
+    assert after['status_breakdown'] == before['status_breakdown'] == {'completed': 10}
+    assert after['average_duration_minutes'] == before['average_duration_minutes']
+
+
+def _build_run(storage, session_id: str, step_minutes, nudge_steps=()):
+    """A finished run of prompt.yaml whose steps took ``step_minutes``
+
+    The last step never completes, so it ends when the session does.
+    """
+    started = datetime.now() - timedelta(hours=3)
+    step_starts = [started]
+    for minutes in step_minutes:
+        step_starts.append(step_starts[-1] + timedelta(minutes=minutes))
+    last = len(step_minutes)
+
+    storage.create_session(Session(
+        id=session_id, prompt_file='prompt.yaml', project_name='App',
+        status=SessionStatus.ACTIVE, started_at=started, ended_at=None, current_step=last,
+        total_steps=last, error=None, metadata={}
+    ), [BuildStep(session_id=session_id, step_number=n, description=f'Step {n}',
+                  content=f'Do part {n}', status=StepStatus.COMPLETED,
+                  started_at=step_starts[n - 1],
+                  completed_at=step_starts[n] if n < last else None, error=None)
+        for n in range(1, last + 1)])
+    for n in nudge_steps:
+        storage.append_event(SessionEvent(session_id=session_id,
+                                          timestamp=step_starts[n - 1] + timedelta(seconds=30),
+                                          event_type='idle_continue_sent', data={}))
+    storage.update_session(session_id, {'status': SessionStatus.COMPLETED,
+                                        'ended_at': step_starts[-1]})
+
+
+@pytest.fixture
+def sqlite_manager(config):
+    session_manager = SessionManager(config)
+    for session_id, step_two, nudges in (('r1', 2, (2, 2)), ('r2', 4, ()), ('r3', 6, (3,))):
+        _build_run(session_manager.storage, session_id, [1, step_two, 5], nudges)
+    yield session_manager
+    session_manager.close()
+
+
+def test_step_statistics(sqlite_manager):
+    stats = sqlite_manager.get_step_statistics()
+    steps = {row['step_number']: row for row in stats['steps']}
+
+    assert set(steps) == {1, 2, 3}
+    assert all(row['prompt_file'] == 'prompt.yaml' and row['runs'] == 3
+               for row in steps.values())
+    minute = 60_000
+    assert (steps[1]['min_ms'], steps[1]['max_ms']) == (minute, minute)
+    assert (steps[2]['min_ms'], steps[2]['p50_ms'], steps[2]['p90_ms'],
+            steps[2]['max_ms']) == (2 * minute, 4 * minute, 4 * minute, 6 * minute)
+    assert steps[2]['avg_ms'] == 4 * minute
+    # The unfinished last step runs until the session ends
+    assert steps[3]['finished_runs'] == 3
+    assert steps[3]['p50_ms'] == 5 * minute
+    # Nudges belong to the step running when they were sent
+    assert [steps[n]['nudges'] for n in (1, 2, 3)] == [0, 2, 1]
+    assert sum(hour['steps'] for hour in stats['throughput']) == 9
+
+
+def test_prompt_statistics_ranks_the_slowest_steps(sqlite_manager):
+    [first, second] = sqlite_manager.get_prompt_statistics(top=2)['prompts']
+
+    # Step 3 is the slowest in two of the three runs, step 2 in the other
+    assert (first['step_number'], first['slowest_runs'], first['prompt_runs']) == (3, 2, 3)
+    assert (second['step_number'], second['slowest_runs']) == (2, 1)
+
+
+def test_step_analytics_unsupported_without_sql(tmp_path, make_config):
+    session_manager = SessionManager(make_config(tmp_path, 'memory'))
+    with pytest.raises(SessionError):
+        session_manager.get_step_statistics()
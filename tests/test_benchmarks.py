@@ -0,0 +1,115 @@
+"""
+pytest-benchmark suite for the hot paths of a build
+
+Runs with the rest of the tests; ``--benchmark-skip`` leaves it out and
+``--benchmark-only`` runs nothing else. Add ``--benchmark-save=NAME`` to
+keep a run and ``--benchmark-compare --benchmark-compare-fail=mean:10%`` to
+fail when a later run is slower than the saved one.
+"""
+
+import asyncio
+import shutil
+import uuid
+
+import pytest
+
+from builder import bench
+from builder.config import Config
+from builder.detection import classify_idle, classify_ready, classify_todo
+from builder.prompt_manager import PromptManager
+from builder.session_manager import SessionManager
+from builder.storage import BACKENDS
+
+
+# Events logged per benchmark round
+EVENTS = 500
+
+
+@pytest.mark.parametrize('backend', sorted(BACKENDS))
+def test_event_writes(benchmark, tmp_path, backend):
+    session_manager = SessionManager(bench._bench_config(tmp_path / 'bench.db', backend))
+    session = session_manager.create_session(bench._bench_prompt())
+
+    def write_events():
+        for i in range(EVENTS):
+            session_manager.log_event(session.id, 'bench_event', {'n': i})
+
+    try:
+        benchmark(write_events)
+    finally:
+        session_manager.close()
+
+
+@pytest.fixture(scope='module')
+def prompt_files(tmp_path_factory):
+    """The same half-megabyte prompt written as text and as YAML"""
+    root = tmp_path_factory.mktemp('prompts')
+    config = bench._bench_config(root / 'bench.db')
+    config.set('prompt_cache', False)
+    prompt_manager = PromptManager(config)
+
+    text_path = root / 'bench.txt'
+    bench._write_text_prompt(text_path, 2 ** 19)
+    yaml_path = root / 'bench.yaml'
+    prompt_manager.convert_prompt(str(text_path), str(yaml_path))
+    return prompt_manager, {'txt': text_path, 'yaml': yaml_path}
+
+
+@pytest.mark.parametrize('format', ['txt', 'yaml'])
+def test_prompt_parsing(benchmark, prompt_files, format):
+    prompt_manager, paths = prompt_files
+    prompt = benchmark(prompt_manager.load_prompt, str(paths[format]))
+    assert prompt.steps
+
+
+# Line counts the orchestrator captures for each check
+CAPTURE_LINES = {'todo': 150, 'idle': 20, 'ready': 50}
+
+
+@pytest.mark.parametrize('state', ['busy', 'idle', 'done'])
+@pytest.mark.parametrize('check', sorted(CAPTURE_LINES))
+def test_detection(benchmark, check, state):
+    output = bench._capture(CAPTURE_LINES[check], state)
+    if check == 'todo':
+        benchmark(classify_todo, output, Config().get('todo_patterns'))
+    else:
+        benchmark(classify_idle if check == 'idle' else classify_ready, output)
+
+
+@pytest.mark.skipif(not shutil.which('tmux'), reason='tmux is not installed')
+def test_tmux_round_trip(benchmark, tmp_path):
+    from builder.claude_interface import ClaudeInterface
+
+    config = bench._bench_config(tmp_path / 'bench.db')
+    config.set('use_tmux', True)
+    config.set('claude_command', 'cat')
+    config.set('claude_args', [])
+    config.set('initial_wait', 0.2)
+    claude = ClaudeInterface(config)
+    loop = asyncio.new_event_loop()
+
+    async def round_trip(marker: str, timeout: float):
+        began = loop.time()
+        await claude.send_message(marker)
+        # Typed once, echoed back once by cat
+        while (await claude.get_recent_output(lines=5)).count(marker) < 2:
+            if loop.time() - began > timeout:
+                raise RuntimeError("tmux round trip timed out")
+
+    markers = (f"bench-marker-{n}" for n in range(1000))
+    try:
+        loop.run_until_complete(claude.start(str(uuid.uuid4())))
+        # The pane's shell may take seconds to start; wait for it untimed
+        loop.run_until_complete(round_trip('bench-warmup', timeout=60))
+        # Each round includes send_message's 0.5s pause before Enter
+        benchmark.pedantic(lambda: loop.run_until_complete(round_trip(next(markers), 5)),
+                           rounds=5, iterations=1)
+    finally:
+        loop.run_until_complete(claude.stop())
+        loop.close()
+
+
+def test_step_transitions(benchmark):
+    result = benchmark.pedantic(bench.step_transitions, args=(3,), rounds=3, iterations=1)
+    assert result['status'] == 'completed'
+    assert result['steps_sent'] == 3
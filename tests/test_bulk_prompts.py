@@ -0,0 +1,130 @@
+"""
+Bulk validation and conversion of prompt directories, in parallel and from cache
+"""
+
+import os
+import time
+
+import pytest
+
+from builder.exceptions import PromptError
+from builder.prompt_manager import PromptManager
+
+
+TEXT = '''# Raivyn [build]
+You will build {name}, a small project.
+
+# Build Steps
+1. Write the first module
+2. Write the second module
+'''
+
+YAML = '''name: {name}
+initial_prompt: Build {name}
+steps:
+  - Write the first module
+'''
+
+
+def _write(path, text, age_seconds=3600):
+    """Write a prompt file, by default old enough for the caches to keep"""
+    path.write_text(text)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def prompt_dir(tmp_path):
+    directory = tmp_path / 'prompts'
+    directory.mkdir()
+    for n in range(6):
+        _write(directory / f'text{n}.txt', TEXT.format(name=f'Text{n}'))
+    _write(directory / 'service.yaml', YAML.format(name='Service'))
+    _write(directory / 'broken.yaml', 'name: [unclosed\n')
+    return directory
+
+
+@pytest.fixture
+def prompt_manager(config):
+    return PromptManager(config)
+
+
+def _by_file(results):
+    return {os.path.basename(result['file']): result for result in results}
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_validate_all(prompt_dir, prompt_manager, jobs):
+    results = _by_file(prompt_manager.validate_all(prompt_dir, jobs=jobs))
+
+    assert len(results) == 8
+    assert results['broken.yaml']['status'] == 'invalid'
+    assert results['service.yaml'] == {
+        'file': str(prompt_dir / 'service.yaml'), 'status': 'valid', 'name': 'Service',
+        'format': 'yaml', 'steps': 1, 'warnings': results['service.yaml']['warnings'],
+        'cached': False
+    }
+    assert all(result['status'] == 'valid' and result['steps'] == 2
+               for name, result in results.items() if name.endswith('.txt'))
+
+
+def test_validate_all_reports_unchanged_files_from_cache(prompt_dir, prompt_manager):
+    first = _by_file(prompt_manager.validate_all(prompt_dir, jobs=1))
+    _write(prompt_dir / 'service.yaml', YAML.format(name='Renamed service'))
+    (prompt_dir / 'text5.txt').unlink()
+
+    second = _by_file(prompt_manager.validate_all(prompt_dir, jobs=1))
+
+    assert [name for name, result in second.items() if not result['cached']] == ['service.yaml']
+    assert second['service.yaml']['name'] == 'Renamed service'
+    assert second['broken.yaml'] == {**first['broken.yaml'], 'cached': True}
+    assert 'text5.txt' not in second
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_convert_all(tmp_path, prompt_dir, prompt_manager, jobs):
+    target_dir = tmp_path / 'converted'
+
+    results = _by_file(prompt_manager.convert_all(prompt_dir, target_dir, 'yaml', jobs=jobs))
+
+    assert results['broken.yaml']['status'] == 'failed'
+    assert {name for name, result in results.items() if result['status'] == 'converted'} == \
+        {f'text{n}.txt' for n in range(6)} | {'service.yaml'}
+    converted = prompt_manager.load_prompt(str(target_dir / 'text0.yaml'))
+    assert [step.content for step in converted.steps] == ['Write the first module',
+                                                           'Write the second module']
+
+
+def test_convert_all_skips_up_to_date_outputs(tmp_path, prompt_dir, prompt_manager):
+    target_dir = tmp_path / 'converted'
+    target_dir.mkdir()
+    fresh = _write(target_dir / 'text0.yaml', 'kept as it is', age_seconds=0)
+    stale = _write(target_dir / 'text1.yaml', 'out of date', age_seconds=7200)
+
+    results = _by_file(prompt_manager.convert_all(prompt_dir, target_dir, 'yaml', jobs=1))
+
+    assert results['text0.txt']['status'] == 'skipped'
+    assert fresh.read_text() == 'kept as it is'
+    assert results['text1.txt']['status'] == 'converted'
+    assert prompt_manager.load_prompt(str(stale)).name == 'Text1'
+
+
+def test_convert_all_refuses_name_collisions(tmp_path, prompt_dir, prompt_manager):
+    _write(prompt_dir / 'service.txt', TEXT.format(name='Billing'))
+    target_dir = tmp_path / 'converted'
+
+    results = _by_file(prompt_manager.convert_all(prompt_dir, target_dir, 'yaml', jobs=1))
+
+    # Sorted first, service.txt claims service.yaml
+    assert results['service.txt']['status'] == 'converted'
+    assert results['service.yaml'] == {
+        'file': str(prompt_dir / 'service.yaml'), 'output': str(target_dir / 'service.yaml'),
+        'status': 'failed', 'error': 'service.txt is also converted to service.yaml'
+    }
+    assert prompt_manager.load_prompt(str(target_dir / 'service.yaml')).name == 'Billing'
+
+
+def test_convert_all_rejects_unknown_formats(tmp_path, prompt_dir, prompt_manager):
+    with pytest.raises(PromptError, match='Unsupported output format'):
+        list(prompt_manager.convert_all(prompt_dir, tmp_path / 'converted', 'json'))
@@ -0,0 +1,30 @@
+"""
+The tmux pane is mirrored into the session's output log whatever its path
+"""
+
+import subprocess
+
+import pytest
+
+from builder.claude_interface import ClaudeInterface
+
+
+@pytest.mark.asyncio
+async def test_pipe_pane_command_quotes_the_output_path(tmp_path, config, monkeypatch):
+    config.set('sessions_dir', str(tmp_path / "it's a $HOME; dir"))
+    claude = ClaudeInterface(config)
+    claude.session_id = 'c0ffee00-0000-4000-8000-000000000001'
+    claude.output_path = config.session_dir(claude.session_id) / 'output.log'
+    claude.output_path.parent.mkdir(parents=True)
+    commands = []
+
+    async def record(cmd):
+        commands.append(cmd)
+    monkeypatch.setattr(claude, '_run_command', record)
+
+    await claude._start_tmux_session()
+
+    # tmux hands the command to the shell as one string
+    [pipe_cmd] = [cmd for cmd in commands if cmd[1] == 'pipe-pane']
+    subprocess.run(['sh', '-c', pipe_cmd[-1]], input='pane output\n', text=True, check=True)
+    assert claude.output_path.read_text() == 'pane output\n'
@@ -0,0 +1,46 @@
+"""
+Several processes writing to or migrating one fresh store lose nothing
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from builder.bench import concurrent_write_stress
+from builder.migrations import SCHEMA_VERSION, get_schema_version
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'segment_log'])
+def test_concurrent_writers_lose_no_events(backend):
+    result = concurrent_write_stress(writers=4, events=200, backend=backend)
+
+    assert result['failed_writers'] == 0
+    assert result['lost_events'] == 0
+    assert result['written_events'] == 4 * 200
+
+
+def test_concurrent_migrate(tmp_path):
+    path = tmp_path / 'builder.db'
+    script = ('import sqlite3, sys\n'
+              'from builder.migrations import migrate\n'
+              'print(migrate(sqlite3.connect(sys.argv[1], timeout=30)))\n')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        entry for entry in (str(REPO_ROOT), os.environ.get('PYTHONPATH')) if entry))
+
+    processes = [subprocess.Popen([sys.executable, '-c', script, str(path)], env=env,
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                 for _ in range(6)]
+    results = [process.communicate(timeout=60) for process in processes]
+
+    for process, (stdout, stderr) in zip(processes, results):
+        assert process.returncode == 0, stderr
+        assert stdout.strip() == str(SCHEMA_VERSION)
+    with sqlite3.connect(path) as conn:
+        assert get_schema_version(conn) == SCHEMA_VERSION
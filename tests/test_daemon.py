@@ -0,0 +1,145 @@
+"""
+The daemon answers JSON-RPC requests from DaemonClient over its socket
+"""
+
+import asyncio
+import sys
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from builder.bench import FAKE_CLAUDE
+from builder.cli import cli
+from builder.daemon import BuilderDaemon
+from builder.exceptions import DaemonError, SessionError
+from builder.rpc import DaemonClient
+from builder.session_manager import SessionManager
+
+
+PROMPT = '''# Raivyn [build]
+You will build Demo, a small project.
+
+# Build Steps
+1. Write the first module
+2. Write the second module
+'''
+
+
+@pytest.fixture
+def daemon_config(config):
+    config.set('use_daemon', True)
+    config.set('use_tmux', False)
+    config.set('claude_command', sys.executable)
+    config.set('claude_args', ['-u', '-c', FAKE_CLAUDE])
+    config.set('initial_wait', 0)
+    config.set('trace_sessions', False)
+    return config
+
+
+@pytest.mark.asyncio
+async def test_rpc_round_trip(tmp_path, daemon_config):
+    prompt_file = tmp_path / 'demo.txt'
+    prompt_file.write_text(PROMPT)
+    config_path = tmp_path / 'config.yaml'
+    daemon_config.save(config_path)
+
+    server = asyncio.create_task(BuilderDaemon(daemon_config).serve())
+    while not daemon_config.daemon_socket.exists():
+        assert not server.done(), server.exception()
+        await asyncio.sleep(0.01)
+
+    def session_calls():
+        client = DaemonClient.connect(daemon_config)
+        assert client is not None
+        with client:
+            replies = {'ping': client.call('ping')}
+            replies['start'] = client.call('start', prompt_file=str(prompt_file), speed='fast')
+            session_id = replies['start']['session']['id']
+            replies['status'] = client.call('status', session_id=session_id, detailed=True)
+            replies['list'] = client.call('list', all=True)
+            replies['ping_running'] = client.call('ping')
+
+            with pytest.raises(SessionError, match='not found'):
+                client.call('status', session_id='missing')
+            with pytest.raises(DaemonError, match='Unknown method'):
+                client.call('no_such_method')
+            with pytest.raises(DaemonError, match='unexpected keyword'):
+                client.call('ping', verbose=True)
+
+            # The CLI reports errors the daemon forwards instead of a traceback
+            replies['bad_cursor'] = CliRunner().invoke(
+                cli, ['--config', str(config_path), 'list', '--all', '--after', 'garbage'])
+
+            replies['shutdown'] = client.call('shutdown')
+        return replies
+
+    replies = await asyncio.to_thread(session_calls)
+    await asyncio.wait_for(server, 30)
+
+    assert replies['ping']['builds'] == []
+    assert 'rss_mb' in replies['ping']['metrics']
+    assert replies['start']['project'] == 'Demo'
+    assert replies['start']['steps'] == 2
+
+    session_id = replies['start']['session']['id']
+    [status] = replies['status']
+    assert status['session']['id'] == session_id
+    assert status['running'] is True
+    assert [step['step_number'] for step in status['steps']] == [1, 2]
+    assert replies['list']['total'] == 1
+    assert replies['bad_cursor'].exit_code == 1
+    assert 'Invalid session cursor: garbage' in replies['bad_cursor'].output
+    assert replies['ping_running']['builds'] == [session_id]
+    assert replies['shutdown'] is True
+
+    # Shutting down interrupts the build and removes the socket
+    assert not daemon_config.daemon_socket.exists()
+    session_manager = SessionManager(daemon_config)
+    try:
+        assert session_manager.get_session(session_id).status.value == 'interrupted'
+    finally:
+        session_manager.close()
+
+
+class _ThreadRecorder:
+    """Storage wrapper noting the thread every call runs on"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.threads = set()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.storage, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self.threads.add(threading.current_thread().name)
+            return attribute(*args, **kwargs)
+        return call
+
+
+@pytest.mark.asyncio
+async def test_requests_use_storage_off_the_loop(tmp_path, daemon_config):
+    prompt_file = tmp_path / 'demo.txt'
+    prompt_file.write_text(PROMPT)
+    daemon = BuilderDaemon(daemon_config)
+    recorder = _ThreadRecorder(daemon.session_manager.storage)
+    daemon.session_manager._storage = recorder
+
+    await daemon.rpc_status()
+    await daemon.rpc_list(all=True, detailed=True)
+    assert await daemon.rpc_kill('missing') is False
+    with pytest.raises(SessionError):
+        await daemon.rpc_attach('missing')
+    started = await daemon.rpc_start(prompt_file=str(prompt_file))
+    # Nothing has yielded to the build task yet, so every call so far was a request's
+    threads = set(recorder.threads)
+
+    await daemon._stop_builds()
+    await daemon._off_loop(recorder.storage.close)
+    daemon._executor.shutdown()
+
+    assert started['steps'] == 2
+    assert threads and all(name.startswith('builder-daemon-storage') for name in threads)
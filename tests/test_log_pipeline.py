@@ -0,0 +1,78 @@
+"""
+Queued logging delivers every record and keeps rotated files within their limits
+"""
+
+import gzip
+import logging
+import re
+
+from builder.log_pipeline import SESSION_LOG_NAME, LogPipeline, current_session
+
+
+RECORDS = 400
+MAX_BYTES = 8 * 1024
+BACKUPS = 6
+
+
+def _read(path) -> str:
+    if path.suffix == '.gz':
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+    return path.read_text(encoding='utf-8')
+
+
+def _numbers(text: str):
+    return [int(n) for n in re.findall(r'record (\d+) ', text)]
+
+
+def test_pipeline_delivers_records_and_rotates(tmp_path, config):
+    config.set('max_log_size_mb', MAX_BYTES / 2 ** 20)
+    config.set('log_backup_count', BACKUPS)
+    config.set('compression', 'gzip')
+    pipeline = LogPipeline(config, log_file=tmp_path / 'builder.log', console=False)
+    pipeline.start()
+
+    logger = logging.Logger('test')
+    logger.addHandler(pipeline.handler)
+    token = current_session.set('session-1')
+    try:
+        for n in range(RECORDS):
+            logger.info('record %d %s', n, 'x' * 80)
+    finally:
+        current_session.reset(token)
+    logger.info('record %d untagged', RECORDS)
+    # Stopping drains the queue before closing the files
+    pipeline.stop()
+
+    files = sorted(tmp_path.glob('builder.log*'))
+    rotated = [path for path in files if path.name != 'builder.log']
+    assert rotated, 'the log never rotated'
+    assert len(rotated) <= BACKUPS
+    assert all(path.suffix == '.gz' for path in rotated)
+    assert all(len(_read(path).encode('utf-8')) <= MAX_BYTES for path in files)
+
+    numbers = sorted(n for path in files for n in _numbers(_read(path)))
+    assert numbers == list(range(RECORDS + 1))
+
+    session_logs = sorted((config.sessions_dir / 'session-1').glob(SESSION_LOG_NAME + '*'))
+    session_numbers = sorted(n for path in session_logs for n in _numbers(_read(path)))
+    assert session_numbers == list(range(RECORDS))
+
+
+def test_oldest_segments_are_dropped_beyond_the_backup_count(tmp_path, config):
+    config.set('max_log_size_mb', 1024 / 2 ** 20)
+    config.set('log_backup_count', 2)
+    config.set('compression', 'none')
+    pipeline = LogPipeline(config, log_file=tmp_path / 'builder.log', console=False)
+    pipeline.start()
+    logger = logging.Logger('test')
+    logger.addHandler(pipeline.handler)
+    for n in range(200):
+        logger.info('record %d %s', n, 'x' * 80)
+    pipeline.stop()
+
+    files = sorted(tmp_path.glob('builder.log*'))
+    assert [path.name for path in files] == ['builder.log', 'builder.log.1', 'builder.log.2']
+    # What is kept is the newest records, ending with the last one
+    numbers = sorted(n for path in files for n in _numbers(_read(path)))
+    assert numbers == list(range(numbers[0], 200))
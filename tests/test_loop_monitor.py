@@ -0,0 +1,76 @@
+"""
+The loop monitor catches a blocked event loop in the act, without blocking it itself
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from builder.loop_monitor import LoopMonitor
+from builder.session_manager import SessionManager
+
+
+@pytest.fixture
+def session_manager(config):
+    config.set('loop_check_interval', 0.01)
+    config.set('loop_lag_threshold', 0.1)
+    session_manager = SessionManager(config)
+    yield session_manager
+    session_manager.close()
+
+
+def _blocking_call():
+    """Synchronous work holding up the event loop"""
+    time.sleep(0.4)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_recorded_with_its_stack(session_manager, prompt, monkeypatch):
+    session = session_manager.create_session(prompt)
+    writers = []
+    log_event = session_manager.log_event
+
+    def recording_log_event(*args, **kwargs):
+        writers.append(threading.get_ident())
+        return log_event(*args, **kwargs)
+
+    monkeypatch.setattr(session_manager, 'log_event', recording_log_event)
+    monitor = LoopMonitor(session_manager.config, session_manager, session.id)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    _blocking_call()
+    await asyncio.sleep(0.05)
+    summary = await monitor.stop()
+
+    events = {event.event_type: event for event in session_manager.get_session_events(session.id)}
+    blocked = events['event_loop_blocked'].data
+    assert blocked['lag_ms'] >= 300
+    assert '_blocking_call' in blocked['stack']
+    assert 'time.sleep(0.4)' in blocked['stack']
+    assert events['process_metrics'].data == summary
+    # Both were written off the loop
+    assert writers and threading.get_ident() not in writers
+
+
+@pytest.mark.asyncio
+async def test_summary(session_manager):
+    monitor = LoopMonitor(session_manager.config)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    time.sleep(0.15)
+    await asyncio.sleep(0.05)
+    summary = await monitor.stop()
+
+    assert set(summary) == {
+        'checks', 'blocked', 'threshold_ms', 'peak_rss_mb', 'peak_open_fds', 'peak_threads',
+        'peak_cpu_percent', 'cpu_seconds', 'mean_lag_ms', 'p99_lag_ms', 'max_lag_ms'
+    }
+    assert summary['checks'] > 1
+    assert summary['blocked'] == 1
+    assert summary['threshold_ms'] == 100
+    assert summary['p99_lag_ms'] <= summary['max_lag_ms']
+    assert summary['mean_lag_ms'] <= summary['max_lag_ms']
+    assert summary['max_lag_ms'] >= 150 - 10
+    assert summary['peak_rss_mb'] > 0 and summary['peak_threads'] >= 2
@@ -0,0 +1,78 @@
+"""
+Schema migrations upgrade existing databases in place
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from builder.migrations import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate
+from builder.storage.sqlite import SQLiteBackend
+
+
+STARTED = datetime(2024, 3, 1, 9, 30, 15, 250000)
+ENDED = datetime(2024, 3, 1, 10, 5, 0)
+
+
+def _baseline_database(path: Path):
+    """A version 1 database holding one finished session, as older releases wrote it"""
+    conn = sqlite3.connect(path)
+    MIGRATIONS[0](conn)
+    conn.execute('PRAGMA user_version = 1')
+    # The sqlite3 datetime adapter stored timestamps as ISO text
+    conn.execute(
+        'INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ('s1', 'app.txt', 'App', 'completed', str(STARTED), str(ENDED), 2, 2, None,
+         json.dumps({'profile': 'fast'}))
+    )
+    conn.executemany(
+        'INSERT INTO build_steps VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        [('s1', n, f'Step {n}', f'Build part {n}', 'completed', str(STARTED), str(ENDED), None)
+         for n in (1, 2)]
+    )
+    conn.executemany(
+        'INSERT INTO session_events (session_id, timestamp, event_type, data) VALUES (?, ?, ?, ?)',
+        [('s1', str(STARTED), 'session_created', json.dumps({'steps': 2})),
+         ('s1', str(ENDED), 'session_completed', None)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_migrate_from_baseline_schema(config):
+    _baseline_database(config.database_path)
+
+    backend = SQLiteBackend(config)
+    try:
+        session = backend.get_session('s1')
+        assert session.started_at == STARTED
+        assert session.ended_at == ENDED
+        assert session.metadata == {'profile': 'fast'}
+
+        steps = list(backend.iter_steps('s1'))
+        assert [(s.step_number, s.content) for s in steps] == [(1, 'Build part 1'),
+                                                               (2, 'Build part 2')]
+        assert steps[0].completed_at == ENDED
+
+        events = list(backend.iter_events('s1'))
+        assert [e.event_type for e in events] == ['session_created', 'session_completed']
+        assert events[0].timestamp == STARTED
+        assert events[0].data == {'steps': 2}
+    finally:
+        backend.close()
+
+    with sqlite3.connect(config.database_path) as conn:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+        # Timestamps are integers now, not text
+        assert conn.execute('SELECT typeof(started_at) FROM sessions').fetchone() == ('integer',)
+
+
+def test_migrate_is_a_no_op_when_current(tmp_path):
+    path = tmp_path / 'builder.db'
+    conn = sqlite3.connect(path)
+    try:
+        assert migrate(conn) == SCHEMA_VERSION
+        assert migrate(conn) == SCHEMA_VERSION
+    finally:
+        conn.close()
@@ -0,0 +1,96 @@
+"""
+CPU and memory profiles are written where the command's build lives
+"""
+
+import pstats
+import time
+
+from click.testing import CliRunner
+
+from builder import profiling
+from builder.cli import cli
+from builder.profiling import PROFILES_DIR_NAME, Profiler
+
+
+def _spin(seconds: float = 0.05):
+    """CPU-bound work the profile should attribute to this function"""
+    ends = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < ends:
+        total += sum(range(1000))
+    return total
+
+
+_retained = []
+
+
+def _leak(kilobytes: int):
+    """Allocations that stay alive, as a leak would"""
+    _retained.extend(bytes(1024) for _ in range(kilobytes))
+
+
+def test_cpu_profile(config):
+    profiler = Profiler(config, cpu=True)
+    profiler.start()
+    _spin()
+    paths = profiler.stop()
+
+    prof_path, text_path = paths
+    assert prof_path.parent == config.sessions_dir / PROFILES_DIR_NAME
+    assert prof_path.name.endswith('cpu.prof')
+    functions = {name for _, _, name in pstats.Stats(str(prof_path)).stats}
+    assert '_spin' in functions
+    assert '_spin' in text_path.read_text()
+    assert profiling._active is None
+
+
+def test_memory_snapshots_show_growth(config):
+    config.set('profile_snapshot_interval', 0.05)
+    profiler = Profiler(config, memory=True)
+    profiler.start()
+    try:
+        _leak(256)
+        snapshots_dir = config.sessions_dir / PROFILES_DIR_NAME
+        for _ in range(200):
+            if list(snapshots_dir.glob('*memory-*.txt')):
+                break
+            time.sleep(0.01)
+        _leak(2048)
+    finally:
+        paths = profiler.stop()
+        _retained.clear()
+
+    # Periodic snapshots while running, then a final one on stop
+    [final] = paths
+    assert final.name.endswith('.txt') and 'memory-' in final.name
+    assert len(list(final.parent.glob('*memory-*.txt'))) >= 2
+    report = final.read_text()
+    growth = report.split('Largest growth since snapshot 1:')[1]
+    assert 'test_profiling.py' in growth.splitlines()[1]
+
+
+def test_reports_follow_the_first_build(tmp_path, config):
+    profiler = Profiler(config, cpu=True)
+    profiler.start()
+    profiling.attach_session('first', tmp_path / 'first')
+    profiling.attach_session('second', tmp_path / 'second')
+    paths = profiler.stop()
+
+    assert {path.parent for path in paths} == {tmp_path / 'first'}
+    # Nothing is profiling any more, so later builds are not redirected
+    profiling.attach_session('third', tmp_path / 'third')
+    assert profiler.output_dir == tmp_path / 'first'
+
+
+def test_profile_options(tmp_path, config, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    config_path = tmp_path / 'config.yaml'
+    config.save(config_path)
+
+    result = CliRunner().invoke(cli, ['--config', str(config_path), '--profile-cpu',
+                                      '--profile-mem', 'list'])
+
+    assert result.exit_code == 0, result.output
+    written = [line.split('Profile written to ')[1] for line in result.output.splitlines()
+               if line.startswith('Profile written to ')]
+    assert [path.rsplit('-', 1)[-1] for path in written] == ['001.txt', 'cpu.prof', 'cpu.txt']
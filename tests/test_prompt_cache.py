@@ -0,0 +1,129 @@
+"""
+Cached prompts are parsed again exactly when their file or the parser changes
+"""
+
+import os
+import time
+
+import pytest
+
+from builder.exceptions import PromptError
+from builder.prompt_cache import PromptCache
+
+
+PARSER_VERSION = 1
+
+# Comfortably outside the window in which files are too fresh to cache
+AN_HOUR_AGO_NS = time.time_ns() - 3600 * 10 ** 9
+
+
+class CountingParser:
+    """Parses a file to its text, failing first if told to"""
+
+    def __init__(self, failures=()):
+        self.calls = 0
+        self.failures = list(failures)
+
+    def __call__(self, path):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return path.read_text()
+
+
+def _cache(tmp_path, parser_version=PARSER_VERSION) -> PromptCache:
+    return PromptCache(tmp_path / 'cache.json', parser_version,
+                       lambda text: {'text': text}, lambda entry: entry['text'])
+
+
+def _write(path, text, mtime_ns=AN_HOUR_AGO_NS):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def prompt_file(tmp_path):
+    path = tmp_path / 'prompts' / 'app.txt'
+    path.parent.mkdir()
+    _write(path, 'first')
+    return path
+
+
+def test_unchanged_file_is_parsed_once(tmp_path, prompt_file):
+    cache, parse = _cache(tmp_path), CountingParser()
+
+    assert cache.get(prompt_file, parse) == 'first'
+    cache.save()
+    assert _cache(tmp_path).get(prompt_file, parse) == 'first'
+    assert parse.calls == 1
+
+
+def test_mtime_or_size_change_parses_again(tmp_path, prompt_file):
+    cache, parse = _cache(tmp_path), CountingParser()
+    cache.get(prompt_file, parse)
+
+    _write(prompt_file, 'other', AN_HOUR_AGO_NS + 10 ** 9)  # Same size
+    assert cache.get(prompt_file, parse) == 'other'
+    _write(prompt_file, 'other, longer', AN_HOUR_AGO_NS + 10 ** 9)  # Same mtime
+    assert cache.get(prompt_file, parse) == 'other, longer'
+    assert parse.calls == 3
+
+
+def test_recently_modified_file_is_not_cached(tmp_path, prompt_file):
+    cache, parse = _cache(tmp_path), CountingParser()
+    _write(prompt_file, 'fresh', time.time_ns())
+
+    cache.get(prompt_file, parse)
+    cache.get(prompt_file, parse)
+    assert parse.calls == 2
+
+
+def test_parser_version_bump_parses_again(tmp_path, prompt_file):
+    parse = CountingParser()
+    cache = _cache(tmp_path)
+    cache.get(prompt_file, parse)
+    cache.save()
+
+    assert _cache(tmp_path, PARSER_VERSION + 1).get(prompt_file, parse) == 'first'
+    assert parse.calls == 2
+
+
+def test_parse_errors_are_cached_until_the_file_changes(tmp_path, prompt_file):
+    cache = _cache(tmp_path)
+    parse = CountingParser([PromptError('app.txt:1:1: Step 1 has no text')])
+
+    for _ in range(2):
+        with pytest.raises(PromptError, match='Step 1 has no text'):
+            cache.get(prompt_file, parse)
+    assert parse.calls == 1
+
+    _write(prompt_file, 'fixed now')
+    assert cache.get(prompt_file, parse) == 'fixed now'
+
+
+def test_other_errors_are_not_cached(tmp_path, prompt_file):
+    cache = _cache(tmp_path)
+    parse = CountingParser([PermissionError('app.txt is locked')])
+
+    with pytest.raises(PermissionError):
+        cache.get(prompt_file, parse)
+    assert cache.get(prompt_file, parse) == 'first'
+    assert parse.calls == 2
+
+
+def test_retain_forgets_deleted_files(tmp_path, prompt_file):
+    cache, parse = _cache(tmp_path), CountingParser()
+    other = prompt_file.with_name('other.txt')
+    _write(other, 'other')
+    outside = tmp_path / 'outside.txt'
+    _write(outside, 'outside')
+    for path in (prompt_file, other, outside):
+        cache.get(path, parse)
+
+    other.unlink()
+    cache.retain(prompt_file.parent, [prompt_file])
+    cache.save()
+
+    entries = _cache(tmp_path)._load()
+    # Only files in the directory given are candidates for forgetting
+    assert set(entries) == {str(prompt_file), str(outside)}
@@ -0,0 +1,144 @@
+"""
+The streaming YAML scanner behind the prompt index agrees with a full parse
+"""
+
+import os
+import time
+
+import pytest
+
+from builder.exceptions import PromptError
+from builder.prompt_manager import PromptManager
+
+
+DOCUMENTS = {
+    'plain': '''
+name: Calculator
+description: A small calculator
+initial_prompt: Build a calculator
+steps:
+  - Write the parser
+  - Write the evaluator
+''',
+    'detailed steps': '''
+name: Service
+initial_prompt: Build a service
+steps:
+  - content: Write the API
+    tags: [api, http]
+    dependencies: [2, 3]
+  - content: Write the store
+    description: Storage layer
+  - Deploy it
+description: Listed after the steps
+''',
+    'null descriptions': '''
+name: Nulls
+description: ~
+initial_prompt: Build it
+steps: [one]
+''',
+    'empty description': '''
+name: Empty
+description:
+initial_prompt: Build it
+steps: [one, two]
+''',
+    'quoted null': '''
+name: "Quoted"
+description: 'null'
+initial_prompt: Build it
+steps: [one]
+''',
+    'block scalars': '''
+metadata:
+  owner: {team: tools, reviewers: [a, b]}
+steps:
+  - |
+    Write the lexer
+    and its tests
+  - >
+    Write the parser
+name: Blocks
+description: |
+  Several lines
+  of description
+initial_prompt: |
+  Build a compiler
+''',
+    'aliases': '''
+setup: &setup Install the dependencies
+name: Aliases
+initial_prompt: Build it
+steps: [*setup, Build, *setup]
+''',
+    'no steps yet': '''
+name: Empty steps
+initial_prompt: Build it
+steps: []
+''',
+}
+
+INVALID = {
+    'not a mapping': '- name: List\n',
+    'missing name': 'initial_prompt: Build it\nsteps: [one]\n',
+    'missing initial prompt': 'name: Missing\nsteps: [one]\n',
+    'steps not a list': 'name: Scalar\ninitial_prompt: Build it\nsteps: one\n',
+}
+
+
+@pytest.fixture
+def prompt_manager(config):
+    return PromptManager(config)
+
+
+@pytest.mark.parametrize('name', DOCUMENTS)
+def test_scan_agrees_with_full_parse(name, tmp_path, prompt_manager):
+    path = tmp_path / 'prompt.yaml'
+    path.write_text(DOCUMENTS[name])
+
+    summary = prompt_manager._scan_yaml_summary(path)
+    prompt = prompt_manager._load_yaml_prompt(path)
+
+    assert (summary.name, summary.description, summary.step_count) == \
+        (prompt.name, prompt.description, len(prompt.steps))
+    assert (summary.filename, summary.format) == ('prompt.yaml', 'yaml')
+
+
+@pytest.mark.parametrize('name', INVALID)
+def test_scan_rejects_what_a_full_parse_rejects(name, tmp_path, prompt_manager):
+    path = tmp_path / 'prompt.yaml'
+    path.write_text(INVALID[name])
+
+    with pytest.raises(PromptError) as parsed:
+        prompt_manager._load_yaml_prompt(path)
+    with pytest.raises(PromptError) as scanned:
+        prompt_manager._scan_yaml_summary(path)
+    assert str(scanned.value) == str(parsed.value)
+
+
+def test_listing_matches_loaded_prompts(tmp_path, config, monkeypatch):
+    config.set('prompts_dir', str(tmp_path / 'prompts'))
+    config.prompts_dir.mkdir()
+    for n, document in enumerate(DOCUMENTS.values()):
+        (config.prompts_dir / f'prompt{n}.yaml').write_text(document)
+    (config.prompts_dir / 'broken.yaml').write_text(INVALID['missing name'])
+    # Old enough for the index to keep them
+    an_hour_ago = time.time() - 3600
+    for path in config.prompts_dir.iterdir():
+        os.utime(path, (an_hour_ago, an_hour_ago))
+    prompt_manager = PromptManager(config)
+    scanned = []
+    scan_summary = prompt_manager._scan_summary
+    monkeypatch.setattr(prompt_manager, '_scan_summary',
+                        lambda path: scanned.append(path) or scan_summary(path))
+
+    # Twice: scanned the first time, from the index the second
+    for _ in range(2):
+        listed = [(s.filename, s.name, s.description, s.step_count)
+                  for s in prompt_manager.list_prompt_summaries()]
+        loaded = [(p.filename, p.name, p.description, len(p.steps))
+                  for p in prompt_manager.list_prompts()]
+        assert listed == loaded
+        assert len(listed) == len(DOCUMENTS)
+    assert len(scanned) == len(DOCUMENTS) + 1
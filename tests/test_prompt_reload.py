@@ -0,0 +1,151 @@
+"""
+Edits to the prompt file during a build replace pending steps and leave sent ones alone
+"""
+
+import asyncio
+import sys
+
+import pytest
+
+from builder import orchestrator as orchestrator_module
+from builder.bench import FAKE_CLAUDE, _virtual_clock
+from builder.exceptions import SessionError
+from builder.orchestrator import BuildOrchestrator
+from builder.prompt_manager import PromptManager
+from builder.session_manager import SessionManager
+
+
+ORIGINAL = '''# Raivyn [build]
+You will build Demo, a small project.
+
+# Build Steps
+1. Write the first module
+2. Write the second module
+3. Write the third module
+'''
+
+EDITED = '''# Raivyn [build]
+You will build Demo, a small project.
+
+# Build Steps
+1. Rewrite the first module from scratch
+2. Write the parser module
+3. Write the renderer module
+4. Write the tests
+'''
+
+
+@pytest.fixture
+def build_config(config):
+    config.set('use_tmux', False)
+    config.set('claude_command', sys.executable)
+    config.set('claude_args', ['-u', '-c', FAKE_CLAUDE])
+    config.set('initial_wait', 0)
+    config.set('trace_sessions', False)
+    config.set('monitor_event_loop', False)
+    config.apply_profile('fast')
+    return config
+
+
+@pytest.fixture
+def session_manager(build_config):
+    session_manager = SessionManager(build_config)
+    yield session_manager
+    session_manager.close()
+
+
+def _contents(session_manager, session_id):
+    return [step.content for step in session_manager.get_session_steps(session_id)]
+
+
+def test_edit_mid_build_replaces_only_pending_steps(tmp_path, build_config, session_manager):
+    prompt_file = tmp_path / 'demo.txt'
+    prompt_file.write_text(ORIGINAL)
+    prompt_manager = PromptManager(build_config)
+    prompt = prompt_manager.load_prompt(str(prompt_file))
+    session = session_manager.create_session(prompt)
+    orchestrator = BuildOrchestrator(build_config, session_manager, prompt_manager)
+
+    sent = []
+    send_message = orchestrator.claude.send_message
+    send_next_step = orchestrator._send_next_step
+
+    async def recording_send_message(message):
+        sent.append(message)
+        return await send_message(message)
+
+    async def editing_send_next_step():
+        result = await send_next_step()
+        if orchestrator.current_step == 1:
+            prompt_file.write_text(EDITED)
+        return result
+
+    orchestrator.claude.send_message = recording_send_message
+    orchestrator._send_next_step = editing_send_next_step
+    with _virtual_clock(orchestrator_module):
+        asyncio.run(orchestrator.run(session, prompt))
+
+    assert session_manager.get_session(session.id).status.value == 'completed'
+    assert _contents(session_manager, session.id) == [
+        'Write the first module', 'Write the parser module', 'Write the renderer module',
+        'Write the tests'
+    ]
+    steps_sent = [message for message in sent if message.startswith(('Write', 'Rewrite'))]
+    assert steps_sent == _contents(session_manager, session.id)
+
+    [reload] = [event for event in session_manager.get_session_events(session.id)
+                if event.event_type == 'prompt_reloaded']
+    assert reload.data['from_step'] == 2
+    assert reload.data['changed_steps'] == [2, 3]
+    assert reload.data['added_steps'] == 1
+    assert reload.data['ignored_sent_steps'] == [1]
+
+
+@pytest.mark.asyncio
+async def test_watcher_keeps_polling_after_a_failed_reload(tmp_path, build_config,
+                                                          session_manager, monkeypatch):
+    build_config.set('prompt_reload_interval', 0.01)
+    prompt_file = tmp_path / 'demo.txt'
+    prompt_file.write_text(ORIGINAL)
+    prompt_manager = PromptManager(build_config)
+    prompt = prompt_manager.load_prompt(str(prompt_file))
+    session = session_manager.create_session(prompt)
+
+    orchestrator = BuildOrchestrator(build_config, session_manager, prompt_manager)
+    orchestrator.current_session = session
+    orchestrator.current_prompt = prompt
+    orchestrator.current_step = 1
+    orchestrator.prompt_stamp = orchestrator._prompt_file_stamp()
+    orchestrator.running = True
+
+    replace_pending_steps = session_manager.replace_pending_steps
+    failures = []
+
+    def failing_once(*args):
+        if not failures:
+            failures.append(args)
+            raise SessionError('database is locked')
+        return replace_pending_steps(*args)
+
+    monkeypatch.setattr(session_manager, 'replace_pending_steps', failing_once)
+    watcher = asyncio.create_task(orchestrator._watch_prompt_file())
+    prompt_file.write_text(EDITED)
+    try:
+        for _ in range(500):
+            if len(orchestrator.current_prompt.steps) == 4:
+                break
+            await asyncio.sleep(0.01)
+        assert failures
+        assert not watcher.done()
+    finally:
+        orchestrator.running = False
+        watcher.cancel()
+        try:
+            await watcher
+        except asyncio.CancelledError:
+            pass
+
+    assert _contents(session_manager, session.id) == [
+        'Write the first module', 'Write the parser module', 'Write the renderer module',
+        'Write the tests'
+    ]
@@ -0,0 +1,127 @@
+"""
+SQLite backend features beyond the shared conformance tests
+"""
+
+from datetime import datetime
+
+import pytest
+
+from builder.exceptions import SessionError
+from builder.models import BuildStep, Session, SessionEvent, SessionStatus, StepStatus
+from builder.storage.sqlite import SQLiteBackend
+
+
+def _create(backend: SQLiteBackend, session_id: str, steps=('Write the parser',
+                                                              'Add the lexer')):
+    session = Session(
+        id=session_id, prompt_file='app.yaml', project_name='App',
+        status=SessionStatus.ACTIVE, started_at=datetime.now(), ended_at=None,
+        current_step=0, total_steps=len(steps), error=None, metadata={}
+    )
+    build_steps = [
+        BuildStep(session_id=session_id, step_number=n, description=f'Step {n}', content=content,
+                  status=StepStatus.PENDING, started_at=None, completed_at=None, error=None)
+        for n, content in enumerate(steps, 1)
+    ]
+    backend.create_session(session, build_steps, initial_prompt='Build a calculator app')
+
+
+def _log(backend: SQLiteBackend, session_id: str, event_type: str, **data) -> int:
+    return backend.append_event(SessionEvent(session_id=session_id, timestamp=datetime.now(),
+                                             event_type=event_type, data=data))
+
+
+@pytest.fixture
+def backend(config):
+    backend = SQLiteBackend(config)
+    yield backend
+    backend.close()
+
+
+def test_prune_events_downsample_keeps_first_last_and_every_nth(backend):
+    _create(backend, 's1')
+    ids = [_log(backend, 's1', 'output_received', n=n) for n in range(25)]
+    _log(backend, 's1', 'session_completed')
+
+    removed = backend.prune_events('s1', 'downsample', every=10)
+
+    kept = [e.id for e in backend.iter_events('s1') if e.event_type == 'output_received']
+    assert kept == [ids[0], ids[10], ids[20], ids[24]]
+    assert removed == 21
+    assert [e.event_type for e in backend.iter_events('s1')][-1] == 'session_completed'
+
+
+def test_prune_events_delete_and_unknown_retention(backend):
+    _create(backend, 's1')
+    _create(backend, 's2')
+    _log(backend, 's1', 'tick')
+
+    assert backend.prune_events('s1', 'delete') == 1
+    assert list(backend.iter_events('s1')) == []
+    assert backend.count_sessions() == 2
+    with pytest.raises(SessionError):
+        backend.prune_events('s2', 'forever')
+
+
+def test_search_finds_steps_prompts_events_and_output(backend):
+    _create(backend, 's1')
+    _create(backend, 's2', steps=('Deploy the service',))
+    event_id = _log(backend, 's1', 'step_failed', error='lexer crashed on unicode input')
+    backend.index_output('s1', [('Traceback: lexer token error', 0)])
+
+    results = backend.search('lexer')
+    found = {(r.session_id, r.source, r.ref) for r in results}
+    assert found == {('s1', 'step', 2), ('s1', 'event', event_id), ('s1', 'output', 0)}
+    assert all('[' in r.snippet for r in results)
+
+    assert {r.session_id for r in backend.search('calculator')} == {'s1', 's2'}
+    assert [r.source for r in backend.search('calculator', session_id='s2')] == ['prompt']
+
+
+def test_search_matches_words_literally(backend):
+    _create(backend, 's1')
+
+    assert backend.search('parser AND') == []
+    assert backend.search('"') == []
+    with pytest.raises(SessionError):
+        backend.search('parser AND', raw=True)
+
+
+def test_pruned_events_leave_the_search_index(backend):
+    _create(backend, 's1')
+    ids = [_log(backend, 's1', 'output_received', n=n) for n in range(25)]
+
+    backend.prune_events('s1', 'downsample', every=10)
+
+    assert {r.ref for r in backend.search('output_received')} == {ids[0], ids[10], ids[20],
+                                                                  ids[24]}
+
+
+def test_change_token_moves_with_other_writers(config, backend):
+    _create(backend, 's1')
+    token = backend.change_token()
+    assert backend.change_token() == token
+
+    other = SQLiteBackend(config)
+    try:
+        _log(other, 's1', 'tick')
+    finally:
+        other.close()
+    changed = backend.change_token()
+    assert changed != token
+
+    # Writes through the backend itself use their own connections, so count too
+    _log(backend, 's1', 'tick')
+    assert backend.change_token() != changed
+
+
+@pytest.mark.parametrize('retries', [0, -1])
+def test_writes_happen_without_retries(config, retries):
+    config.set('database_busy_retries', retries)
+    backend = SQLiteBackend(config)
+    try:
+        _create(backend, 's1')
+        assert _log(backend, 's1', 'tick') > 0
+        assert [e.event_type for e in backend.iter_events('s1')] == ['tick']
+    finally:
+        backend.close()
@@ -0,0 +1,186 @@
+"""
+CLI startup stays close to the cost of importing click and every command still runs
+"""
+
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from builder.bench import STARTUP_COMMANDS, startup_time
+from builder.cli import cli
+from builder.exceptions import DaemonError
+from builder.models import BuildStep, Session, SessionStatus, StepStatus
+from builder.session_manager import SessionManager
+from builder.trace import TRACE_FILE_NAME, Tracer
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# The documented target for `--help` and `--version`, over the click floor
+HELP_BUDGET_MS = 50.0
+
+# Modules that only starting or monitoring a build needs
+BUILD_MODULES = {'builder.orchestrator', 'builder.claude_interface', 'builder.daemon',
+                 'builder.detection', 'builder.monitor', 'builder.rpc'}
+
+SESSION_ID = 'c0ffee00-0000-4000-8000-000000000001'
+
+PROMPT = '''# Raivyn [build]
+You will build Demo, a small project.
+
+# Build Steps
+1. Write the first module
+2. Write the second module
+'''
+
+
+@pytest.fixture
+def checkout_on_path(monkeypatch):
+    """Let the interpreters startup_time spawns import builder from this checkout"""
+    paths = [str(REPO_ROOT), os.environ.get('PYTHONPATH')]
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(path for path in paths if path))
+
+
+def test_read_only_commands_start_quickly(checkout_on_path):
+    result = startup_time(commands=[('--help',), *STARTUP_COMMANDS], runs=3)
+    commands = result['commands']
+
+    # Wall times on a busy machine vary by tens of milliseconds, so only a
+    # command taking twice its budget fails here
+    assert all(command['overhead_ms'] <= 2 * result['budget_ms']
+               for command in commands.values()), commands
+    for name in ('--help', '--version'):
+        assert commands[name]['overhead_ms'] <= 2 * HELP_BUDGET_MS, commands[name]
+        assert commands[name]['builder_modules'] == ['builder', 'builder.exceptions']
+    # Lazy imports are what keep them quick, and that part is exact
+    for name, command in commands.items():
+        assert not BUILD_MODULES & set(command['builder_modules']), name
+
+
+@pytest.fixture
+def cli_config(tmp_path, config, monkeypatch):
+    """A saved configuration with one finished session, its trace and a prompt"""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    config.set('use_tmux', False)
+    config_path = tmp_path / 'config.yaml'
+    config.save(config_path)
+
+    session_manager = SessionManager(config)
+    started = datetime.now()
+    session_manager.storage.create_session(Session(
+        id=SESSION_ID, prompt_file='demo.txt', project_name='Demo',
+        status=SessionStatus.COMPLETED, started_at=started, ended_at=started, current_step=1,
+        total_steps=1, error=None, metadata={}
+    ), [BuildStep(session_id=SESSION_ID, step_number=1, description='Write a module',
+                  content='Write the first module', status=StepStatus.COMPLETED,
+                  started_at=started, completed_at=started, error=None)])
+    session_manager.log_event(SESSION_ID, 'output_received', {'text': 'module written'})
+    session_manager.close()
+
+    tracer = Tracer(config.session_dir(SESSION_ID) / TRACE_FILE_NAME, 'Demo')
+    with tracer.span('Step 1', 'step'):
+        pass
+    tracer.close()
+
+    (tmp_path / 'demo.txt').write_text(PROMPT)
+    return config_path
+
+
+SMOKE_COMMANDS = [
+    ('--help',),
+    ('--version',),
+    ('start', '--dry-run', 'demo.txt'),
+    ('status',),
+    ('status', '--session', SESSION_ID, '--detailed'),
+    ('monitor',),
+    ('daemon', '--status'),
+    ('attach', SESSION_ID),
+    ('logs', SESSION_ID),
+    ('kill', SESSION_ID, '--force'),
+    ('list',),
+    ('list', '--all', '--detailed'),
+    ('events', SESSION_ID, '--no-pager'),
+    ('summary', SESSION_ID, '--format', 'html'),
+    ('trace', SESSION_ID),
+    ('search', 'module'),
+    ('stats',),
+    ('stats', '--by-step', '--by-prompt', '--storage'),
+    ('compact',),
+    ('bench', 'detection', '--quick'),
+    ('prompt', 'list'),
+    ('prompt', 'validate', 'demo.txt'),
+    ('prompt', 'convert', 'demo.txt', 'demo.yaml'),
+    ('init',),
+]
+
+
+def test_smoke_commands_cover_the_cli():
+    names = {args[0] for args in SMOKE_COMMANDS if not args[0].startswith('-')}
+    subcommands = {args[1] for args in SMOKE_COMMANDS if args[0] == 'prompt'}
+
+    assert names == set(cli.commands)
+    assert subcommands == set(cli.commands['prompt'].commands)
+
+
+@pytest.mark.parametrize('args', SMOKE_COMMANDS, ids=' '.join)
+def test_command_runs(args, cli_config, monkeypatch):
+    # Serving the dashboard would block; importing it is what matters here
+    monkeypatch.setattr('builder.monitor.BuildMonitor.start', lambda *args, **kwargs: None)
+    monkeypatch.chdir(cli_config.parent)
+
+    result = CliRunner().invoke(cli, ['--config', str(cli_config), *args], input='y\n')
+
+    # A lazy import gone wrong shows up as a NameError or ImportError here
+    assert result.exit_code == 0, result.output
+    assert result.exception is None, result.exc_info
+
+
+def test_list_rejects_a_malformed_cursor(cli_config):
+    result = CliRunner().invoke(cli, ['--config', str(cli_config), 'list', '--all',
+                                      '--after', 'garbage'])
+
+    assert result.exit_code == 1
+    assert 'Invalid session cursor: garbage' in result.output
+    assert isinstance(result.exception, SystemExit)
+
+
+class _LostDaemon:
+    """A daemon client whose connection drops on the first call"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def call(self, method, **params):
+        raise DaemonError("Lost connection to daemon: Broken pipe")
+
+
+@pytest.mark.parametrize('args', [
+    ('status',), ('attach', SESSION_ID), ('kill', SESSION_ID, '--force'), ('list', '--all'),
+], ids=' '.join)
+def test_daemon_errors_are_reported(args, cli_config, monkeypatch):
+    monkeypatch.setattr('builder.cli._daemon_client', lambda config: _LostDaemon())
+
+    result = CliRunner().invoke(cli, ['--config', str(cli_config), *args])
+
+    assert 'Lost connection to daemon' in result.output
+    assert not isinstance(result.exception, DaemonError), result.exc_info
+
+
+def test_init_creates_configuration(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+
+    # Loading the configuration for any command writes the defaults first
+    result = CliRunner().invoke(cli, ['init'], input='y\n')
+
+    assert result.exit_code == 0, result.output
+    config_dir = tmp_path / '.builder'
+    assert yaml.safe_load((config_dir / 'config.yaml').read_text())
+    for name in ('prompts', 'sessions', 'logs', 'templates'):
+        assert (config_dir / name).is_dir()
@@ -0,0 +1,302 @@
+"""
+Conformance tests every storage backend must pass
+
+Each test gets a factory that opens the backend under test on fresh
+scratch storage; calling the factory again reopens the same storage. A
+new backend is covered once it is registered in ``BACKENDS``.
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+import pytest
+
+from builder.analytics import rollup_day
+from builder.models import BuildStep, Session, SessionEvent, SessionStatus, StepStatus
+from builder.storage import BACKENDS
+from builder.storage.base import StorageBackend, to_ms
+
+
+Factory = Callable[[], StorageBackend]
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def factory(request, tmp_path, make_config) -> Factory:
+    backend_class = BACKENDS[request.param]
+    opened = []
+
+    def open_backend() -> StorageBackend:
+        backend = backend_class(make_config(tmp_path, request.param))
+        opened.append(backend)
+        return backend
+
+    yield open_backend
+    for backend in opened:
+        backend.close()
+
+
+def _session(session_id: str, started_at: datetime, steps: int = 3,
+             status: SessionStatus = SessionStatus.ACTIVE) -> Session:
+    return Session(
+        id=session_id, prompt_file='check.yaml', project_name='Check', status=status,
+        started_at=started_at, ended_at=None, current_step=0, total_steps=steps,
+        error=None, metadata={'profile': 'fast'}
+    )
+
+
+def _steps(session_id: str, count: int = 3) -> List[BuildStep]:
+    return [
+        BuildStep(session_id=session_id, step_number=n, description=f'Step {n}',
+                  content=f'Do thing {n}', status=StepStatus.PENDING,
+                  started_at=None, completed_at=None, error=None)
+        for n in range(1, count + 1)
+    ]
+
+
+def _event(session_id: str, event_type: str = 'check', **data) -> SessionEvent:
+    return SessionEvent(session_id=session_id, timestamp=datetime.now(),
+                        event_type=event_type, data=data)
+
+
+def _create(backend: StorageBackend, session_id: str, started_at: datetime = None,
+            **kwargs) -> Session:
+    session = _session(session_id, started_at or datetime.now(), **kwargs)
+    backend.create_session(session, _steps(session_id), _event(session_id, 'session_created'))
+    return session
+
+
+def test_create_and_get(factory):
+    backend = factory()
+    session = _create(backend, 's1')
+    stored = backend.get_session('s1')
+    assert stored is not None, 'created session not found'
+    assert stored.project_name == session.project_name, 'project name changed'
+    assert to_ms(stored.started_at) == to_ms(session.started_at), 'started_at changed'
+    assert stored.metadata == {'profile': 'fast'}, 'metadata changed'
+    assert [s.step_number for s in backend.iter_steps('s1')] == [1, 2, 3], 'steps out of order'
+    assert [e.event_type for e in backend.iter_events('s1')] == ['session_created'], \
+        'creation event missing'
+    assert backend.get_session('missing') is None, 'missing session returned'
+
+
+def test_shared_content_round_trips(factory):
+    backend = factory()
+    for session_id in ('s1', 's2'):
+        backend.create_session(_session(session_id, datetime.now()), _steps(session_id),
+                               initial_prompt='Build the check project')
+    backend.create_session(_session('s3', datetime.now()), _steps('s3'))
+
+    for session_id in ('s1', 's2'):
+        assert backend.get_initial_prompt(session_id) == 'Build the check project', \
+            'initial prompt changed'
+        assert ([s.content for s in backend.iter_steps(session_id)]
+                == ['Do thing 1', 'Do thing 2', 'Do thing 3']), 'step content changed'
+    assert backend.get_initial_prompt('s3') is None, 'missing initial prompt returned'
+    backend.compact()
+    assert backend.get_initial_prompt('s2') == 'Build the check project', \
+        'initial prompt lost on compaction'
+
+
+def test_create_is_idempotent(factory):
+    backend = factory()
+    _create(backend, 's1')
+    created = backend.create_session(_session('s1', datetime.now()), _steps('s1'),
+                                     _event('s1', 'session_created'))
+    assert created is False, 'second create reported success'
+    assert backend.count_sessions() == 1, 'duplicate session stored'
+    assert len(list(backend.iter_events('s1'))) == 1, 'duplicate creation event stored'
+
+
+def test_list_newest_first_with_keyset_paging(factory):
+    backend = factory()
+    base = datetime.now() - timedelta(hours=1)
+    for n in range(5):
+        _create(backend, f's{n}', base + timedelta(minutes=n))
+
+    sessions = backend.list_sessions()
+    assert [s.id for s in sessions] == ['s4', 's3', 's2', 's1', 's0'], 'wrong order'
+
+    page = backend.list_sessions(limit=2)
+    rest = backend.list_sessions(before=(to_ms(page[-1].started_at), page[-1].id))
+    assert [s.id for s in page + rest] == [s.id for s in sessions], 'paging skipped rows'
+    assert backend.count_sessions() == 5, 'wrong count'
+
+
+def test_bulk_load_sessions(factory):
+    backend = factory()
+    _create(backend, 's1')
+    _create(backend, 's2')
+    backend.compact()
+    for n in range(3):
+        backend.append_event(_event('s1', 'tick', n=n))
+    backend.update_step('s2', 1, {'status': StepStatus.COMPLETED})
+
+    details = backend.load_sessions(['s2', 'missing', 's1'])
+    assert set(details) == {'s1', 's2'}, f'loaded {sorted(details)}'
+    assert details['s1'].event_counts == {'session_created': 1, 'tick': 3}, \
+        f"event counts {details['s1'].event_counts}"
+    assert [s.step_number for s in details['s2'].steps] == [1, 2, 3], 'steps out of order'
+    assert details['s2'].steps[0].status == StepStatus.COMPLETED, 'step update not loaded'
+    assert details['s1'].steps[0].content == 'Do thing 1', 'step content not loaded'
+    assert backend.load_sessions([]) == {}, 'empty load returned sessions'
+
+
+def test_update_session_status(factory):
+    backend = factory()
+    _create(backend, 's1')
+    _create(backend, 's2')
+    ended = datetime.now()
+    backend.update_session('s1', {'status': SessionStatus.FAILED, 'ended_at': ended,
+                                  'error': 'boom'}, _event('s1', 'status_changed'))
+
+    stored = backend.get_session('s1')
+    assert stored.status == SessionStatus.FAILED, 'status not updated'
+    assert stored.error == 'boom', 'error not updated'
+    assert to_ms(stored.ended_at) == to_ms(ended), 'ended_at not updated'
+    assert [s.id for s in backend.list_sessions(status=SessionStatus.ACTIVE)] == ['s2'], \
+        'status filter wrong'
+    assert [e.event_type for e in backend.iter_events('s1')][-1] == 'status_changed', \
+        'status event missing'
+
+
+def test_update_step_progress(factory):
+    backend = factory()
+    _create(backend, 's1')
+    started = datetime.now()
+    backend.update_step('s1', 2, {'status': StepStatus.IN_PROGRESS, 'started_at': started},
+                        {'current_step': 2}, _event('s1', 'step_progress', step_number=2))
+
+    step = list(backend.iter_steps('s1'))[1]
+    assert step.status == StepStatus.IN_PROGRESS, 'step status not updated'
+    assert to_ms(step.started_at) == to_ms(started), 'step start not updated'
+    assert backend.get_session('s1').current_step == 2, 'current step not updated'
+
+
+def test_replace_pending_steps(factory):
+    backend = factory()
+    _create(backend, 's1')
+    backend.update_step('s1', 1, {'status': StepStatus.COMPLETED}, {'current_step': 1})
+    replacement = [step.copy(content=f'Edited {step.step_number}')
+                   for step in _steps('s1', 4)[1:]]
+    backend.replace_steps('s1', 2, replacement, _event('s1', 'prompt_reloaded'))
+
+    steps = list(backend.iter_steps('s1'))
+    assert [s.step_number for s in steps] == [1, 2, 3, 4], 'replaced steps out of order'
+    assert steps[0].status == StepStatus.COMPLETED, 'earlier step was replaced'
+    assert [s.content for s in steps[1:]] == ['Edited 2', 'Edited 3', 'Edited 4'], \
+        'pending steps not replaced'
+    assert backend.get_session('s1').total_steps == 4, 'total steps not updated'
+    assert [e.event_type for e in backend.iter_events('s1')][-1] == 'prompt_reloaded', \
+        'reload event missing'
+
+    backend.replace_steps('s1', 3, [])
+    assert len(list(backend.iter_steps('s1'))) == 2, 'removed steps still stored'
+    assert backend.get_session('s1').total_steps == 2, 'total steps not reduced'
+
+
+def test_event_ids_and_cursors(factory):
+    backend = factory()
+    _create(backend, 's1')
+    ids = [backend.append_event(_event('s1', n=n)) for n in range(10)]
+    assert ids == sorted(set(ids)), 'event ids not increasing'
+
+    events = list(backend.iter_events('s1'))
+    assert [e.id for e in events][1:] == ids, 'events out of order'
+    after = list(backend.iter_events('s1', after=ids[4], limit=3))
+    assert [e.id for e in after] == ids[5:8], 'after/limit cursor wrong'
+    assert after[0].data == {'n': 5}, 'event data changed'
+
+
+def test_last_event_id(factory):
+    backend = factory()
+    assert backend.last_event_id() == 0, 'empty store has events'
+    _create(backend, 's1')
+    ids = [backend.append_event(_event('s1', n=n)) for n in range(3)]
+    assert backend.last_event_id() == ids[-1], 'last event id wrong'
+
+    backend.prune_events('s1', 'delete')
+    assert backend.last_event_id() >= ids[-1], 'last event id went back after pruning'
+    assert backend.append_event(_event('s1')) > ids[-1], 'pruned event id reused'
+
+
+def test_explicit_event_ids_are_idempotent(factory):
+    backend = factory()
+    _create(backend, 's1')
+    event = _event('s1', n=1)
+    event.id = 1000
+    assert backend.append_event(event) == 1000, 'explicit id not kept'
+    backend.append_event(event)
+    assert len([e for e in backend.iter_events('s1') if e.id == 1000]) == 1, \
+        'explicit id stored twice'
+    assert backend.append_event(_event('s1')) > 1000, 'allocated id not above explicit id'
+
+
+def test_prune_events(factory):
+    backend = factory()
+    _create(backend, 's1')
+    _create(backend, 's2')
+    for n in range(25):
+        backend.append_event(_event('s1', 'tick', n=n))
+        backend.append_event(_event('s2', 'tick', n=n))
+
+    removed = backend.prune_events('s1', 'downsample', every=10)
+    ticks = [e.data['n'] for e in backend.iter_events('s1') if e.event_type == 'tick']
+    assert ticks == [0, 10, 20, 24], f'downsample kept {ticks}'
+    assert removed == 21, f'downsample reported {removed} removed'
+
+    backend.prune_events('s1', 'delete')
+    assert list(backend.iter_events('s1')) == [], 'delete left events'
+    assert len(list(backend.iter_events('s2'))) == 26, 'pruning touched another session'
+
+
+def test_results_are_copies(factory):
+    backend = factory()
+    _create(backend, 's1')
+    backend.get_session('s1').metadata['profile'] = 'changed'
+    next(backend.iter_events('s1')).data['changed'] = True
+    assert backend.get_session('s1').metadata == {'profile': 'fast'}, 'metadata aliased'
+    assert 'changed' not in next(backend.iter_events('s1')).data, 'event data aliased'
+
+
+def test_session_summary(factory):
+    backend = factory()
+    started = datetime.now() - timedelta(minutes=30)
+    for n, status in enumerate([SessionStatus.COMPLETED, SessionStatus.COMPLETED,
+                                SessionStatus.FAILED]):
+        _create(backend, f's{n}', started)
+        backend.update_session(f's{n}', {'status': status,
+                                         'ended_at': started + timedelta(minutes=10 * (n + 1))})
+
+    summary = backend.summarize_sessions(rollup_day(to_ms(started)))
+    assert summary['total_sessions'] == 3, 'wrong session total'
+    assert summary['status_breakdown'] == {'completed': 2, 'failed': 1}, 'wrong breakdown'
+    assert round(summary['average_duration_minutes']) == 15, 'wrong average duration'
+
+
+def test_compaction_preserves_data(factory):
+    backend = factory()
+    _create(backend, 's1')
+    backend.append_event(_event('s1', n=1))
+    backend.compact()
+    backend.update_session('s1', {'status': SessionStatus.COMPLETED}, _event('s1', n=2))
+    backend.compact()
+    backend.append_event(_event('s1', n=3))
+
+    assert backend.get_session('s1').status == SessionStatus.COMPLETED, 'status lost'
+    assert backend.count_sessions() == 1, 'compaction changed the count'
+    data = [e.data.get('n') for e in backend.iter_events('s1')]
+    assert data == [None, 1, 2, 3], f'events after compaction: {data}'
+
+
+def test_reopen_keeps_data(factory):
+    backend = factory()
+    if not backend.persistent:
+        pytest.skip('backend does not persist')
+    _create(backend, 's1')
+    backend.append_event(_event('s1', n=1))
+    backend.close()
+
+    reopened = factory()
+    assert reopened.get_session('s1') is not None, 'session lost on reopen'
+    assert len(list(reopened.iter_events('s1'))) == 2, 'events lost on reopen'
+    reopened.close()
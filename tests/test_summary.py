@@ -0,0 +1,61 @@
+"""
+Summaries and exports of archived sessions cover their full event history
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from builder.models import BuildStep, Session, SessionEvent, SessionStatus, StepStatus
+from builder.session_manager import SessionManager
+
+
+EVENTS_LINE = '26 (25 output_received, 1 session_completed)'
+
+
+@pytest.fixture(params=['downsample', 'delete'])
+def archived(request, config):
+    """A finished session with 26 events, archived and then pruned"""
+    config.set('archive_event_retention', request.param)
+    session_manager = SessionManager(config)
+    storage = session_manager.storage
+    started = datetime.now() - timedelta(hours=1)
+    storage.create_session(Session(
+        id='s1', prompt_file='app.yaml', project_name='App', status=SessionStatus.ACTIVE,
+        started_at=started, ended_at=None, current_step=1, total_steps=1, error=None,
+        metadata={}
+    ), [BuildStep(session_id='s1', step_number=1, description='Build it', content='Build it',
+                  status=StepStatus.COMPLETED, started_at=started, completed_at=started,
+                  error=None)])
+    for n in range(25):
+        storage.append_event(SessionEvent(session_id='s1', timestamp=started,
+                                          event_type='output_received', data={'n': n}))
+    storage.append_event(SessionEvent(session_id='s1', timestamp=started,
+                                      event_type='session_completed', data={}))
+    storage.update_session('s1', {'status': SessionStatus.COMPLETED,
+                                  'ended_at': started + timedelta(minutes=30)})
+
+    session_manager.archive_session('s1')
+    assert len(list(session_manager.iter_session_events('s1'))) < 26
+    yield session_manager
+    session_manager.close()
+
+
+def test_markdown_summary_counts_archived_events(archived):
+    assert f'- **Events**: {EVENTS_LINE}' in archived.generate_summary('s1', 'markdown')
+
+
+def test_html_summary_counts_archived_events(archived):
+    summary = archived.generate_summary('s1', 'html')
+    assert f'<strong>Events</strong>: {EVENTS_LINE}' in summary
+
+
+def test_json_export_lists_archived_events(archived):
+    export = json.loads(archived.generate_summary('s1', 'json'))
+    assert [event['data'].get('n') for event in export['events']] == [*range(25), None]
+
+
+def test_jsonl_export_lists_archived_events(archived):
+    records = [json.loads(line) for line in archived.generate_summary('s1', 'jsonl').splitlines()]
+    assert [record['type'] for record in records] == ['session', 'step'] + ['event'] * 26
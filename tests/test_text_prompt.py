@@ -0,0 +1,85 @@
+"""
+The line tokenizer reads text prompts exactly as the regex parser it replaced
+"""
+
+import io
+import re
+from pathlib import Path
+
+import pytest
+
+from builder import text_prompt
+from builder.bench import _write_text_prompt
+from builder.exceptions import PromptError
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+PROMPTS = sorted(REPO_ROOT.glob('build_prompts/*.txt'))
+
+EDGE_CASES = '''Notes before the build section.
+# Raivyn [build]   You will build Edge, a tricky project.
+More of the initial prompt,
+10. a numbered line inside it.
+
+# Build Steps
+1. First step
+   with an indented continuation line
+2.\tTabbed step text
+## Sub-heading
+3. Step after a heading
+text between steps
+12. Out-of-order number
+'''
+
+
+def _regex_parse(content: str):
+    """The parser text prompts used before the tokenizer"""
+    build_match = re.search(r'# Raivyn \[build\](.*?)(?=\n#|$)', content, re.DOTALL)
+    step_pattern = r'^(\d+)\.\s+(.+?)(?=^\d+\.|$)'
+    steps = [(int(number), body.strip().split('\n')[0])
+             for number, body in re.findall(step_pattern, content, re.MULTILINE | re.DOTALL)]
+    return build_match.group(1).strip(), steps
+
+
+def _tokenizer_parse(content: str):
+    initial_prompt, tokens = text_prompt.parse(io.StringIO(content), 'prompt.txt')
+    return initial_prompt, [(token.number, token.value) for token in tokens]
+
+
+@pytest.mark.parametrize('path', PROMPTS, ids=[path.name for path in PROMPTS])
+def test_parity_on_shipped_prompts(path):
+    content = path.read_text(encoding='utf-8')
+    assert _tokenizer_parse(content) == _regex_parse(content)
+
+
+def test_parity_on_edge_cases():
+    assert _tokenizer_parse(EDGE_CASES) == _regex_parse(EDGE_CASES)
+
+
+def test_parity_on_generated_prompt(tmp_path):
+    path = tmp_path / 'large.txt'
+    _write_text_prompt(path, 2 ** 18)
+    content = path.read_text(encoding='utf-8')
+    assert _tokenizer_parse(content) == _regex_parse(content)
+
+
+def test_tokens_carry_positions():
+    _, tokens = text_prompt.parse(io.StringIO(EDGE_CASES), 'prompt.txt')
+    assert [(token.line, token.column) for token in tokens] == [
+        (4, 5), (7, 4), (9, 4), (11, 4), (13, 5)]
+
+
+def test_step_without_text_reports_its_position():
+    content = '# Raivyn [build]\nBuild it.\n1. Do it\n2.\n3. Finish\n'
+    with pytest.raises(PromptError, match=r'prompt\.txt:4:3: Step 2 has no text'):
+        text_prompt.parse(io.StringIO(content), 'prompt.txt')
+
+
+@pytest.mark.parametrize('content, message', [
+    ('1. A step\n', 'No .* section'),
+    ('# Raivyn [build]\nBuild it.\n', 'No numbered steps'),
+])
+def test_missing_sections(content, message):
+    with pytest.raises(PromptError, match=message):
+        text_prompt.parse(io.StringIO(content), 'prompt.txt')
@@ -0,0 +1,62 @@
+"""
+Trace files stay loadable while buffered, after closing and after reopening
+"""
+
+import json
+
+from builder.trace import Tracer, load_trace, summarize_trace
+
+
+def _names(path):
+    return [event['name'] for event in load_trace(path) if event['ph'] != 'M']
+
+
+def test_flush_writes_buffered_events(tmp_path):
+    path = tmp_path / 'trace.json'
+    tracer = Tracer(path, 'Test', flush_events=3)
+
+    tracer.instant('one', 'step')
+    tracer.instant('two', 'step')
+    assert not path.exists()
+    tracer.instant('three', 'step')  # Fills the buffer
+    assert _names(path) == ['one', 'two', 'three']
+
+    with tracer.span('four', 'tmux'):
+        pass
+    tracer.flush()
+    assert _names(path) == ['one', 'two', 'three', 'four']
+    tracer.flush()  # Nothing buffered
+    assert _names(path) == ['one', 'two', 'three', 'four']
+
+
+def test_close_writes_valid_json(tmp_path):
+    path = tmp_path / 'trace.json'
+    tracer = Tracer(path, 'Test')
+    tracer.begin('build', 'session')
+    tracer.end('build', 'session')
+    tracer.close()
+
+    events = json.loads(path.read_text())
+    names = {event['args']['name'] for event in events if event['name'] == 'thread_name'}
+    assert 'Other' in names
+    assert [event['ph'] for event in events if event['ph'] != 'M'] == ['B', 'E']
+
+
+def test_reopen_appends_to_closed_trace(tmp_path):
+    path = tmp_path / 'trace.json'
+    first = Tracer(path, 'Test')
+    with first.span('first run', 'step'):
+        pass
+    first.close()
+
+    # A resumed session traces into the same file
+    second = Tracer(path, 'Test')
+    with second.span('second run', 'step'):
+        pass
+    second.flush()
+    assert _names(path) == ['first run', 'second run']
+    second.close()
+
+    events = json.loads(path.read_text())
+    assert [e['name'] for e in events if e['ph'] == 'X'] == ['first run', 'second run']
+    assert summarize_trace(events)['categories']['step']['spans'] == 2